@@ -1,10 +1,12 @@
-from .base import AugerBaseApi
+from .base import AugerBaseApi, PollPolicy
 from .cluster_task import AugerClusterTaskApi
 
 
 class AugerActualApi(AugerBaseApi):
     """Auger Trial API."""
 
+    poll_policy = PollPolicy(max_interval=5)
+
     def __init__(self, ctx, pipeline_api, use_endpoint=False):
         super(AugerActualApi, self).__init__(ctx, pipeline_api)
         self.use_endpoint = use_endpoint
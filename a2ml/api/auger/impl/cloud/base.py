@@ -1,13 +1,38 @@
+import os
+import random
 import re
 import time
 
 from ..exceptions import AugerException
 
-STATE_POLL_INTERVAL = 10
+# Max interval between status checks
+STATE_POLL_INTERVAL = float(os.environ.get('AUGER_STATE_POLL_INTERVAL', 10))
+STATE_POLL_MIN_INTERVAL = float(os.environ.get('AUGER_STATE_POLL_MIN_INTERVAL', 0.25))
+STATE_POLL_BACKOFF = float(os.environ.get('AUGER_STATE_POLL_BACKOFF', 1.5))
+STATE_POLL_JITTER = float(os.environ.get('AUGER_STATE_POLL_JITTER', 0.2))
+
+class PollPolicy(object):
+    """Intervals between status checks: start with min_interval and multiply by backoff up to
+    max_interval, each interval is randomized by +-jitter part of it."""
+
+    def __init__(self, min_interval=None, max_interval=None, backoff=None, jitter=None):
+        self.min_interval = STATE_POLL_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = STATE_POLL_INTERVAL if max_interval is None else max_interval
+        self.backoff = STATE_POLL_BACKOFF if backoff is None else backoff
+        self.jitter = STATE_POLL_JITTER if jitter is None else jitter
+
+    def intervals(self):
+        interval = min(self.min_interval, self.max_interval)
+        while True:
+            yield interval * (1 + random.uniform(-self.jitter, self.jitter))
+            interval = min(interval * self.backoff, self.max_interval)
 
 class AugerBaseApi(object):
     """Auger API base class implements common business object calls."""
 
+    # Subclasses set own policy for expected time of their operations
+    poll_policy = PollPolicy()
+
     def __init__(
         self, ctx, parent_api,
         object_name=None, object_id=None):
@@ -65,30 +90,49 @@ class AugerBaseApi(object):
                 self.object_in_camel_case, self.oid).\
                 get('data').get(self._get_status_name())
 
-    def wait_for_status(self, progress):
-        object_readable_name=self._get_readable_name()
-        status_value = self.status()
-        last_status = ''
+    def wait_for_status(self, progress, poll_policy=None):
+        return AugerBaseApi.wait_for_statuses([self], progress, poll_policy)[0]
+
+    @staticmethod
+    def wait_for_statuses(apis, progress, poll_policy=None):
+        """Waits until status of all objects is not in progress, objects are checked together
+        with intervals of poll_policy (policy of the first object by default), intervals start
+        from the min one again when status of any object is changed."""
+        poll_policy = poll_policy or apis[0].poll_policy
+        statuses = [api.status() for api in apis]
+        last_statuses = [''] * len(apis)
+        intervals = poll_policy.intervals()
+
+        while True:
+            pending = [idx for (idx, status_value) in enumerate(statuses) if status_value in progress]
+            if not pending:
+                break
+
+            for idx in pending:
+                if statuses[idx] != last_statuses[idx]:
+                    last_statuses[idx] = statuses[idx]
+                    apis[idx]._log_status(statuses[idx])
+                    intervals = poll_policy.intervals()
+
+            time.sleep(next(intervals))
+            for idx in pending:
+                statuses[idx] = apis[idx].status()
 
-        while status_value in progress:
-            if status_value != last_status:
-                last_status = status_value
-                self._log_status(status_value)
+        for (api, status_value) in zip(apis, statuses):
+            api._check_status(status_value)
 
-            while status_value == last_status:
-                time.sleep(STATE_POLL_INTERVAL)
-                status_value = self.status()
+        return statuses
 
+    def _check_status(self, status_value):
         if status_value == 'processed_with_error':
             props = self.properties()
             raise AugerException(
-                '%s processed with error: %s' % (object_readable_name, props.get('error_message', '')))
+                '%s processed with error: %s' % (self._get_readable_name(), props.get('error_message', '')))
         elif status_value == 'error' or status_value == "failure":
             props = self.properties()
             raise AugerException('Auger Cloud return error: %s. Error details: %s'%(props.get('result', ''), props.get('error_message', '')))
 
         self._log_status(status_value)
-        return status_value
 
     def delete(self):
         self.rest_api.call(
@@ -1,12 +1,15 @@
 import time
 
-from .base import AugerBaseApi
+from .base import AugerBaseApi, PollPolicy
 from .trial import AugerTrialApi
 from ..exceptions import AugerException
 
 class AugerExperimentSessionApi(AugerBaseApi):
     """Auger Experiment Api."""
 
+    # Experiments run for minutes or hours
+    poll_policy = PollPolicy(min_interval=2, max_interval=60)
+
     def __init__(self, ctx, experiment_api=None,
         session_name=None, session_id=None):
         super(AugerExperimentSessionApi, self).__init__(
@@ -1,10 +1,13 @@
-from .base import AugerBaseApi
+from .base import AugerBaseApi, PollPolicy
 from ..exceptions import AugerException
 
 
 class AugerPredictionApi(AugerBaseApi):
     """Auger Trial API."""
 
+    # Predictions usually take less than second
+    poll_policy = PollPolicy(max_interval=5)
+
     def __init__(self, ctx, pipeline_api, use_endpoint=False):
         super(AugerPredictionApi, self).__init__(ctx, pipeline_api)
         assert pipeline_api is not None, 'Pipeline must be set for Prediction'
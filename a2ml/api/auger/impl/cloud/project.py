@@ -1,5 +1,5 @@
 import time
-from .base import AugerBaseApi
+from .base import AugerBaseApi, PollPolicy
 from .cluster import AugerClusterApi
 from ..exceptions import AugerException
 
@@ -7,6 +7,9 @@ from ..exceptions import AugerException
 class AugerProjectApi(AugerBaseApi):
     """Auger Project API."""
 
+    # Cluster deploy takes minutes
+    poll_policy = PollPolicy(min_interval=2, max_interval=30)
+
     def __init__(self, ctx, org_api,
         project_name=None, project_id=None):
         super(AugerProjectApi, self).__init__(
@@ -1,11 +1,13 @@
 import os
 import json
+import logging
 import time
 
 from .exceptions import AzureException
 from a2ml.api.utils.dataframe import DataFrame
 from a2ml.api.utils import fsclient, retry_helper
 from a2ml.api.utils.decorators import error_handler, authenticated
+from a2ml.api.utils.model_registry import model_registry
 from a2ml.api.model_review.model_helper import ModelHelper
 from a2ml.api.model_review.model_review import ModelReview
 from .credentials import Credentials
@@ -499,10 +501,11 @@ def get_df(data):
         if not is_loaded:
             raise Exception("Model should be deployed before predict.")
 
-        fitted_model = fsclient.load_object_from_file(model_path, use_local_cache=True)
+        local_model = model_registry.get(model_path, AzureModel.load_local_model)
+        fitted_model = local_model['model']
         model_features = None
         try:
-            options = fsclient.read_json_file(os.path.join(self.ctx.config.get_model_path(model_id), "options.json"))
+            options = local_model['options']
 
             model_features = options.get("originalFeatureColumns")
             predict_data = predict_data[model_features]
@@ -519,12 +522,27 @@ def get_df(data):
         else:
             results = fitted_model.predict(predict_data)
 
-        target_categoricals = fsclient.read_json_file(os.path.join(
-                self.ctx.config.get_model_path(model_id), "target_categoricals.json"))
+        target_categoricals = local_model['target_categoricals']
         target_categories = target_categoricals.get(self.ctx.config.get('target'), {}).get("categories")
 
         return results, results_proba, proba_classes, target_categories, model_features
 
+    @staticmethod
+    def load_local_model(model_path):
+        """Fitted model with options and target categoricals from the model folder, cached by model_registry."""
+        model_folder = os.path.dirname(model_path)
+        options = None
+        try:
+            options = fsclient.read_json_file(os.path.join(model_folder, "options.json"))
+        except Exception as e:
+            logging.error("Read options of model %s failed: %s" % (model_path, e))
+
+        return {
+            'model': fsclient.load_object_from_file(model_path, use_local_cache=True),
+            'options': options,
+            'target_categoricals': fsclient.read_json_file(os.path.join(model_folder, "target_categoricals.json")),
+        }
+
     @error_handler
     @authenticated
     def undeploy(self, model_id, locally):
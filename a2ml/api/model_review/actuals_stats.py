@@ -0,0 +1,208 @@
+import json
+import logging
+
+import numpy as np
+
+from a2ml.api.utils import fsclient
+from a2ml.api.utils.dataframe import DataFrame
+
+from .distribution_stats import DistributionStats
+from .group_scores import GroupScores
+from .model_helper import ModelHelper
+
+
+class ActualsStats(object):
+    """Mergeable aggregates of an actuals file stored in a json sidecar next to it.
+
+    Sidecar has confusion matrix counts (classification) or error sums (regression) of the
+    preprocessed targets and DistributionStats of features, so daily scores and distribution
+    stats are calculated by merging sidecars instead of reading data files. Anything that needs
+    rows (ROI, baseline target, rank based scores) falls back to data files.
+    """
+    VERSION = 1
+    DATA_SUFFIX = '.feather.zstd'
+    SIDECAR_SUFFIX = '.stats.json'
+
+    @staticmethod
+    def get_sidecar_path(path):
+        if path.endswith(ActualsStats.DATA_SUFFIX):
+            path = path[:-len(ActualsStats.DATA_SUFFIX)]
+
+        return path + ActualsStats.SIDECAR_SUFFIX
+
+    @staticmethod
+    def build(model_path, options, df, features, categorical_features=[]):
+        """Aggregates of actuals frame as saved to file: target is actual, a2ml_predicted is prediction."""
+        import pyarrow as pa # pylint: disable=C0415
+
+        target_feature = options.get('targetFeature')
+        columns = list(df.columns)
+        features = [feature for feature in features if feature in columns]
+        used_columns = list(set(features + [column for column in [target_feature, 'a2ml_predicted'] if column in columns]))
+
+        # Same types as data loaded from the feather file
+        df = pa.Table.from_pandas(df[used_columns], preserve_index=False).to_pandas()
+
+        distribution = DistributionStats(features, categorical_features).add_df(df).stats
+        for stats in distribution.values():
+            if not np.isfinite(stats['mean']) or not np.isfinite(stats['m2']):
+                # Not representable in json
+                distribution = None
+                break
+
+        return {
+            'version': ActualsStats.VERSION,
+            'rows': len(df),
+            'columns': columns,
+            'has_baseline': 'baseline_target' in columns,
+            'scores': ActualsStats._build_scores(model_path, options, df, target_feature),
+            'features': features,
+            'categorical_features': [feature for feature in categorical_features if feature in features],
+            'distribution': distribution,
+        }
+
+    @staticmethod
+    def save(path, model_path, options, df, features, categorical_features=[]):
+        # Sidecar is optional, data file is the source of truth
+        try:
+            fsclient.write_json_file(ActualsStats.get_sidecar_path(path),
+                ActualsStats.build(model_path, options, df, features, categorical_features), atomic=True)
+        except Exception as e:
+            logging.error("Save actuals stats for %s failed: %s" % (path, e))
+
+    @staticmethod
+    def get_sidecar_paths(paths):
+        return [ActualsStats.get_sidecar_path(path) for path in paths if path.endswith(ActualsStats.DATA_SUFFIX)]
+
+    @staticmethod
+    def load(files):
+        """Returns list of sidecars of files or None if some file has no sidecar."""
+        res = []
+        for file in files:
+            path = ActualsStats.get_sidecar_path(file if type(file) == str else file['path'])
+            if not fsclient.is_file_exists(path):
+                return None
+
+            sidecar = json.loads(fsclient.read_text_file(path))
+            if sidecar.get('version') != ActualsStats.VERSION:
+                return None
+
+            res.append(sidecar)
+
+        return res
+
+    @staticmethod
+    def calculate_scores(options, sidecars):
+        """Scores of merged sidecars same as ModelHelper.calculate_scores of files data or None."""
+        if not sidecars or not GroupScores.is_supported(options):
+            return None
+
+        scores = [sidecar['scores'] for sidecar in sidecars]
+        if any(item is None or item['task_type'] != options.get('task_type') for item in scores):
+            return None
+
+        group_scores = GroupScores(options)
+        if options.get('task_type') == 'classification':
+            labels, confusion = ActualsStats._merge_confusion(scores)
+            if labels is None:
+                return None
+
+            return group_scores.calculate_from_confusion(labels, confusion[np.newaxis])[0]
+
+        sums = ActualsStats._merge_regression_sums(scores)
+        return group_scores.calculate_from_sums(dict((key, [value]) for key, value in sums.items()))[0]
+
+    @staticmethod
+    def merge_distribution(sidecars, features, categorical_features=[]):
+        """DistributionStats of merged sidecars or None if sidecars were built for other features."""
+        if not sidecars:
+            return None
+
+        stats = DistributionStats(features, categorical_features)
+        for sidecar in sidecars:
+            if sidecar['distribution'] is None:
+                return None
+
+            for feature in features:
+                if not feature in sidecar['columns']:
+                    # add_df skips missed columns too
+                    continue
+
+                if not feature in sidecar['features'] or \
+                        (feature in categorical_features) != (feature in sidecar['categorical_features']):
+                    return None
+
+            stats.merge(sidecar['distribution'])
+
+        return stats
+
+    @staticmethod
+    def _build_scores(model_path, options, df, target_feature):
+        if not target_feature in df.columns or not 'a2ml_predicted' in df.columns:
+            return None
+
+        ds_true = DataFrame({})
+        ds_true.df = df[[target_feature]]
+        ds_predict = DataFrame({})
+        ds_predict.df = df[['a2ml_predicted']].rename(columns={'a2ml_predicted': target_feature})
+
+        y_true, _ = ModelHelper.preprocess_target_ds(model_path, ds_true, options)
+        y_pred, _ = ModelHelper.preprocess_target_ds(model_path, ds_predict, options)
+        if y_true is None or y_pred is None:
+            return None
+
+        group_codes = np.zeros(len(y_true), dtype=np.int64)
+        if options.get('task_type') == 'classification':
+            labels, codes = GroupScores.encode_labels(np.asarray(y_true), np.asarray(y_pred))
+            if labels is None:
+                return None
+
+            confusion = GroupScores.build_confusion(codes[:len(y_true)], codes[len(y_true):], group_codes, 1, len(labels))
+            return {'task_type': 'classification', 'labels': labels.tolist(), 'confusion': confusion[0].tolist()}
+
+        sums = GroupScores.build_regression_sums(np.asarray(y_true), np.asarray(y_pred), group_codes, 1)
+        if sums is None:
+            return None
+
+        return {'task_type': options.get('task_type'), 'sums': dict((key, value[0].item()) for key, value in sums.items())}
+
+    @staticmethod
+    def _merge_confusion(scores):
+        all_labels = [label for item in scores for label in item['labels']]
+        # Same as encode_labels: strings or numbers, not mixed
+        if len(set(isinstance(label, str) for label in all_labels)) > 1:
+            return None, None
+
+        labels = np.unique(np.array(all_labels)) if all_labels else np.array([])
+        labels_list = labels.tolist()
+        confusion = np.zeros((max(len(labels), 1), max(len(labels), 1)), dtype=np.int64)
+
+        for item in scores:
+            if item['labels']:
+                idx = [labels_list.index(label) for label in item['labels']]
+                confusion[np.ix_(idx, idx)] += np.array(item['confusion'], dtype=np.int64)
+
+        return labels, confusion
+
+    @staticmethod
+    def _merge_regression_sums(scores):
+        res = None
+        for item in scores:
+            sums = item['sums']
+            if res is None:
+                res = dict(sums)
+                continue
+
+            n = res['n'] + sums['n']
+            if res['n'] > 0 and sums['n'] > 0:
+                # Chan's parallel update of m2
+                delta = sums['sum_y'] / sums['n'] - res['sum_y'] / res['n']
+                res['m2'] += sums['m2'] + delta**2 * res['n'] * sums['n'] / n
+            else:
+                res['m2'] += sums['m2']
+
+            for key, value in sums.items():
+                if key != 'm2':
+                    res[key] += value
+
+        return res
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import os
+
+from a2ml.api.utils import fsclient
+
+from .prediction_files_index import PredictionFilesIndex
+
+
+class DailyScoresCache(object):
+    """Per-day performance scores stored in predictions/daily_scores_cache.json.
+
+    Day entry is used while its key matches: hash of the day files (names, sizes, modification
+    times) and of the options scores depend on. add_actuals/delete_actuals invalidate changed
+    days, so entries are dropped even if file metadata is not known.
+    """
+    def __init__(self, model_path, options_hash):
+        self.cache_path = DailyScoresCache.get_cache_path(model_path)
+        self.options_hash = options_hash
+        self._days = None
+        self._changed = False
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def get_cache_path(model_path):
+        return os.path.join(model_path, "predictions", PredictionFilesIndex.SCORES_CACHE_NAME)
+
+    @staticmethod
+    def build_options_hash(options, params, extra_features):
+        options = dict((key, value) for key, value in options.items() if key != 'hub_info')
+
+        return DailyScoresCache._hash({
+            'options': options,
+            'roi': params.get('roi'),
+            'extra_features': extra_features,
+        })
+
+    def build_key(self, files_meta):
+        return DailyScoresCache._hash([self.options_hash, sorted(files_meta)])
+
+    def get(self, day, key):
+        """Returns cached entry {'key', 'result'} of the day or None, result is None for days without actuals."""
+        entry = self._load().get(day)
+        if entry is not None and entry.get('key') == key:
+            self.stats['hits'] += 1
+            return entry
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, day, key, result):
+        self._load()[day] = {'key': key, 'result': result}
+        self._changed = True
+
+    def save(self):
+        if not self._changed:
+            return
+
+        try:
+            fsclient.write_json_file(self.cache_path, {'days': self._days}, atomic=True)
+            self._changed = False
+        except Exception as e:
+            logging.error("Save daily scores cache %s failed: %s" % (self.cache_path, e))
+
+    def get_stats(self):
+        res = dict(self.stats)
+        total = res['hits'] + res['misses']
+        res['hit_rate'] = round(res['hits'] / total, 4) if total else None
+
+        return res
+
+    @staticmethod
+    def invalidate(model_path, days):
+        """Removes entries of days (dates or YYYY-MM-DD strings) and of the whole range ('today')."""
+        cache_path = DailyScoresCache.get_cache_path(model_path)
+        if not fsclient.is_file_exists(cache_path):
+            return
+
+        cache_days = fsclient.read_json_file(cache_path).get('days', {})
+        removed = False
+        for day in set([str(day) for day in days] + ['today']):
+            if cache_days.pop(day, None) is not None:
+                removed = True
+
+        if removed:
+            fsclient.write_json_file(cache_path, {'days': cache_days}, atomic=True)
+
+    def _load(self):
+        if self._days is None:
+            try:
+                self._days = fsclient.read_json_file(self.cache_path).get('days', {})
+            except Exception as e:
+                logging.error("Load daily scores cache %s failed: %s" % (self.cache_path, e))
+                self._days = {}
+
+        return self._days
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
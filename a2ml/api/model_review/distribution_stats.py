@@ -0,0 +1,96 @@
+import math
+
+from a2ml.api.utils import merge_dicts
+
+
+class DistributionStats(object):
+    """Mergeable per-feature statistics: count, mean and M2 for numeric features and
+    value counts for categorical ones.
+
+    Data is added chunk by chunk (one file at a time) and chunks are combined with
+    Chan's parallel update of mean and variance, so the whole data never has to be in memory.
+    """
+    def __init__(self, features, categorical_features=[]):
+        self.features = features
+        self.categorical_features = categorical_features
+        self.stats = {}
+
+        for feature in features:
+            self.stats[feature] = DistributionStats._empty_feature_stats()
+
+    @staticmethod
+    def _empty_feature_stats():
+        # count - all not null values, n - not null numeric values
+        return {'count': 0, 'n': 0, 'mean': 0.0, 'm2': 0.0, 'dist': None}
+
+    def add_df(self, df):
+        for feature in self.features:
+            if feature in df.columns:
+                self.merge_feature(feature, self.calc_feature_stats(df[feature], feature in self.categorical_features))
+
+        return self
+
+    @staticmethod
+    def calc_feature_stats(series, is_categorical=False):
+        res = DistributionStats._empty_feature_stats()
+        count = series.count()
+        res['count'] = count
+
+        if series.dtype.name in ['category', 'string', 'object'] or is_categorical:
+            res['dist'] = dict(series.value_counts())
+        elif count > 0:
+            mean = series.sum() / count
+            res['n'] = count
+            res['mean'] = mean
+            res['m2'] = ((series - mean)**2).sum()
+
+        return res
+
+    def merge(self, other):
+        other_stats = other.stats if isinstance(other, DistributionStats) else other
+
+        for feature in self.features:
+            if feature in other_stats:
+                self.merge_feature(feature, other_stats[feature])
+
+        return self
+
+    def merge_feature(self, feature, other):
+        stats = self.stats[feature]
+        stats['count'] += other['count']
+
+        if other['dist'] is not None:
+            stats['dist'] = merge_dicts(stats['dist'] or {}, other['dist'], lambda v, ov: v + ov)
+
+        if other['n'] > 0:
+            if stats['n'] == 0:
+                stats['n'] = other['n']
+                stats['mean'] = other['mean']
+                stats['m2'] = other['m2']
+            else:
+                n = stats['n'] + other['n']
+                delta = other['mean'] - stats['mean']
+                stats['mean'] += delta * other['n'] / n
+                stats['m2'] += other['m2'] + delta**2 * stats['n'] * other['n'] / n
+                stats['n'] = n
+
+    def get_result(self, feature_mapper={}, feature_importances={}):
+        res = {}
+
+        for feature in self.features:
+            stats = self.stats[feature]
+            count = stats['count']
+
+            if count > 0:
+                feature_key = feature_mapper.get(feature, feature)
+                if stats['dist'] is None:
+                    res[feature_key] = {
+                        "avg": stats['mean'],
+                        "std_dev": math.sqrt(stats['m2'] / (count - 1)) if count > 1 else 0
+                    }
+                else:
+                    res[feature_key] = { 'dist': stats['dist'] }
+
+                res[feature_key]['imp'] = round(feature_importances.get(feature, 0), 6)
+
+        return res
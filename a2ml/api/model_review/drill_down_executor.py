@@ -0,0 +1,157 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+DRILL_DOWN_EXECUTOR = os.environ.get('DRILL_DOWN_EXECUTOR', 'processes')
+DRILL_DOWN_WORKERS_COUNT = int(os.environ.get('DRILL_DOWN_WORKERS_COUNT', 0))
+DRILL_DOWN_MIN_PARALLEL_ROWS = int(os.environ.get('DRILL_DOWN_MIN_PARALLEL_ROWS', 50000))
+
+# Frame and function of the process pool worker, set once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(func, frame_path, df):
+    if frame_path:
+        df = DrillDownExecutor.read_shared_frame(frame_path)
+
+    _worker_state['func'] = func
+    _worker_state['df'] = df
+
+def _run_worker_chunk(chunk):
+    return DrillDownExecutor.run_chunk(_worker_state['func'], _worker_state['df'], chunk)
+
+
+class DrillDownExecutor(object):
+    """Runs func(df, chunk) for chunks of drill-down buckets with serial, threads or processes executor.
+
+    Process workers get the frame once: it is written to an Arrow IPC file which workers memory map,
+    only chunks (bucket rows) are sent with tasks. Work smaller than min_parallel_rows runs serially.
+    """
+    EXECUTORS = ['serial', 'threads', 'processes']
+
+    def __init__(self, executor=None, workers_count=None, min_parallel_rows=None):
+        self.executor = executor or DRILL_DOWN_EXECUTOR
+        if self.executor not in self.EXECUTORS:
+            raise Exception("Unknown drill-down executor: %s. Supported: %s" % (self.executor, self.EXECUTORS))
+
+        self.workers_count = workers_count or DRILL_DOWN_WORKERS_COUNT or DrillDownExecutor.get_cpu_count()
+        self.min_parallel_rows = DRILL_DOWN_MIN_PARALLEL_ROWS if min_parallel_rows is None else min_parallel_rows
+
+    @staticmethod
+    def from_params(params):
+        return DrillDownExecutor(
+            executor=params.get('drill_down_executor'),
+            workers_count=params.get('drill_down_workers_count'),
+            min_parallel_rows=params.get('drill_down_min_parallel_rows')
+        )
+
+    @staticmethod
+    def get_cpu_count():
+        if hasattr(os, 'sched_getaffinity'):
+            cpu_count = len(os.sched_getaffinity(0))
+        else:
+            cpu_count = os.cpu_count() or 1
+
+        return max(1, cpu_count - 1)
+
+    def map(self, func, df, chunks, rows_count=None):
+        """Returns list of func(df, chunk) results in chunks order."""
+        chunks = list(chunks)
+        if rows_count is None:
+            rows_count = len(df)
+
+        executor = self.executor
+        workers_count = min(self.workers_count, len(chunks))
+        if workers_count < 2 or rows_count < self.min_parallel_rows:
+            executor = 'serial'
+            workers_count = 1
+
+        logging.info("Drill-down executor: %s, workers_count: %s, n_chunks: %s, rows: %s" % (
+            executor, workers_count, len(chunks), rows_count))
+
+        start = time.time()
+        if executor == 'processes':
+            results = self._map_processes(func, df, chunks, workers_count)
+        elif executor == 'threads':
+            from concurrent.futures import ThreadPoolExecutor # pylint: disable=C0415
+
+            with ThreadPoolExecutor(max_workers=workers_count) as pool:
+                results = list(pool.map(lambda chunk: DrillDownExecutor.run_chunk(func, df, chunk), chunks))
+        else:
+            results = [DrillDownExecutor.run_chunk(func, df, chunk) for chunk in chunks]
+
+        DrillDownExecutor._log_stats(results, time.time() - start)
+        return [result for result, _ in results]
+
+    @staticmethod
+    def run_chunk(func, df, chunk):
+        start = time.time()
+        result = func(df, chunk)
+
+        return result, {
+            'worker': "%s:%s" % (os.getpid(), threading.current_thread().name),
+            'time': time.time() - start,
+            'size': len(chunk),
+        }
+
+    def _map_processes(self, func, df, chunks, workers_count):
+        from multiprocess import Pool # pylint: disable=C0415
+
+        frame_path = DrillDownExecutor.write_shared_frame(df)
+        try:
+            initargs = (func, frame_path, None if frame_path else df)
+            with Pool(workers_count, initializer=_init_worker, initargs=initargs) as p:
+                return list(p.imap(_run_worker_chunk, chunks))
+        finally:
+            if frame_path:
+                os.remove(frame_path)
+
+    @staticmethod
+    def write_shared_frame(df):
+        # Returns None if frame can't be converted to Arrow, it is pickled to workers then
+        import pyarrow as pa # pylint: disable=C0415
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+        except Exception as e:
+            logging.info("Drill-down frame is not shared with Arrow: %s" % e)
+            return None
+
+        fd, frame_path = tempfile.mkstemp(suffix='.arrow', dir=os.environ.get('AUGER_LOCAL_TMP_DIR') or None)
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        except Exception:
+            os.remove(frame_path)
+            raise
+
+        return frame_path
+
+    @staticmethod
+    def read_shared_frame(frame_path):
+        import pyarrow as pa # pylint: disable=C0415
+
+        # Numeric columns may reference the mapped file, it stays mapped while they are alive
+        source = pa.memory_map(frame_path, 'r')
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+    @staticmethod
+    def _log_stats(results, elapsed):
+        workers = {}
+        for _, stats in results:
+            logging.info("Drill-down chunk: worker: %s, size: %s, time: %.3fs" % (
+                stats['worker'], stats['size'], stats['time']))
+
+            worker = workers.setdefault(stats['worker'], {'size': 0, 'time': 0.0})
+            worker['size'] += stats['size']
+            worker['time'] += stats['time']
+
+        for name, worker in workers.items():
+            logging.info("Drill-down worker: %s, size: %s, time: %.3fs, throughput: %.1f/s" % (
+                name, worker['size'], worker['time'], worker['size'] / worker['time'] if worker['time'] else 0))
+
+        logging.info("Drill-down executor done: chunks: %s, workers: %s, time: %.3fs" % (
+            len(results), len(workers), elapsed))
@@ -0,0 +1,367 @@
+import inspect
+import os
+
+import numpy as np
+
+
+class GroupScores(object):
+    """Scores for groups of actuals (e.g. drill-down buckets) computed from sufficient statistics.
+
+    Rows are assigned to groups once, confusion matrix counts (classification) and error sums
+    (regression) are accumulated for all groups with np.bincount and scores are derived from these
+    aggregates the same way as sklearn scorers used by ModelHelper.calculate_scores do it.
+    Use is_supported to check options; calculate returns None when labels can't be handled.
+    """
+    CONFUSION_SCORES = ['TN', 'FP', 'FN', 'TP']
+    PRF_SCORES = ['precision', 'recall', 'f1']
+
+    CLASSIFICATION_SCORES = set([
+        'accuracy', 'precision', 'recall', 'f1',
+        'precision_micro', 'precision_macro', 'precision_weighted', 'precision_none',
+        'recall_micro', 'recall_macro', 'recall_weighted', 'recall_none',
+        'f1_micro', 'f1_macro', 'f1_weighted', 'f1_none',
+    ])
+
+    REGRESSION_SCORES = set([
+        'neg_mean_absolute_error', 'neg_mean_squared_error', 'neg_root_mean_squared_error', 'neg_rmse',
+        'r2', 'r2_score'
+    ])
+
+    # Scores which are not known by sklearn, calculate_scores sets them to 0
+    UNKNOWN_SCORES = set(['roi'])
+
+    MAX_CONFUSION_CELLS = int(os.environ.get('GROUP_SCORES_MAX_CONFUSION_CELLS', 2 * 10**7))
+
+    def __init__(self, options):
+        self.options = options
+        self.score_names = [name for name in options.get('scoreNames', [])
+            if name.upper() not in self.CONFUSION_SCORES]
+
+    @staticmethod
+    def is_supported(options):
+        if options.get('fold_group') == 'time_series_standard_model' or options.get('score_top_count'):
+            return False
+
+        if options.get('task_type') == 'classification':
+            known_scores = GroupScores.CLASSIFICATION_SCORES
+        elif options.get('task_type') == 'regression' and not options.get('binaryClassification'):
+            known_scores = GroupScores.REGRESSION_SCORES
+        else:
+            return False
+
+        for name in options.get('scoreNames', []):
+            if name.upper() in GroupScores.CONFUSION_SCORES or name in GroupScores.UNKNOWN_SCORES:
+                continue
+
+            if not name in known_scores:
+                return False
+
+        return True
+
+    def calculate(self, y_true, y_pred, group_codes, groups_count):
+        """Returns list of scores dicts (one per group) or None if targets are not supported.
+
+        group_codes has group index for each row, rows with negative code are skipped.
+        """
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        group_codes = np.asarray(group_codes)
+
+        selected = group_codes >= 0
+        if not selected.all():
+            y_true, y_pred, group_codes = y_true[selected], y_pred[selected], group_codes[selected]
+
+        if self.options.get('task_type') == 'classification':
+            res = self._calculate_classification(y_true, y_pred, group_codes, groups_count)
+        else:
+            res = self._calculate_regression(y_true, y_pred, group_codes, groups_count)
+
+        return self._add_unknown_scores(res)
+
+    def _add_unknown_scores(self, res):
+        if res is not None:
+            for scores in res:
+                for name in self.score_names:
+                    if name in self.UNKNOWN_SCORES:
+                        scores[name] = 0
+
+        return res
+
+    @staticmethod
+    def encode_labels(y_true, y_pred):
+        # Same labels as sklearn unique_labels accepts: all strings or all integral numbers
+        y = np.concatenate([y_true, y_pred])
+
+        if y.dtype.kind == 'O':
+            if not all(isinstance(value, str) for value in y):
+                return None, None
+        elif y.dtype.kind == 'f':
+            if not np.all(np.isfinite(y)) or not np.all(np.mod(y, 1) == 0):
+                return None, None
+        elif y.dtype.kind not in 'biuU':
+            return None, None
+
+        labels, codes = np.unique(y, return_inverse=True)
+        return labels, codes
+
+    def _calculate_classification(self, y_true, y_pred, group_codes, groups_count):
+        labels, codes = GroupScores.encode_labels(y_true, y_pred)
+        if labels is None:
+            return None
+
+        n_labels = max(len(labels), 1)
+        true_codes = codes[:len(y_true)]
+        pred_codes = codes[len(y_true):]
+
+        # Limit memory used by confusion matrices by processing groups in chunks
+        chunk_size = max(1, self.MAX_CONFUSION_CELLS // (n_labels * n_labels))
+        if chunk_size >= groups_count:
+            return self._classification_scores(labels, true_codes, pred_codes, group_codes, groups_count)
+
+        order = np.argsort(group_codes, kind='stable')
+        bounds = np.searchsorted(group_codes[order], np.arange(0, groups_count + chunk_size, chunk_size))
+
+        res = []
+        for idx in range(len(bounds) - 1):
+            rows = order[bounds[idx]:bounds[idx + 1]]
+            start = idx * chunk_size
+            res.extend(self._classification_scores(labels, true_codes[rows], pred_codes[rows],
+                group_codes[rows] - start, min(chunk_size, groups_count - start)))
+
+        return res
+
+    @staticmethod
+    def build_confusion(true_codes, pred_codes, group_codes, groups_count, n_labels):
+        """Confusion matrix counts of each group: array (groups_count, n_labels, n_labels)."""
+        n_labels = max(n_labels, 1)
+
+        return np.bincount(
+            (group_codes * n_labels + true_codes) * n_labels + pred_codes,
+            minlength=groups_count * n_labels * n_labels
+        ).reshape(groups_count, n_labels, n_labels)
+
+    def calculate_from_confusion(self, labels, confusion):
+        """Scores of groups from confusion matrices built with sorted labels."""
+        return self._add_unknown_scores(self._confusion_matrix_scores(np.asarray(labels), np.asarray(confusion)))
+
+    def calculate_from_sums(self, sums):
+        """Regression scores of groups from dict of error sums arrays, see build_regression_sums."""
+        return self._add_unknown_scores(self._regression_scores(sums))
+
+    def _classification_scores(self, labels, true_codes, pred_codes, group_codes, groups_count):
+        confusion = GroupScores.build_confusion(true_codes, pred_codes, group_codes, groups_count, len(labels))
+        return self._confusion_matrix_scores(labels, confusion)
+
+    def _confusion_matrix_scores(self, labels, confusion):
+        groups_count = len(confusion)
+        tp = np.diagonal(confusion, axis1=1, axis2=2)
+        pred_sum = confusion.sum(axis=1)
+        true_sum = confusion.sum(axis=2)
+        present = (pred_sum + true_sum) > 0
+        present_count = present.sum(axis=1)
+        count = true_sum.sum(axis=1)
+
+        scores = {}
+        for name in self.score_names:
+            if name == 'accuracy':
+                with np.errstate(all='ignore'):
+                    scores[name] = list(tp.sum(axis=1) / count)
+            elif name in self.PRF_SCORES:
+                scores[name] = self._binary_prf_score(name, labels, tp, pred_sum, true_sum, present, present_count)
+            elif name in self.CLASSIFICATION_SCORES:
+                metric, average = name.rsplit('_', 1)
+                scores[name] = self._average_prf_score(metric, average, tp, pred_sum, true_sum, present, present_count)
+
+        if self.options.get('binaryClassification'):
+            confusion_scores = self._confusion_scores(confusion, present, present_count, count)
+
+        res = []
+        for idx in range(groups_count):
+            group_scores = {}
+
+            if self.options.get('binaryClassification'):
+                for name_idx, name in enumerate(self.CONFUSION_SCORES):
+                    group_scores[name] = confusion_scores[idx][name_idx]
+
+            for name in self.score_names:
+                if name in scores:
+                    group_scores[name] = GroupScores._nan_to_zero(scores[name][idx])
+
+            res.append(group_scores)
+
+        return res
+
+    @staticmethod
+    def _confusion_scores(confusion, present, present_count, count):
+        # confusion_matrix(y_true, y_pred).ravel() uses only labels present in the group
+        res = []
+
+        for idx in range(len(confusion)):
+            if present_count[idx] == len(present[idx]):
+                values = confusion[idx].ravel()
+            elif present_count[idx] == 1:
+                values = [count[idx]]
+            else:
+                values = confusion[idx][np.ix_(present[idx], present[idx])].ravel()
+
+            values = list(values[:4])
+            res.append(values + [0] * (4 - len(values)))
+
+        return res
+
+    def _binary_prf_score(self, metric, labels, tp, pred_sum, true_sum, present, present_count):
+        # average='binary', labels=[pos_label]
+        pos_label = 1
+        if self.options.get('minority_target_class_pos') is not None:
+            # calculate_scores passes pos_label only if scorer function accepts it
+            from sklearn.metrics import get_scorer
+
+            if 'pos_label' in inspect.getfullargspec(get_scorer(metric)._score_func).args:
+                pos_label = self.options.get('minority_target_class_pos')
+
+        labels_list = labels.tolist()
+        if pos_label in labels_list:
+            pos_idx = labels_list.index(pos_label)
+            pos_present = present[:, pos_idx]
+            values = self._prf(metric, tp[:, pos_idx], pred_sum[:, pos_idx], true_sum[:, pos_idx])
+        else:
+            pos_present = np.zeros(len(tp), dtype=bool)
+            values = np.zeros(len(tp))
+
+        res = list(values)
+        for idx in range(len(tp)):
+            # sklearn raises for multiclass targets or if pos_label is not valid
+            if present_count[idx] > 2 or (present_count[idx] == 2 and not pos_present[idx]):
+                res[idx] = 0
+
+        return res
+
+    def _average_prf_score(self, metric, average, tp, pred_sum, true_sum, present, present_count):
+        if average == 'micro':
+            return list(self._prf(metric, tp.sum(axis=1), pred_sum.sum(axis=1), true_sum.sum(axis=1)))
+
+        values = self._prf(metric, tp, pred_sum, true_sum)
+
+        if average == 'none':
+            return [list(values[idx][present[idx]]) for idx in range(len(values))]
+
+        with np.errstate(all='ignore'):
+            if average == 'macro':
+                return list(np.where(present, values, 0.0).sum(axis=1) / present_count)
+            else:
+                weights = true_sum.sum(axis=1)
+                res = (values * true_sum).sum(axis=1) / weights.astype(np.float64)
+                # zero_division=0
+                return list(np.where(weights == 0, 0.0, res))
+
+    @staticmethod
+    def _prf(metric, tp, pred_sum, true_sum):
+        precision = GroupScores._divide(tp, pred_sum)
+        if metric == 'precision':
+            return precision
+
+        recall = GroupScores._divide(tp, true_sum)
+        if metric == 'recall':
+            return recall
+
+        denom = np.asarray(1 * precision + recall)
+        denom[denom == 0.0] = 1
+        return (1 + 1) * precision * recall / denom
+
+    @staticmethod
+    def _divide(numerator, denominator):
+        mask = denominator == 0
+        denominator = np.where(mask, 1, denominator)
+        return np.where(mask, 0.0, numerator / denominator)
+
+    def _calculate_regression(self, y_true, y_pred, group_codes, groups_count):
+        sums = GroupScores.build_regression_sums(y_true, y_pred, group_codes, groups_count)
+        if sums is None:
+            return None
+
+        return self._regression_scores(sums)
+
+    @staticmethod
+    def build_regression_sums(y_true, y_pred, group_codes, groups_count):
+        """Mergeable error sums of each group or None if targets are not finite numbers.
+
+        m2 is sum of squared deviations of y_true from its group mean (sum_y / n).
+        """
+        if y_true.dtype.kind not in 'biuf' or y_pred.dtype.kind not in 'biuf':
+            return None
+
+        y_true = y_true.astype(np.float64)
+        y_pred = y_pred.astype(np.float64)
+        if not np.all(np.isfinite(y_true)) or not np.all(np.isfinite(y_pred)):
+            return None
+
+        errors = y_true - y_pred
+        abs_errors = np.abs(errors)
+        over = errors < 0
+
+        sums = {
+            'n': np.bincount(group_codes, minlength=groups_count),
+            'sum_y': np.bincount(group_codes, weights=y_true, minlength=groups_count),
+            'sum_pred': np.bincount(group_codes, weights=y_pred, minlength=groups_count),
+            'sum_abs_error': np.bincount(group_codes, weights=abs_errors, minlength=groups_count),
+            'sum_sq_error': np.bincount(group_codes, weights=errors**2, minlength=groups_count),
+            'over_n': np.bincount(group_codes[over], minlength=groups_count),
+            'over_abs_error': np.bincount(group_codes[over], weights=abs_errors[over], minlength=groups_count),
+            'under_n': np.bincount(group_codes[~over], minlength=groups_count),
+            'under_abs_error': np.bincount(group_codes[~over], weights=abs_errors[~over], minlength=groups_count),
+        }
+
+        with np.errstate(all='ignore'):
+            mean_true = sums['sum_y'] / sums['n']
+        sums['m2'] = np.bincount(group_codes, weights=(y_true - mean_true[group_codes])**2, minlength=groups_count)
+
+        return sums
+
+    def _regression_scores(self, sums):
+        count = np.asarray(sums['n'])
+        over_count = np.asarray(sums['over_n'])
+        under_count = np.asarray(sums['under_n'])
+        sum_sq = np.asarray(sums['sum_sq_error'], dtype=np.float64)
+        ss_tot = np.asarray(sums['m2'], dtype=np.float64)
+
+        with np.errstate(all='ignore'):
+            mae = np.asarray(sums['sum_abs_error']) / count
+            mse = sum_sq / count
+            mae_over = np.asarray(sums['over_abs_error']) / over_count
+            mae_under = np.asarray(sums['under_abs_error']) / under_count
+            r2 = np.where(ss_tot == 0, np.where(sum_sq == 0, 1.0, 0.0), 1 - sum_sq / ss_tot)
+
+        scores = {
+            'neg_mean_absolute_error': -mae,
+            'neg_mean_squared_error': -mse,
+            'neg_root_mean_squared_error': -np.sqrt(mse),
+            'neg_rmse': -np.sqrt(mse),
+            'r2': np.where(count < 2, np.nan, r2),
+        }
+
+        res = []
+        for idx in range(len(count)):
+            group_scores = {
+                'mae_over': mae_over[idx] if over_count[idx] else 0.0,
+                'mae_under': mae_under[idx] if under_count[idx] else 0.0,
+            }
+
+            for name in self.score_names:
+                if name == 'r2_score':
+                    # calculate_scores stores r2_score as r2
+                    name = 'r2'
+
+                if name in scores:
+                    # sklearn raises on empty data
+                    group_scores[name] = GroupScores._nan_to_zero(scores[name][idx]) if count[idx] else 0
+
+            res.append(group_scores)
+
+        return res
+
+    @staticmethod
+    def _nan_to_zero(value):
+        if not isinstance(value, list) and np.isnan(value):
+            return 0
+
+        return value
@@ -6,6 +6,7 @@ import json
 
 from a2ml.api.utils import get_uid, get_uid4, fsclient, remove_dups_from_list, sort_arrays
 from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.model_metadata_cache import model_metadata_cache
 from a2ml.api.roi.calculator import Calculator as RoiCalculator
 
 class ModelHelper(object):
@@ -271,9 +272,12 @@ class ModelHelper(object):
         return ModelHelper.preprocess_target_ds(model_path, ds)
 
     @staticmethod
-    def preprocess_target_ds(model_path, ds):
-        options = fsclient.read_json_file(os.path.join(model_path, "options.json"))
-        target_categoricals = fsclient.read_json_file(os.path.join(model_path, "target_categoricals.json"))
+    def preprocess_target_ds(model_path, ds, options=None, target_categoricals=None):
+        if options is None or target_categoricals is None:
+            metadata = model_metadata_cache.get(model_path)
+            options = metadata['options'] if options is None else options
+            target_categoricals = metadata['target_categoricals'] if target_categoricals is None else target_categoricals
+
         y_true =  None
 
         if not options.get('targetFeature') or not options.get('targetFeature') in ds.columns:
@@ -1,23 +1,35 @@
 import os
+import numpy as np
 import pandas as pd
 import datetime
 import math
 import copy
+import functools
 import logging
 
-from a2ml.api.utils import get_uid, convert_to_date, merge_dicts, fsclient
+from a2ml.api.utils import get_uid, convert_to_date, fsclient
 from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.model_metadata_cache import model_metadata_cache
 from a2ml.api.a2ml import A2ML, Context
 from a2ml.api.roi.calculator import Calculator as RoiCalculator
 from a2ml.api.roi.validator import Validator as RoiValidator
 from a2ml.api.roi.validator import ValidationResult as RoiValidationResult
 from a2ml.api.roi.interpreter import Interpreter as RoiInterpreter
 
+from .actuals_stats import ActualsStats
+from .daily_scores_cache import DailyScoresCache
+from .distribution_stats import DistributionStats
+from .drill_down_executor import DrillDownExecutor
+from .group_scores import GroupScores
 from .model_helper import ModelHelper
+from .prediction_files_index import PredictionFilesIndex
 from .probabilistic_counter import ProbabilisticCounter
+from .review_data_writer import ReviewDataWriter, get_peak_memory_mb
 
 
 class ModelReview(object):
+    DRILL_DOWN_CHUNKS_PER_WORKER = 4
+
     def __init__(self, params):
         self.model_id = params.get('hub_info', {}).get('pipeline_id')
         self.model_path = params.get('model_path')
@@ -26,6 +38,9 @@ class ModelReview(object):
         if not self.model_path:
             self.model_path = ModelHelper.get_model_path(self.model_id, params['hub_info'].get('project_path'))
 
+        self.files_index = PredictionFilesIndex(self.model_path, use_manifest=params.get('use_files_manifest', False))
+        self.scores_cache_stats = None
+        self.build_review_stats = None
         self._load_options()
 
 
@@ -44,7 +59,11 @@ class ModelReview(object):
         self.options_path = os.path.join(self.model_path, "options.json")
         self.options_file_exists = fsclient.is_file_exists(self.options_path)
 
-        self.options = fsclient.read_json_file(self.options_path)
+        # Always validated, model can be redeployed to the same path
+        metadata = model_metadata_cache.get(self.model_path, ttl=0)
+        # Copy of cached options, they are modified below
+        self.options = copy.deepcopy(metadata['options'])
+        self.target_categoricals = metadata['target_categoricals']
 
         if self.params.get('hub_info'):
             self.options['hub_info'] = self.params['hub_info']
@@ -66,8 +85,8 @@ class ModelReview(object):
             ds_true.df = df_data[['a2ml_actual']].rename(columns={'a2ml_actual': self.target_feature})
             ds_predict.df = df_data[[self.target_feature]] # copy to prevent source data modification
 
-        y_pred, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_predict)
-        y_true, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_true)
+        y_pred, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_predict, self.options, self.target_categoricals)
+        y_true, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_true, self.options, self.target_categoricals)
 
         res = ModelHelper.calculate_scores(self.options, y_test=y_true, y_pred=y_pred, raise_main_score=False)
 
@@ -128,7 +147,7 @@ class ModelReview(object):
             vars_mapping=vars_mapping,
         )
 
-        res = calc.calculate(df_data)
+        res = calc.calculate(df_data, with_filtered_rows=False)
         return res['roi']
 
     def add_external_model(self, target_column, scoring, task_type, binary_classification):
@@ -213,19 +232,31 @@ class ModelReview(object):
         if len(ds_actuals.columns) == 2:
             suffix = "no_features_data"
 
+        stats_features, stats_categoricals = self._get_distribution_features()
+
         if actual_date_column:
             ds_actuals.df[actual_date_column] = ds_actuals.df[actual_date_column].fillna(datetime.date.today()).apply(pd.to_datetime).dt.date
 
             uniq_dates = ds_actuals.df[actual_date_column].unique()
             uniq_dates.sort()
 
+            file_names = []
             for actual_date in uniq_dates:
                 file_name = str(actual_date) + '_' + actuals_id + "_" + suffix + ".feather.zstd"
                 df = DataFrame.create_dataframe(records=ds_actuals.df[ds_actuals.df[actual_date_column] == actual_date])
-                df.saveToFeatherFile(os.path.join(self.model_path, "predictions", file_name))
+                file_path = os.path.join(self.model_path, "predictions", file_name)
+                df.saveToFeatherFile(file_path)
+                ActualsStats.save(file_path, self.model_path, self.options, df.df, stats_features, stats_categoricals)
+                file_names.append(file_name)
         else:
             file_name = str(actual_date or datetime.date.today()) + '_' + actuals_id + "_" + suffix + ".feather.zstd"
-            ds_actuals.saveToFeatherFile(os.path.join(self.model_path, "predictions", file_name))
+            file_path = os.path.join(self.model_path, "predictions", file_name)
+            ds_actuals.saveToFeatherFile(file_path)
+            ActualsStats.save(file_path, self.model_path, self.options, ds_actuals.df, stats_features, stats_categoricals)
+            file_names = [file_name]
+
+        self.files_index.add_files(file_names)
+        DailyScoresCache.invalidate(self.model_path, [name[0:10] for name in file_names])
 
         if return_count:
             return {'score': result, 'count': actuals_count, 'baseline_score': baseline_score,
@@ -276,6 +307,10 @@ class ModelReview(object):
         ds_actuals.df = df_actuals
 
     def _do_score_actual_experiment(self, df_actuals, experiment_params):
+        df_exp_actuals = self._filter_experiment_actuals(df_actuals, experiment_params)
+        return self._do_score_actual(df_exp_actuals), len(df_exp_actuals), df_exp_actuals
+
+    def _filter_experiment_actuals(self, df_actuals, experiment_params):
         if experiment_params.get('filter_query'):
             df_exp_actuals = df_actuals.query(experiment_params.get('filter_query'))
         else:    
@@ -299,7 +334,7 @@ class ModelReview(object):
             else:
                 df_exp_actuals = df_actuals
                         
-        return self._do_score_actual(df_exp_actuals), len(df_exp_actuals), df_exp_actuals
+        return df_exp_actuals
 
     # "drill_down_report": [
     #     {
@@ -344,10 +379,6 @@ class ModelReview(object):
         return sort_name, sort_name_1, reverse_order
                 
     def _get_drill_down_report(self, df_actuals_arg, experiment_params):
-        import multiprocess # pylint: disable=C0415
-        from multiprocess import Pool # pylint: disable=C0415
-        import math # pylint: disable=C0415
-
         report = []
 
         if not experiment_params.get('drill_down_report'):
@@ -376,8 +407,6 @@ class ModelReview(object):
                     on=item.get('bucket_key', bucket_tag),
                     suffixes=(None, '_y')
                 )
-            tag_values = df_actuals[bucket_tag].dropna().unique()
-
             sort_name, sort_name_1, reverse_order = ModelReview._parse_order_items(item.get('order_by'))
 
             columns = [bucket_tag]
@@ -442,69 +471,9 @@ class ModelReview(object):
 
             old_scores_names = self.options.get('scoreNames', [])                
             self.options['scoreNames'] = score_names
-            
-            def _calc_tags_scores(values):
-                records = []
-                for value in values:
-                    df_tag = df_actuals[df_actuals[bucket_tag]==value]
-                    ca_scores = self._do_score_actual(df_tag)
-                    ca_val_counts = []
-                    if target_classes:
-                        ca_val_counts = self._get_value_counts(df_tag['a2ml_actual'], target_classes)
-                    ca_scores = self._filter_scores(ca_scores, score_names, len(target_classes), ca_val_counts)
-                    n_ca_actuals = len(df_tag)
-
-                    ea_scores, n_ea_actuals, df_exp_tag = self._do_score_actual_experiment(df_tag, experiment_params)
-                    ea_val_counts = []
-                    if target_classes:
-                        ea_val_counts = self._get_value_counts(df_exp_tag[self.target_feature], target_classes)
-                        ea_val_counts.extend(self._get_value_counts(df_exp_tag['a2ml_actual'], target_classes))
-                    ea_scores = self._filter_scores(ea_scores, score_names, len(target_classes), ea_val_counts)
-
-                    record = [value]
-                    if item.get('bucket_info'):
-                        # vals_info = []                    
-                        # df_info = df_bucket_infos.get(item['name'])
-                        # if df_info is not None:
-                        #     vals_info = df_info[df_info[bucket_tag]==value][item['bucket_info'].values()]
-                        # else:
-                        #     vals_info = df_tag[item['bucket_info'].values()]
-
-                        vals_info = df_tag[item['bucket_info'].values()]
-                        if len(vals_info):
-                            vals_info = vals_info.values[0]
-                        else:
-                            for bi in item['bucket_info'].values():
-                                vals_info.append(None)
-
-                        record.extend(vals_info)
-
-                    record.append(n_ea_actuals)
-                    record.extend(ea_scores)
-                    record.append(n_ca_actuals)
-                    record.extend(ca_scores)
-
-                    records.append(record)
-                    #report_item['records'].append(record)
-
-                return records
-                    
-            workers_count = 4#multiprocess.cpu_count()-1
-            chunk_size = math.ceil(len(tag_values)/workers_count)
-            n_chunks = math.ceil(len(tag_values)/chunk_size)
-
-            def chunker(seq, size):
-                return (seq[pos:pos + size] for pos in range(0, len(seq), size))
-
-            logging.info(f'''apply_by_chunks_parallel: data size: {len(tag_values)}, 
-                workers_count: {workers_count}, chunk_size: {chunk_size}, n_chunks: {n_chunks}''')
-            with Pool(workers_count) as p:
-                results = list(
-                    p.imap(_calc_tags_scores, chunker(tag_values, chunk_size))
-                )
-                report_item['records'] = [item for sublist in results for item in sublist]
 
-            #_calc_tags_scores(tag_values)    
+            report_item['records'] = self._get_drill_down_records(
+                df_actuals, item, experiment_params, score_names, target_classes)
 
             self.options['scoreNames'] = old_scores_names
                 
@@ -517,6 +486,154 @@ class ModelReview(object):
 
         return report
 
+    def _get_drill_down_records(self, df_actuals, item, experiment_params, score_names, target_classes):
+        bucket_tag = item['bucket_tag']
+
+        # Partition actuals by bucket values once, index is used as row position
+        df_actuals = df_actuals.reset_index(drop=True)
+        group_codes, tag_values = pd.factorize(df_actuals[bucket_tag])
+        exp_mask = np.zeros(len(df_actuals), dtype=bool)
+        exp_mask[self._filter_experiment_actuals(df_actuals, experiment_params).index.values] = True
+
+        groups_scores = self._get_groups_scores(df_actuals, group_codes, len(tag_values), exp_mask, target_classes)
+        if groups_scores is None:
+            logging.info("Drill down scores for %s are calculated by buckets" % bucket_tag)
+            groups_scores = self._get_groups_scores_by_buckets(
+                df_actuals, group_codes, len(tag_values), exp_mask, target_classes)
+
+        if item.get('bucket_info'):
+            _, first_rows = np.unique(group_codes, return_index=True)
+            first_rows = first_rows[-len(tag_values):] if len(tag_values) else first_rows[0:0]
+            bucket_infos = df_actuals[list(item['bucket_info'].values())].values[first_rows]
+
+        records = []
+        for idx, value in enumerate(tag_values):
+            ca_scores, n_ca_actuals, ca_val_counts, ea_scores, n_ea_actuals, ea_val_counts = groups_scores[idx]
+
+            record = [value]
+            if item.get('bucket_info'):
+                record.extend(bucket_infos[idx])
+
+            record.append(n_ea_actuals)
+            record.extend(self._filter_scores(ea_scores, score_names, len(target_classes), ea_val_counts))
+            record.append(n_ca_actuals)
+            record.extend(self._filter_scores(ca_scores, score_names, len(target_classes), ca_val_counts))
+
+            records.append(record)
+
+        return records
+
+    def _get_groups_scores(self, df_actuals, group_codes, groups_count, exp_mask, target_classes):
+        # Scores for all buckets at once from per bucket confusion counts / error sums
+        if not GroupScores.is_supported(self.options):
+            return None
+
+        ds_true = DataFrame({})
+        ds_true.df = df_actuals[['a2ml_actual']].rename(columns={'a2ml_actual': self.target_feature})
+        ds_predict = DataFrame({})
+        ds_predict.df = df_actuals[[self.target_feature]]
+
+        y_pred, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_predict, self.options, self.target_categoricals)
+        y_true, _ = ModelHelper.preprocess_target_ds(self.model_path, ds_true, self.options, self.target_categoricals)
+        if y_true is None or y_pred is None:
+            return None
+
+        group_scores = GroupScores(self.options)
+        ca_scores = group_scores.calculate(y_true, y_pred, group_codes, groups_count)
+        if ca_scores is None:
+            return None
+
+        ea_scores = group_scores.calculate(y_true[exp_mask], y_pred[exp_mask], group_codes[exp_mask], groups_count)
+        if ea_scores is None:
+            return None
+
+        if self.params.get('roi') and 'roi' in self.options.get('scoreNames', []):
+            groups_rows = df_actuals.groupby(group_codes, sort=False).indices
+            for idx in range(groups_count):
+                rows = groups_rows[idx]
+                ca_scores[idx]['roi'] = self._calculate_roi(df_actuals.iloc[rows])
+                ea_scores[idx]['roi'] = self._calculate_roi(df_actuals.iloc[rows[exp_mask[rows]]])
+
+        n_ca_actuals = np.bincount(group_codes[group_codes >= 0], minlength=groups_count)
+        exp_codes = group_codes[exp_mask]
+        n_ea_actuals = np.bincount(exp_codes[exp_codes >= 0], minlength=groups_count)
+
+        if target_classes:
+            ca_val_counts = self._get_groups_value_counts(
+                df_actuals['a2ml_actual'], group_codes, groups_count, target_classes)
+            ea_val_counts = np.concatenate([
+                self._get_groups_value_counts(df_actuals[self.target_feature][exp_mask], exp_codes,
+                    groups_count, target_classes),
+                self._get_groups_value_counts(df_actuals['a2ml_actual'][exp_mask], exp_codes,
+                    groups_count, target_classes),
+            ], axis=1)
+
+        res = []
+        for idx in range(groups_count):
+            res.append((
+                ca_scores[idx], int(n_ca_actuals[idx]), list(ca_val_counts[idx]) if target_classes else [],
+                ea_scores[idx], int(n_ea_actuals[idx]), list(ea_val_counts[idx]) if target_classes else [],
+            ))
+
+        return res
+
+    @staticmethod
+    def _get_groups_value_counts(data, group_codes, groups_count, target_classes):
+        # Same as _get_value_counts for each group: counts of target classes, 0 for missed classes
+        classes_index = {}
+        for idx, target_class in enumerate(target_classes):
+            if not pd.isna(target_class):
+                classes_index[target_class] = idx
+
+        class_codes = data.map(classes_index).values
+        selected = (group_codes >= 0) & ~pd.isna(class_codes)
+        n_classes = len(target_classes)
+
+        return np.bincount(
+            group_codes[selected] * n_classes + class_codes[selected].astype(np.int64),
+            minlength=groups_count * n_classes
+        ).reshape(groups_count, n_classes)
+
+    def _get_groups_scores_by_buckets(self, df_actuals, group_codes, groups_count, exp_mask, target_classes):
+        if groups_count == 0:
+            return []
+
+        # Chunks carry only bucket rows, the frame is shared with workers by the executor
+        groups_rows = df_actuals.groupby(group_codes, sort=False).indices
+        buckets = [(code, groups_rows[code], groups_rows[code][exp_mask[groups_rows[code]]])
+            for code in range(groups_count)]
+
+        executor = DrillDownExecutor.from_params(self.params)
+        chunk_size = math.ceil(groups_count/(executor.workers_count*self.DRILL_DOWN_CHUNKS_PER_WORKER))
+
+        results = executor.map(
+            functools.partial(self._get_buckets_scores, target_classes=target_classes),
+            df_actuals,
+            [buckets[pos:pos + chunk_size] for pos in range(0, groups_count, chunk_size)]
+        )
+
+        return [item for sublist in results for item in sublist]
+
+    def _get_buckets_scores(self, df_actuals, buckets, target_classes):
+        records = []
+        for _, rows, exp_rows in buckets:
+            df_tag = df_actuals.iloc[rows]
+            ca_scores = self._do_score_actual(df_tag)
+            ca_val_counts = []
+            if target_classes:
+                ca_val_counts = self._get_value_counts(df_tag['a2ml_actual'], target_classes)
+
+            df_exp_tag = df_actuals.iloc[exp_rows]
+            ea_scores = self._do_score_actual(df_exp_tag)
+            ea_val_counts = []
+            if target_classes:
+                ea_val_counts = self._get_value_counts(df_exp_tag[self.target_feature], target_classes)
+                ea_val_counts.extend(self._get_value_counts(df_exp_tag['a2ml_actual'], target_classes))
+
+            records.append((ca_scores, len(df_tag), ca_val_counts, ea_scores, len(df_exp_tag), ea_val_counts))
+
+        return records
+
     def _get_value_counts(self, data, target_classes):
         res = data.value_counts(sort=False).to_dict()
 
@@ -602,14 +719,24 @@ class ModelReview(object):
             if with_predictions:
                 path_suffixes = [".feather.zstd"]
 
+            # Always list folder to delete files not tracked by manifest
+            files_index = PredictionFilesIndex(self.model_path)
+            removed_files = []
             for path_suffix in path_suffixes:
-                for (curr_date, files) in ModelReview._prediction_files_by_day(self.model_path, begin_date, end_date, path_suffix):
+                for (curr_date, files) in ModelReview._prediction_files_by_day(self.model_path, begin_date, end_date,
+                        path_suffix, files_index):
                     for file in files:
-                        path = file if type(file) == str else file['path']
-                        fsclient.remove_file(path)
+                        removed_files.append(file if type(file) == str else file['path'])
+
+            fsclient.remove_files(removed_files + ActualsStats.get_sidecar_paths(removed_files))
+            self.files_index.remove_files(removed_files)
+            DailyScoresCache.invalidate(self.model_path, [os.path.basename(path)[0:10] for path in removed_files])
 
     def build_review_data(self, data_path=None, output=None, date_col=None, retrain_policy=None,
-        date_to=None):
+        date_to=None, streaming=None):
+        if streaming is None:
+            streaming = self.params.get('review_data_streaming', False)
+
         if not data_path:
             data_path = self.options['data_path']
 
@@ -656,19 +783,10 @@ class ModelReview(object):
 
             all_files = new_files
 
-        logging.info("build_review_data adding files: %s"%all_files)
-        for (file, ds_actuals) in DataFrame.load_from_files(all_files):
-            if not ds_actuals.df.empty:
-                ds_actuals.drop(['a2ml_predicted'])
-                ds_train.df = pd.concat([ds_train.df, ds_actuals.df], ignore_index=True)
-                #ds_train.drop_duplicates()
-
-        #ds_train.dropna()
+        days_limit = None
         if retrain_policy:
             if retrain_policy.get('type') == 'days_limit' and date_col and date_col in train_features:
-                start_date = convert_to_date(ds_train.df[date_col].max())
-                end_date = start_date - datetime.timedelta(days=int(retrain_policy.get('value')))
-                ds_train.df.query("%s>='%s'"%(date_col, end_date), inplace=True)
+                days_limit = int(retrain_policy.get('value'))
 
         if not output:
             directory = os.path.dirname(data_path)
@@ -679,54 +797,132 @@ class ModelReview(object):
 
             output = os.path.join(directory, file_name + "_review_%s%s.parquet"%(date_suffix, get_uid()))
 
+        logging.info("build_review_data adding files: %s"%all_files)
+        if streaming and output.endswith('.parquet'):
+            writer = ReviewDataWriter(date_col, days_limit)
+            try:
+                writer.write(ds_train.df, all_files, output)
+                self.build_review_stats = writer.stats
+                return output
+            except Exception as e:
+                logging.error("build_review_data streaming failed: %s. Build in memory."%e)
+
+        ds_actuals = DataFrame.load_dataset(all_files)
+        if not ds_actuals.df.empty:
+            if 'a2ml_predicted' in ds_actuals.columns:
+                ds_actuals.drop(['a2ml_predicted'])
+            ds_train.df = pd.concat([ds_train.df, ds_actuals.df], ignore_index=True)
+            #ds_train.drop_duplicates()
+
+        #ds_train.dropna()
+        if days_limit is not None:
+            start_date = convert_to_date(ds_train.df[date_col].max())
+            end_date = start_date - datetime.timedelta(days=days_limit)
+            ds_train.df.query("%s>='%s'"%(date_col, end_date), inplace=True)
+
         ds_train.saveToFile(output)
+        self.build_review_stats = {'mode': 'memory', 'files': len(all_files), 'rows': len(ds_train.df),
+            'peak_memory_mb': get_peak_memory_mb()}
+        logging.info("build_review_data stats: %s"%self.build_review_stats)
         return output
 
     # date_from..date_to inclusive
     def score_model_performance_daily(self, date_from, date_to, extra_features=[], 
         provider='auger', do_predict=False, ctx=None):
-        #To support baseline_target
-        features = None #[self.target_feature, 'a2ml_predicted']
+        features = None
+        if not self.params.get('roi') and not do_predict:
+            # ROI expressions and predict use all features
+            features = [self.target_feature, 'a2ml_predicted', 'baseline_target']
+
         res = {}
 
+        scores_cache = None
+        if self.params.get('use_scores_cache') and not do_predict:
+            scores_cache = DailyScoresCache(self.model_path,
+                DailyScoresCache.build_options_hash(self.options, self.params, extra_features))
+
         for (curr_date, files) in ModelReview._prediction_files_by_day(
-                self.model_path, date_from, date_to, "*_data.feather.zstd"):
-            df_actuals = DataFrame({})
-            for (file, df) in DataFrame.load_from_files(files, features):
-                df_actuals.df = pd.concat([df_actuals.df, df.df])
+                self.model_path, date_from, date_to, "*_data.feather.zstd", self.files_index):
+            if scores_cache:
+                cache_key = scores_cache.build_key(self.files_index.get_files_meta(files))
+                cache_entry = scores_cache.get(str(curr_date), cache_key)
+                if cache_entry is not None:
+                    if cache_entry['result'] is not None:
+                        res[str(curr_date)] = cache_entry['result']
+                    continue
 
-            if df_actuals.count() > 0:
-                #print(df_actuals.df['a2ml_predicted']) #.query("%s>=0.10"%'a2ml_predicted'))
-                if do_predict:
-                    self._do_predict(ctx, df_actuals, provider, predict_feature='a2ml_predicted',
-                        predicted_at=curr_date)
+            date_res = self._score_model_performance_day(curr_date, files, features, extra_features,
+                provider, do_predict, ctx)
+            if date_res is not None:
+                res[str(curr_date)] = date_res
 
-                df_actuals.df.rename(columns={self.target_feature: 'a2ml_actual'}, inplace=True)
-                df_actuals.df.rename(columns={'a2ml_predicted': self.target_feature}, inplace=True)
+            if scores_cache:
+                scores_cache.put(str(curr_date), cache_key, date_res)
 
-                scores = self._do_score_actual(df_actuals.df, extra_features=extra_features)
+        if scores_cache:
+            scores_cache.save()
+            self.scores_cache_stats = scores_cache.get_stats()
+            logging.info("Daily scores cache stats: %s" % self.scores_cache_stats)
 
-                baseline_score = {}
-                if "baseline_target" in df_actuals.columns:
-                    baseline_score = self._do_score_actual(df_actuals.df, "baseline_target", extra_features)
+        return res
 
-                review_metric = None
-                if self.params.get('roi'):
-                    review_metric = 'roi'
-                    
-                res[str(curr_date)] = {
-                    'scores': scores,
-                    'score_name': self.options.get('score_name'),
-                    'baseline_scores': baseline_score,
-                    'review_metric':  review_metric,
-                }
+    def _score_model_performance_day(self, curr_date, files, features, extra_features, provider, do_predict, ctx):
+        if not files:
+            return None
 
-        return res
+        if not do_predict and not self.params.get('roi'):
+            # Merge sidecars of files, baseline target needs data rows
+            sidecars = ActualsStats.load(files)
+            if sidecars and not any(sidecar['has_baseline'] for sidecar in sidecars):
+                if sum(sidecar['rows'] for sidecar in sidecars) == 0:
+                    return None
+
+                scores = ActualsStats.calculate_scores(self.options, sidecars)
+                if scores is not None:
+                    return {
+                        'scores': scores,
+                        'score_name': self.options.get('score_name'),
+                        'baseline_scores': {},
+                        'review_metric': None,
+                    }
 
-    def distribution_chart_stats(self, date_from, date_to):
+        df_actuals = DataFrame.load_dataset(self.files_index.get_files_with_size(files), features)
+        if df_actuals.count() == 0:
+            return None
+
+        #print(df_actuals.df['a2ml_predicted']) #.query("%s>=0.10"%'a2ml_predicted'))
+        if do_predict:
+            self._do_predict(ctx, df_actuals, provider, predict_feature='a2ml_predicted',
+                predicted_at=curr_date)
+
+        df_actuals.df.rename(columns={self.target_feature: 'a2ml_actual'}, inplace=True)
+        df_actuals.df.rename(columns={'a2ml_predicted': self.target_feature}, inplace=True)
+
+        scores = self._do_score_actual(df_actuals.df, extra_features=extra_features)
+
+        baseline_score = {}
+        if "baseline_target" in df_actuals.columns:
+            baseline_score = self._do_score_actual(df_actuals.df, "baseline_target", extra_features)
+
+        review_metric = None
+        if self.params.get('roi'):
+            review_metric = 'roi'
+
+        return {
+            'scores': scores,
+            'score_name': self.options.get('score_name'),
+            'baseline_scores': baseline_score,
+            'review_metric':  review_metric,
+        }
+
+    def _get_distribution_features(self):
         features = [self.target_feature, 'a2ml_predicted']
         features += self.options.get('originalFeatureColumns', [])
-        categoricalFeatures = self.options.get('categoricalFeatures', [])
+
+        return features, self.options.get('categoricalFeatures', [])
+
+    def distribution_chart_stats(self, date_from, date_to):
+        features, categoricalFeatures = self._get_distribution_features()
         mapper = {}
         mapper[self.target_feature] = 'actual_%s' % self.target_feature
         mapper['a2ml_predicted'] = 'predicted_%s' % self.target_feature
@@ -739,7 +935,7 @@ class ModelReview(object):
             all_files = []
             date_stat = convert_to_date(date_to) - datetime.timedelta(days=1)
             for (curr_date, files) in ModelReview._prediction_files_by_day(self.model_path, None,
-                date_stat, "_*_data.feather.zstd"):
+                date_stat, "_*_data.feather.zstd", self.files_index):
                 all_files += files
 
             base_stat = ModelReview._get_distribution_stats_files(all_files, features, categoricalFeatures, mapper)
@@ -755,6 +951,7 @@ class ModelReview(object):
 
         fsclient.remove_file(path)
         fsclient.write_json_file(path, self.options, atomic=True)
+        model_metadata_cache.remove(self.model_path)
 
     def remove_model(self):
         fsclient.remove_folder(self.model_path)
@@ -771,59 +968,27 @@ class ModelReview(object):
         if not files:
             return None
 
-        stats = {}
-
-        for feature in features:
-            stats[feature] = {
-                'count': 0,
-                'sum': 0,
-                'sq_sum': 0,
-                'dist': None,
-                'imp': feature_importances.get(feature, 0)
-            }
-
-        df_list = []
-        for (file, df) in DataFrame.load_from_files(files):
-            df_list.append(df)
-
-        # First pass: calc sum and count in each column for average
-        for df in df_list:
-            for feature in features:
-                if feature in df.columns:
-                    stats[feature]['count'] += df.df[feature].count()
-
-                    if df.df[feature].dtype.name in ['category', 'string', 'object'] or \
-                        feature in categoricalFeatures:
-                        stats[feature]['dist'] = merge_dicts(
-                            stats[feature]['dist'] or {},
-                            dict(df.df[feature].value_counts()),
-                            lambda v, ov: v + ov
-                        )
-                    else:
-                        stats[feature]['sum'] += df.df[feature].sum()
-
-        # Calc average
-        for feature in features:
-            if stats[feature]['count'] > 0 and stats[feature]['dist'] == None:
-                stats[feature]['average'] = stats[feature]['sum'] / stats[feature]['count']
+        stats = ActualsStats.merge_distribution(ActualsStats.load(files), features, categoricalFeatures)
+        if stats is None:
+            # Single pass over files, only one file is in memory at a time
+            stats = DistributionStats(features, categoricalFeatures)
+            for (file, df) in DataFrame.load_from_files(files):
+                stats.add_df(df.df)
+                del df
 
-        # Second pass: sum of squares of value and average for std dev
-        for df in df_list:
-            for feature in features:
-                if 'average' in stats[feature] and feature in df.columns:
-                    avg = stats[feature]['average']
-                    stats[feature]['sq_sum'] += ((df.df[feature] - avg)**2).sum()
-
-        # Calc std dev
-        return ModelReview._calc_stddev_for_features(stats, features, feature_mapper)
+        return stats.get_result(feature_mapper, feature_importances)
 
     def _distribution_stats(self, date_from, date_to, path_suffix, features,
         categoricalFeatures=[], feature_mapper={}):
         res = {}
         feature_importances = self.get_feature_importances()
 
-        for (curr_date, files) in ModelReview._prediction_files_by_day(self.model_path, date_from, date_to, path_suffix):
+        for (curr_date, files) in ModelReview._prediction_files_by_day(self.model_path, date_from, date_to,
+                path_suffix, self.files_index):
 
+            # Sizes from listing bound memory of prefetched files without requesting them from storage,
+            # unknown ones (files from manifest) are requested by loader
+            files = self.files_index.get_files_with_size(files)
             stats = ModelReview._get_distribution_stats_files(files, features, categoricalFeatures, feature_mapper, feature_importances)
             # Calc std dev
             if stats:
@@ -850,68 +1015,29 @@ class ModelReview(object):
             return {}
 
     @staticmethod
-    def _calc_stddev_for_features(stats, features, feature_mapper):
-        res = {}
-
-        for feature in features:
-            count = stats[feature]['count']
-
-            if count > 0:
-                feature_key = feature_mapper.get(feature, feature)
-                if 'average' in stats[feature]:
-                    res[feature_key] = {
-                        "avg": stats[feature]['average'],
-                        "std_dev": math.sqrt(stats[feature]['sq_sum'] / (count - 1)) if count > 1 else 0
-                    }
-                else:
-                    res[feature_key] = { 'dist': stats[feature]['dist'] }
-
-                res[feature_key]['imp'] = round(stats[feature]['imp'], 6)
-
-        return res
-
-    @staticmethod
-    def _get_first_date_from_files(path):
-        all_files = fsclient.list_folder(path,
-            wild=True, remove_folder_name=True, meta_info=False
-        )
-        first_date = None
-        if all_files:
-            all_files.sort(key=lambda f: f[0:10], reverse=False)
-            idxDate = all_files[0].find("_")
-            if idxDate:
-                first_date = all_files[0][0:idxDate]
-
-        return first_date
-
-    @staticmethod
-    def _prediction_files_by_day(model_path, date_from, date_to, path_suffix):
+    def _prediction_files_by_day(model_path, date_from, date_to, path_suffix, files_index=None):
         if (date_from and not date_to):# or (not date_from and date_to):
             # TODO: list all files by suffix, sort them by prefix date and return range of files
             raise Exception("Arguments error: please provide both start and end dates or date_to only or do not pass any.")
 
+        if files_index is None:
+            files_index = PredictionFilesIndex(model_path)
+
         if date_from or date_to:
             if date_from:
                 date_from = convert_to_date(date_from)
             else:
-                date_from = ModelReview._get_first_date_from_files(
-                    os.path.join(model_path, "predictions/*" + path_suffix))
+                date_from = files_index.first_date(path_suffix)
                 if not date_from:
                     return
                 date_from = convert_to_date(date_from)
 
-            curr_date = date_from
             date_to = convert_to_date(date_to)
 
-            while curr_date <= date_to:
-                path = os.path.join(model_path, "predictions/" + str(curr_date) + "*" + path_suffix)
-                files = fsclient.list_folder(path, wild=True, remove_folder_name=False, meta_info=False)
+            for (curr_date, files) in files_index.files_by_day(date_from, date_to, path_suffix):
                 yield (curr_date, files)
-                curr_date += datetime.timedelta(days=1)
         else:
-            path = os.path.join(model_path, "predictions/" + "*" + path_suffix)
-            files = fsclient.list_folder(path, wild=True, remove_folder_name=False, meta_info=False)
-            yield ("today", files)
+            yield ("today", files_index.all_files(path_suffix))
 
     @staticmethod
     def _remove_duplicates_by(df, column_name, counter):
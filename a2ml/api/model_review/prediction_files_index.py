@@ -0,0 +1,155 @@
+import datetime
+import fnmatch
+import logging
+import os
+import time
+
+from a2ml.api.utils import fsclient
+
+
+class PredictionFilesIndex(object):
+    """Index of model predictions folder built from a single listing.
+
+    File names have format YYYY-MM-DD_<id>_<suffix>, so they are grouped by date once and
+    day buckets are served from memory instead of listing the folder with a glob per day.
+    With use_manifest the list of files is persisted to predictions/files_index.json and
+    updated by add_files/remove_files, so the folder is not listed at all.
+    Sizes and modification times are known only for files loaded from the listing.
+    """
+    MANIFEST_NAME = 'files_index.json'
+    SCORES_CACHE_NAME = 'daily_scores_cache.json'
+
+    def __init__(self, model_path, use_manifest=False):
+        self.predictions_path = os.path.join(model_path, "predictions")
+        self.manifest_path = os.path.join(self.predictions_path, self.MANIFEST_NAME)
+        self.use_manifest = use_manifest
+        self._files_by_date = None
+        self._files_meta = {}
+        self.stats = {'source': None, 'files': 0, 'cold_load_time': None, 'warm_load_time': None}
+
+    def load(self):
+        start = time.time()
+        if self._files_by_date is not None:
+            self.stats['warm_load_time'] = time.time() - start
+            return self
+
+        names = None
+        source = 'listing'
+        if self.use_manifest:
+            names = self._read_manifest()
+            if names is not None:
+                source = 'manifest'
+
+        if names is None:
+            files = [file for file in fsclient.list_folder(self.predictions_path, meta_info=True)
+                if not file['path'].endswith('/') and not file['path'] in (self.MANIFEST_NAME, self.SCORES_CACHE_NAME)]
+            names = [file['path'] for file in files]
+            self._files_meta = dict((file['path'], [file.get('size'), file.get('last_modified')]) for file in files)
+
+            if self.use_manifest:
+                self._write_manifest(names)
+
+        self._build(names)
+
+        self.stats['source'] = source
+        self.stats['files'] = len(names)
+        self.stats['cold_load_time'] = time.time() - start
+        logging.info("Prediction files index for %s: %s files loaded from %s in %.3f sec" % (
+            self.predictions_path, len(names), source, self.stats['cold_load_time']))
+
+        return self
+
+    def files_by_day(self, date_from, date_to, path_suffix):
+        self.load()
+
+        curr_date = date_from
+        while curr_date <= date_to:
+            yield (curr_date, self._get_files(self._files_by_date.get(curr_date, []),
+                str(curr_date) + "*" + path_suffix))
+            curr_date += datetime.timedelta(days=1)
+
+    def all_files(self, path_suffix):
+        self.load()
+
+        return self._get_files(self._all_names(), "*" + path_suffix)
+
+    def first_date(self, path_suffix):
+        self.load()
+
+        names = fnmatch.filter(self._all_names(), "*" + path_suffix)
+        if names:
+            names.sort(key=lambda f: f[0:10])
+            idx_date = names[0].find("_")
+            if idx_date:
+                return names[0][0:idx_date]
+
+        return None
+
+    def get_files_meta(self, paths):
+        """Returns [name, size, last_modified] for each path, size and time are None if unknown."""
+        res = []
+        for path in paths:
+            name = os.path.basename(path)
+            res.append([name] + self._files_meta.get(name, [None, None]))
+
+        return res
+
+    def get_files_with_size(self, paths):
+        """Returns [{'path': ..., 'size': ...}] for loaders, size is None if unknown."""
+        return [{'path': path, 'size': size} for (path, (name, size, mtime)) in zip(paths, self.get_files_meta(paths))]
+
+    def get_files_size(self, paths):
+        """Returns total size of paths, unknown sizes are counted as 0."""
+        return sum(meta[1] or 0 for meta in self.get_files_meta(paths))
+
+    def add_files(self, names):
+        names = [os.path.basename(name) for name in names]
+
+        if self._files_by_date is not None:
+            self._build(self._all_names() + names)
+
+        manifest_names = self._read_manifest()
+        if manifest_names is not None:
+            self._write_manifest(manifest_names + names)
+
+    def remove_files(self, names):
+        names = set(os.path.basename(name) for name in names)
+        for name in names:
+            self._files_meta.pop(name, None)
+
+        if self._files_by_date is not None:
+            self._build([name for name in self._all_names() if not name in names])
+
+        manifest_names = self._read_manifest()
+        if manifest_names is not None:
+            self._write_manifest([name for name in manifest_names if not name in names])
+
+    def _get_files(self, names, pattern):
+        return [os.path.join(self.predictions_path, name) for name in fnmatch.filter(names, pattern)]
+
+    def _all_names(self):
+        res = []
+        for names in self._files_by_date.values():
+            res.extend(names)
+
+        return res
+
+    def _build(self, names):
+        self._files_by_date = {}
+
+        for name in sorted(set(names)):
+            try:
+                file_date = datetime.date.fromisoformat(name[0:10])
+            except ValueError:
+                file_date = None
+
+            self._files_by_date.setdefault(file_date, []).append(name)
+
+    def _read_manifest(self):
+        if not fsclient.is_file_exists(self.manifest_path):
+            return None
+
+        return fsclient.read_json_file(self.manifest_path).get('files', [])
+
+    def _write_manifest(self, names):
+        fsclient.write_json_file(self.manifest_path, {'files': sorted(set(names))}, atomic=True)
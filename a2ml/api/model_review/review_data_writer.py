@@ -0,0 +1,162 @@
+import datetime
+import logging
+import sys
+import time
+
+import pandas as pd
+
+from a2ml.api.utils import convert_to_date, fsclient
+from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.prefetch_loader import PrefetchLoader
+
+
+def get_peak_memory_mb():
+    try:
+        import resource # pylint: disable=C0415
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return round(peak / 1024.0 / 1024.0, 1)
+
+    return round(peak / 1024.0, 1)
+
+
+class ReviewDataWriter(object):
+    """Writes training data followed by actuals files to parquet file as row groups.
+
+    Only training data and one actuals file are in memory at a time, concatenated frame is never
+    built. Parquet schema is unified from all sources the same way pd.concat fills missed columns,
+    so the file is read back as the in-memory build output. days_limit retrain policy is applied
+    to each chunk with the same date predicate.
+    """
+    CHUNK_ROWS = 100000
+
+    def __init__(self, date_col=None, days_limit=None):
+        self.date_col = date_col
+        self.days_limit = days_limit
+        self.stats = None
+
+    def write(self, df_train, files, output):
+        import pyarrow.parquet as pq # pylint: disable=C0415
+
+        start = time.time()
+        paths = [file if type(file) == str else file['path'] for file in files]
+        end_date = self._get_end_date(df_train, files)
+        schema = self._get_schema(df_train, paths)
+
+        fsclient.remove_file(output)
+        fsclient.create_parent_folder(output)
+
+        rows = 0
+        row_groups = 0
+        with fsclient.save_local(output) as local_path:
+            with pq.ParquetWriter(local_path, schema, compression='gzip') as writer:
+                for df in self._iter_chunks(df_train, files):
+                    if end_date is not None:
+                        df = self._filter_by_date(df, end_date)
+
+                    if len(df) > 0:
+                        writer.write_table(self._to_table(df, schema))
+                        rows += len(df)
+                        row_groups += 1
+
+        self.stats = {
+            'mode': 'streaming',
+            'files': len(paths),
+            'rows': rows,
+            'row_groups': row_groups,
+            'time': round(time.time() - start, 3),
+            'peak_memory_mb': get_peak_memory_mb(),
+        }
+        logging.info("build_review_data streaming stats: %s" % self.stats)
+
+    def _get_end_date(self, df_train, files):
+        if self.days_limit is None or not self.date_col:
+            return None
+
+        # Only date column of actuals files is loaded to find the latest date
+        dates = [df_train[self.date_col].max()]
+        df_dates = DataFrame.load_dataset(files, features=[self.date_col]).df
+        if self.date_col in df_dates.columns:
+            dates.append(df_dates[self.date_col].max())
+
+        return convert_to_date(pd.Series(dates).max()) - datetime.timedelta(days=self.days_limit)
+
+    def _filter_by_date(self, df, end_date):
+        if not self.date_col in df.columns:
+            # Missed column is NaN in concatenated data, it does not pass the predicate
+            return df.iloc[0:0]
+
+        return df.query("%s>='%s'"%(self.date_col, end_date))
+
+    def _get_schema(self, df_train, paths):
+        import pyarrow as pa # pylint: disable=C0415
+
+        schemas = [pa.Schema.from_pandas(df_train, preserve_index=False)]
+        for path in paths:
+            schemas.append(self._get_file_schema(path))
+
+        # int64 and double are promoted to double like pd.concat does
+        schema = pa.unify_schemas(schemas, promote_options='permissive')
+        return schema.remove_metadata()
+
+    def _get_file_schema(self, path):
+        import pyarrow as pa # pylint: disable=C0415
+        import pyarrow.dataset as pa_ds # pylint: disable=C0415
+
+        schema = None
+        dataset_format = DataFrame._get_dataset_format([path])
+        if dataset_format:
+            fsclient.wait_for_file(path, True)
+            schema = pa_ds.dataset(path, format=dataset_format).schema
+        elif fsclient.is_s3_path(path):
+            # Parquet and feather objects are not downloaded, footer is read with ranged GETs
+            fsclient.wait_for_file(path, True)
+            schema = fsclient.read_arrow_schema(path)
+
+        index_columns = []
+        if schema is None:
+            schema = pa.Schema.from_pandas(DataFrame.load_dataset([path]).df, preserve_index=False)
+        elif schema.pandas_metadata:
+            index_columns = [column for column in schema.pandas_metadata.get('index_columns', [])
+                if isinstance(column, str)]
+
+        for name in index_columns + ['a2ml_predicted']:
+            if name in schema.names:
+                schema = schema.remove(schema.get_field_index(name))
+
+        return schema
+
+    def _iter_chunks(self, df_train, files):
+        for idx in range(0, len(df_train), self.CHUNK_ROWS):
+            yield df_train.iloc[idx:idx + self.CHUNK_ROWS]
+
+        def load_file(file):
+            df = DataFrame.load_dataset([file]).df
+            if 'a2ml_predicted' in df.columns:
+                df = df.drop(columns=['a2ml_predicted'])
+
+            return df
+
+        # Next files are loaded while current one is written, in-flight bytes are bounded by loader
+        for (file, df, exc) in PrefetchLoader(load_file).iter_results(files):
+            if exc is not None:
+                raise exc
+
+            yield df
+
+    def _to_table(self, df, schema):
+        import pyarrow as pa # pylint: disable=C0415
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        columns = []
+        for field in schema:
+            if field.name in table.column_names:
+                columns.append(table.column(field.name).cast(field.type))
+            else:
+                columns.append(pa.nulls(len(table), field.type))
+
+        return pa.Table.from_arrays(columns, schema=schema)
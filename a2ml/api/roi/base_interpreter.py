@@ -6,6 +6,9 @@ from inspect import getfullargspec
 class BaseInterpreter(object):
     MAX_ARGS_COUNT = 255
 
+    # Node class -> name of evaluate method
+    method_names = {}
+
     def snake_case(self, str):
         res = ''
 
@@ -18,7 +21,14 @@ class BaseInterpreter(object):
         return res
 
     def node_method_name(self, node):
-        return 'evaluate_' + self.snake_case(type(node).__name__)
+        node_class = type(node)
+        name = BaseInterpreter.method_names.get(node_class)
+
+        if name is None:
+            name = 'evaluate_' + self.snake_case(node_class.__name__)
+            BaseInterpreter.method_names[node_class] = name
+
+        return name
 
     def evaluate(self, node, rows=None):
         evaluateor = getattr(self, self.node_method_name(node), self.generic_evaluate)
@@ -5,10 +5,11 @@ from .lexer import Lexer
 from .parser import Parser
 from .validator import Validator
 from .var_names_fetcher import VarNamesFetcher
+from .vectorized_interpreter import NotVectorizable, VectorizedInterpreter
 
 
 class Calculator:
-    def __init__(self, revenue=None, investment=None, filter=None, known_vars=[], vars_mapping={}):
+    def __init__(self, revenue=None, investment=None, filter=None, known_vars=[], vars_mapping={}, vectorized=True):
         self.revenue = revenue
         self.investment = investment
         self.filter = filter
@@ -19,12 +20,21 @@ class Calculator:
         self.investment_interpreter = self.build_interpreter(self.investment)
         self.filter_interpreter = self.build_interpreter(self.filter)
 
-    def build_interpreter(self, expression):
+        # DataFrames are evaluated column-wise unless expression requires aggregation
+        self.vectorized = vectorized
+
+    def build_interpreter(self, expression, interpreter_class=Interpreter):
         if expression:
-            return Interpreter(expression, self.vars_mapping)
+            return interpreter_class(expression, self.vars_mapping)
 
-    def calculate(self, rows):
+    def calculate(self, rows, with_filtered_rows=True):
         if isinstance(rows, pd.DataFrame):
+            if self.vectorized:
+                try:
+                    return self.calculate_vectorized(rows, with_filtered_rows)
+                except NotVectorizable:
+                    pass
+
             rows = list(map(lambda x: x[1].to_dict(), rows.iterrows()))
 
         filtered_rows = rows
@@ -52,6 +62,36 @@ class Calculator:
             "roi": roi,
         }
 
+    def calculate_vectorized(self, df, with_filtered_rows=True):
+        filter_interpreter = self.build_interpreter(self.filter, VectorizedInterpreter)
+        if filter_interpreter:
+            df = filter_interpreter.select_rows(df)
+
+        if len(df) > 0:
+            revenue = sum(self.build_interpreter(self.revenue, VectorizedInterpreter).run(df).tolist())
+            investment = sum(self.build_interpreter(self.investment, VectorizedInterpreter).run(df).tolist())
+        else:
+            revenue = 0
+            investment = 0
+
+        if investment > 0:
+            roi = (revenue - investment) / investment
+        else:
+            roi = 0
+
+        if with_filtered_rows:
+            filtered_rows = list(map(lambda x: x[1].to_dict(), df.iterrows()))
+        else:
+            filtered_rows = None
+
+        return {
+            "count": len(df),
+            "filtered_rows": filtered_rows,
+            "revenue": revenue,
+            "investment": investment,
+            "roi": roi,
+        }
+
     def get_var_names(self):
         result = []
         if self.revenue:
@@ -0,0 +1,142 @@
+import operator
+
+from functools import partial
+
+from .base_interpreter import BaseInterpreter
+from .lexer import Token
+
+
+class Compiler(BaseInterpreter):
+    """Compiles validated ROI expression tree into python closures evaluated on one row.
+
+    Each node becomes a function of row variables with its children, operator, function and
+    variable name resolved once, so per row evaluation doesn't look up evaluate methods,
+    builtin functions or operators. Nodes which are not compiled (aggregations, unknown operators,
+    etc.) are evaluated by the interpreter itself, so results and errors are the same as for
+    Interpreter.evaluate().
+    """
+    BINARY_OPS = {
+        Token.MUL: operator.mul,
+        Token.DIV: operator.truediv,
+        Token.INT_DIV: operator.floordiv,
+        Token.MODULO: operator.mod,
+        Token.PLUS: operator.add,
+        Token.MINUS: operator.sub,
+        Token.POWER: operator.pow,
+        Token.GT: operator.gt,
+        Token.GTE: operator.ge,
+        Token.LT: operator.lt,
+        Token.LTE: operator.le,
+        Token.EQ: operator.eq,
+        Token.EQ2: operator.eq,
+        Token.NE: operator.ne,
+        Token.BIT_XOR: operator.xor,
+        Token.BIT_OR: operator.or_,
+        Token.BIT_AND: operator.and_,
+        Token.BIT_LSHIFT: operator.lshift,
+        Token.BIT_RSHIFT: operator.rshift,
+    }
+
+    UNARY_OPS = {
+        Token.MINUS: operator.neg,
+        Token.BIT_NOT: operator.invert,
+        Token.NOT: operator.not_,
+    }
+
+    FUNCS = BaseInterpreter.func_values()
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.vars_mapping = interpreter.vars_mapping
+
+    def compile(self, node):
+        return self.evaluate(node)
+
+    def generic_evaluate(self, node):
+        interpreter = self.interpreter
+
+        def evaluate(variables):
+            interpreter.variables = variables
+            return interpreter.evaluate(node)
+
+        return evaluate
+
+    def evaluate_no_op_node(self, node):
+        return lambda variables: None
+
+    def evaluate_const_node(self, node):
+        value = node.value
+        return lambda variables: value
+
+    def evaluate_var_node(self, node):
+        var_name = self.vars_mapping.get(node.name, node.name)
+        # for non-known vars try to just look up in row
+        short_name = var_name[1:] if var_name.startswith("$") else None
+        # interpreter raises missed var error
+        missed_var = self.generic_evaluate(node)
+
+        def evaluate(variables):
+            if var_name in variables:
+                return variables[var_name]
+            elif short_name is not None and short_name in variables:
+                return variables[short_name]
+            else:
+                return missed_var(variables)
+
+        return evaluate
+
+    def evaluate_binary_op_node(self, node):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        if node.op == Token.AND:
+            return lambda variables: left(variables) and right(variables)
+        elif node.op == Token.OR:
+            return lambda variables: left(variables) or right(variables)
+        elif node.op == Token.IN:
+            return lambda variables: left(variables) in right(variables)
+        elif node.op in self.BINARY_OPS:
+            op = self.BINARY_OPS[node.op]
+            return lambda variables: op(left(variables), right(variables))
+        else:
+            return self.generic_evaluate(node)
+
+    def evaluate_unary_op_node(self, node):
+        value = self.compile(node.node)
+
+        if node.op == Token.PLUS:
+            return value
+        elif node.op in self.UNARY_OPS:
+            op = self.UNARY_OPS[node.op]
+            return lambda variables: op(value(variables))
+        else:
+            return self.generic_evaluate(node)
+
+    def evaluate_func_node(self, node):
+        if node.func_name in ("if", "@if") and len(node.arg_nodes) == 3:
+            predicate, true_value, false_value = map(self.compile, node.arg_nodes)
+            return lambda variables: true_value(variables) if predicate(variables) else false_value(variables)
+
+        func = self.FUNCS.get(node.func_name)
+        if func is None or node.require_aggregation:
+            return self.generic_evaluate(node)
+
+        if BaseInterpreter.is_static_func(func):
+            func = partial(func, self.interpreter)
+
+        args = list(map(self.compile, node.arg_nodes))
+
+        if len(args) == 0:
+            return lambda variables: func()
+        elif len(args) == 1:
+            arg = args[0]
+            return lambda variables: func(arg(variables))
+        elif len(args) == 2:
+            arg1, arg2 = args
+            return lambda variables: func(arg1(variables), arg2(variables))
+        else:
+            return lambda variables: func(*[arg(variables) for arg in args])
+
+    def evaluate_tuple_node(self, node):
+        items = list(map(self.compile, node.item_nodes))
+        return lambda variables: tuple([item(variables) for item in items])
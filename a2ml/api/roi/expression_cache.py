@@ -0,0 +1,66 @@
+import os
+import threading
+
+from collections import OrderedDict
+
+ROI_EXPRESSION_CACHE_SIZE = int(os.environ.get('ROI_EXPRESSION_CACHE_SIZE', 256))
+
+
+class ExpressionCache(object):
+    """LRU cache of compiled (parsed and validated) ROI expressions.
+
+    Validation result depends only on expression text and the set of known variables, so it is
+    used as a key. Vars mapping becomes part of the key through known vars, values of the mapping
+    are resolved by interpreters at evaluation time and are not cached.
+    """
+    def __init__(self, max_size=None):
+        self.max_size = ROI_EXPRESSION_CACHE_SIZE if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.reset_stats()
+
+    @staticmethod
+    def build_key(expression, known_vars):
+        return (expression, frozenset(known_vars))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['hits'] += 1
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def put(self, key, entry):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_stats(self):
+        res = dict(self._stats)
+        res['size'] = len(self._entries)
+        total = res['hits'] + res['misses']
+        res['hit_rate'] = round(res['hits'] / total, 4) if total else None
+
+        return res
+
+
+expression_cache = ExpressionCache()
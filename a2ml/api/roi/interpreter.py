@@ -1,13 +1,18 @@
 import json
+import os
 import numpy as np
 
 from operator import attrgetter
 from itertools import groupby
 
 from .base_interpreter import BaseInterpreter
+from .compiler import Compiler
 from .lexer import AstError, Token
 from .validator import Validator
 
+# Evaluate rows with expression compiled into closures instead of walking the tree for each row
+ROI_COMPILED_INTERPRETER = os.environ.get('ROI_COMPILED_INTERPRETER', 'true').lower() == 'true'
+
 class InterpreterError(AstError):
     pass
 
@@ -24,6 +29,7 @@ class Interpreter(BaseInterpreter):
     def __init__(self, expression, vars_mapping={}):
         self.expression = expression
         self.vars_mapping = vars_mapping
+        self.compiled_nodes = {}
 
     def run(self, variables={}, filter=False):
         known_vars = self.get_known_vars(variables) | set(self.vars_mapping.keys())
@@ -35,12 +41,38 @@ class Interpreter(BaseInterpreter):
             return self.evaluate_for_list(self.root, variables, filter=filter)
         else:
             self.variables = variables
+
+            if ROI_COMPILED_INTERPRETER and not self.root.require_aggregation:
+                return self.compile(self.root)(variables)
+
             return self.evaluate(self.root)
 
+    def compile(self, node):
+        # Compiled nodes are bound to this interpreter and its vars mapping, tree nodes are shared by expression cache
+        func = self.compiled_nodes.get(node)
+
+        if func is None:
+            func = Compiler(self).compile(node)
+            self.compiled_nodes[node] = func
+
+        return func
+
     def evaluate_for_list(self, node, rows, filter=False):
         # top expressions requires aggregation
         if node.require_aggregation:
             return self.evaluate(node, rows)
+        elif ROI_COMPILED_INTERPRETER:
+            func = self.compile(node)
+
+            if filter:
+                res = [vars for vars in rows if func(vars)]
+            else:
+                res = [func(vars) for vars in rows]
+
+            if len(rows) > 0:
+                self.variables = rows[-1]
+
+            return res
         else:
             res = []
 
@@ -155,7 +187,7 @@ class Interpreter(BaseInterpreter):
             raise self.error(f"unknown unary operator '{node.op}'")
 
     def evaluate_func_node(self, node, rows=None):
-        func = self.func_values()[node.func_name]
+        func = Compiler.FUNCS[node.func_name]
 
         if Interpreter.is_static_func(func):
             func_args = [self]
@@ -1,4 +1,5 @@
 from .base_interpreter import BaseInterpreter
+from .expression_cache import ExpressionCache, expression_cache
 from .lexer import AstError, Lexer
 from .parser import Parser, TopNode
 
@@ -18,6 +19,22 @@ class ValidationResult:
     def __str__(self):
         return self.error or self.warning or ''
 
+class CompiledExpression:
+    def __init__(self, tree, warning=None, error=None, defined_vars=[]):
+        self.tree = tree
+        self.warning = warning
+        self.error = error
+        self.defined_vars = defined_vars
+
+    def result(self, force_raise=True):
+        if self.error:
+            if force_raise:
+                raise self.error.with_traceback(None)
+            else:
+                return ValidationResult(is_valid=False, error=str(self.error), tree=self.tree)
+        else:
+            return ValidationResult(is_valid=True, warning=self.warning, tree=self.tree)
+
 class Validator(BaseInterpreter):
     def __init__(self, expression, known_vars):
         self.expression = expression
@@ -25,19 +42,43 @@ class Validator(BaseInterpreter):
         self.known_funcs = BaseInterpreter.known_funcs()
         self.root = None
 
-    def validate(self, force_raise=True):
+    def validate(self, force_raise=True, use_cache=True):
+        key = ExpressionCache.build_key(self.expression, self.known_vars)
+        compiled = expression_cache.get(key) if use_cache else None
+
+        if compiled:
+            self.root = compiled.tree
+            self.add_known_vars(compiled.defined_vars)
+        else:
+            compiled = self.compile()
+            if use_cache:
+                expression_cache.put(key, compiled)
+
+        return compiled.result(force_raise)
+
+    def compile(self):
+        known_vars = set(self.known_vars)
+
         try:
             parser = Parser(Lexer(self.expression))
             self.root = parser.parse()
             self.evaluate(self.root)
-            return ValidationResult(is_valid=True, tree=self.root)
+            compiled = CompiledExpression(self.root)
         except ValidationWarning as e:
-            return ValidationResult(is_valid=True, warning=str(e), tree=self.root)
+            compiled = CompiledExpression(self.root, warning=str(e))
         except AstError as e:
-            if force_raise:
-                raise e
+            compiled = CompiledExpression(self.root, error=e)
+
+        # var definitions extend known vars, so they have to be added on cache hit as well
+        compiled.defined_vars = [name for name in self.known_vars if not name in known_vars]
+        return compiled
+
+    def add_known_vars(self, names):
+        for name in names:
+            if isinstance(self.known_vars, set):
+                self.known_vars.add(name)
             else:
-                return ValidationResult(is_valid=False, error=str(e), tree=self.root)
+                self.known_vars.append(name)
 
     def evaluate_no_op_node(self, node):
         return True
@@ -61,11 +102,7 @@ class Validator(BaseInterpreter):
             msg = f"var definition '{node.name}' at position {node.position()} conflicts with existing variable"
             raise ValidationError(msg)
         else:
-            if isinstance(self.known_vars, set):
-                self.known_vars.add(node.name)
-            else:
-                self.known_vars.append(node.name)
-
+            self.add_known_vars([node.name])
             return True
 
     def evaluate_binary_op_node(self, node):
@@ -0,0 +1,614 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .base_interpreter import BaseInterpreter
+from .interpreter import Interpreter
+from .lexer import Token
+from .parser import FuncNode, TopNode, TupleNode
+from .validator import Validator
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+class VectorizedInterpreter(BaseInterpreter):
+    """Evaluates ROI expression over whole DataFrame columns with NumPy.
+
+    Each node evaluates to a python scalar or to an array with one value per row. Any node which
+    can't be evaluated column-wise exactly as Interpreter does it (unsupported function, zero division,
+    integer overflow, incompatible types, etc.) is evaluated row by row with Interpreter, so results
+    are the same as for the list of rows built from the DataFrame with iterrows().
+    """
+    ARITHMETIC_OPS = {
+        Token.PLUS: operator.add,
+        Token.MINUS: operator.sub,
+        Token.MUL: operator.mul,
+        Token.DIV: operator.truediv,
+        Token.INT_DIV: operator.floordiv,
+        Token.MODULO: operator.mod,
+        Token.POWER: operator.pow,
+        Token.BIT_LSHIFT: operator.lshift,
+        Token.BIT_RSHIFT: operator.rshift,
+    }
+
+    BITWISE_OPS = {
+        Token.BIT_AND: operator.and_,
+        Token.BIT_OR: operator.or_,
+        Token.BIT_XOR: operator.xor,
+    }
+
+    COMPARISON_OPS = {
+        Token.GT: operator.gt,
+        Token.GTE: operator.ge,
+        Token.LT: operator.lt,
+        Token.LTE: operator.le,
+        Token.EQ: operator.eq,
+        Token.EQ2: operator.eq,
+        Token.NE: operator.ne,
+    }
+
+    # Python int results of these may not fit into int64
+    UNBOUNDED_INT_OPS = set([Token.MUL, Token.POWER, Token.BIT_LSHIFT])
+    # int64 results of these are checked for overflow
+    CHECKED_INT_OPS = set([Token.PLUS, Token.MINUS, Token.INT_DIV])
+
+    # with aggregates computed by groupby transform
+    AGG_FUNCS = {"agg_max": "max", "agg_min": "min"}
+
+    def __init__(self, expression, vars_mapping={}):
+        self.expression = expression
+        self.vars_mapping = vars_mapping
+        self.row_interpreter = Interpreter(expression, vars_mapping)
+        self.stats = {'vectorized_nodes': 0, 'row_nodes': 0}
+
+    def run(self, df, filter=False):
+        self.validate(df)
+
+        # top expressions requires aggregation
+        if self.root.require_aggregation:
+            raise NotVectorizable("top expression can't be evaluated column-wise")
+
+        if filter:
+            return self.evaluate_mask(self.root, df)
+        else:
+            return self.evaluate_column(self.root, df)
+
+    def select_rows(self, df):
+        """Returns DataFrame with rows selected by filter expression.
+
+        Rows of top expression are returned in the same order and with the same with columns as
+        Interpreter returns them. Group keys, order values and with aggregates which can't be sorted
+        or aggregated column-wise exactly as python does it raise NotVectorizable.
+        """
+        self.validate(df)
+
+        if not self.root.require_aggregation:
+            return df[self.evaluate_mask(self.root, df)]
+
+        if not isinstance(self.root, TopNode):
+            raise NotVectorizable("aggregation can't be evaluated column-wise")
+
+        try:
+            return self.evaluate_top(self.root, df)
+        except NotVectorizable:
+            raise
+        except Exception as e:
+            # Interpreter raises the same error for rows
+            raise NotVectorizable(f"top expression failed: {e}")
+
+    def validate(self, df):
+        # Interpreter takes known vars from rows, so there are no known vars for an empty DataFrame
+        known_vars = set(df.columns) if len(df) > 0 else set()
+        known_vars |= set(self.vars_mapping.keys())
+        validator = Validator(self.expression, known_vars)
+        validation_result = validator.validate(force_raise=True)
+        self.root = validation_result.tree
+        self.row_dtype = VectorizedInterpreter.get_row_dtype(df.dtypes)
+
+    def set_frame(self, df):
+        self.df = df
+        self.size = len(df)
+        self.rows = None
+
+    def evaluate_column(self, node, df):
+        self.set_frame(df)
+        return self.broadcast(self.evaluate_vector(node))
+
+    def evaluate_mask(self, node, df):
+        self.set_frame(df)
+        return self.broadcast(self.truthy(self.evaluate_vector(node))).astype(bool)
+
+    @staticmethod
+    def get_row_dtype(dtypes):
+        # Dtype of a row returned by DataFrame.iterrows(): numeric columns are upcasted
+        # to a common numeric type, any other mix of columns gives python objects
+        dtypes = list(dtypes)
+
+        if len(dtypes) > 0 and all(isinstance(dtype, np.dtype) for dtype in dtypes):
+            kinds = set(dtype.kind for dtype in dtypes)
+
+            if kinds <= set(['i', 'u', 'f']):
+                return np.result_type(*dtypes)
+            elif kinds == set(['b']):
+                return np.dtype(bool)
+
+        return np.dtype(object)
+
+    def get_rows(self):
+        if self.rows is None:
+            self.rows = list(map(lambda x: x[1].to_dict(), self.df.iterrows()))
+
+        return self.rows
+
+    def evaluate_top(self, node, df):
+        if node.nested_node:
+            if not isinstance(node.nested_node, TopNode):
+                raise NotVectorizable("nested expression is not top expression")
+
+            df = self.evaluate_top(node.nested_node, df)
+
+        if node.where_node:
+            df = df[self.evaluate_mask(node.where_node, df)]
+
+        size = len(df)
+        group_keys = self.evaluate_sort_keys(node.group_node, df) if node.group_node else []
+        order_keys = self.evaluate_sort_keys(node.order_node, df) if node.order_node else [np.arange(size)]
+
+        if node.kind == Token.TOP:
+            # python reverse sort is stable, so equal values keep their order as with ascending sort
+            order_keys = [-key for key in order_keys]
+
+        if node.limit_node:
+            self.set_frame(df)
+            limit = self.evaluate_vector(node.limit_node)
+
+            if not isinstance(limit, int):
+                raise NotVectorizable("limit is not int")
+        else:
+            limit = size
+
+        # Sort by group keys, then by order values within group, np.lexsort is stable and its last key is primary
+        index = np.lexsort(list(reversed(order_keys)) + list(reversed(group_keys)))
+
+        group_starts = np.zeros(size, dtype=bool)
+        group_starts[0:1] = True
+        for key in group_keys:
+            group_starts[1:] |= key[index][1:] != key[index][:-1]
+
+        sorted_groups = np.cumsum(group_starts) - 1
+        groups = np.empty(size, dtype=np.int64)
+        groups[index] = sorted_groups
+
+        if node.with_node:
+            for with_item_node in node.with_node.with_item_nodes:
+                values = self.evaluate_with_values(with_item_node.source_node, df, groups)
+                df = df.assign(**{with_item_node.alias(): values})
+
+        selected = np.arange(size) - np.flatnonzero(group_starts)[sorted_groups] < limit
+
+        if node.having_node:
+            # Drop whole group if none of the rows meet having expression
+            having = self.evaluate_mask(node.having_node, df)
+            groups_count = sorted_groups[-1] + 1 if size > 0 else 0
+            selected &= (np.bincount(groups[having], minlength=groups_count) > 0)[sorted_groups]
+
+        index = index[selected]
+        index = index[np.lexsort([key[index] for key in reversed(order_keys)])]
+
+        return df.iloc[index]
+
+    def evaluate_sort_keys(self, node, df):
+        # Tuples are compared item by item, so sorting by keys of items gives the same order as sorting by tuples
+        nodes = node.item_nodes if isinstance(node, TupleNode) else [node]
+
+        return [self.sort_key(self.evaluate_column(item_node, df)) for item_node in nodes]
+
+    @staticmethod
+    def sort_key(values):
+        # Rank of each value, equal values have the same rank
+        if values.dtype.kind == 'O':
+            types = set(map(type, values))
+
+            if not (types <= set([str]) or types <= set([bool, int, float])):
+                raise NotVectorizable("values of different types can't be sorted")
+
+            if float in types and any(value != value for value in values):
+                raise NotVectorizable("NaN can't be sorted")
+        elif values.dtype.kind not in 'biuf':
+            raise NotVectorizable(f"values of {values.dtype} can't be sorted")
+        elif values.dtype.kind == 'f' and np.isnan(values).any():
+            raise NotVectorizable("NaN can't be sorted")
+
+        return np.unique(values, return_inverse=True)[1]
+
+    def evaluate_with_values(self, node, df, groups):
+        if not isinstance(node, FuncNode) or node.func_name not in self.AGG_FUNCS or len(node.arg_nodes) != 1:
+            raise NotVectorizable(f"with expression '{node}'")
+
+        values = self.evaluate_column(node.arg_nodes[0], df)
+
+        if values.dtype.kind not in 'if':
+            raise NotVectorizable(f"with expression '{node}' of {values.dtype}")
+
+        # python max and min don't skip NaN and return first of equal values, so 0.0 and -0.0 may differ
+        if values.dtype.kind == 'f' and (np.isnan(values).any() or np.signbit(values[values == 0]).any()):
+            raise NotVectorizable(f"with expression '{node}' of NaN or negative zero")
+
+        res = pd.Series(values).groupby(groups).transform(self.AGG_FUNCS[node.func_name]).to_numpy()
+
+        # with values are added to rows as is, so they can be stored in DataFrame only if they don't change row dtype
+        if self.row_dtype.kind != 'O' and res.dtype != self.row_dtype:
+            raise NotVectorizable(f"with expression '{node}' changes row dtype")
+
+        return res
+
+    def evaluate_vector(self, node):
+        try:
+            res = self.evaluate(node)
+            self.stats['vectorized_nodes'] += 1
+            return res
+        except Exception:
+            return self.evaluate_rows(node)
+
+    def evaluate_rows(self, node):
+        self.stats['row_nodes'] += 1
+        return self.to_object_array(self.row_interpreter.evaluate_for_list(node, self.get_rows()))
+
+    def evaluate_scalar(self, node):
+        # Node doesn't depend on row values, so compute it once
+        self.row_interpreter.variables = {}
+        return self.row_interpreter.evaluate(node)
+
+    def evaluate_no_op_node(self, node):
+        return None
+
+    def evaluate_const_node(self, node):
+        return node.value
+
+    def evaluate_var_node(self, node):
+        var_name = self.vars_mapping.get(node.name, node.name)
+
+        if var_name in self.df.columns:
+            return self.column_values(var_name)
+        elif var_name.startswith("$") and var_name[1:] in self.df.columns:
+            # for non-known vars try to just look up in row
+            return self.column_values(var_name[1:])
+        else:
+            raise NotVectorizable(f"missed var `{var_name}`")
+
+    def column_values(self, name):
+        series = self.df[name]
+        if series.ndim != 1:
+            raise NotVectorizable(f"duplicated column `{name}`")
+
+        if self.row_dtype.kind != 'O':
+            return series.to_numpy(dtype=self.row_dtype)
+
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            return series.to_numpy()
+
+        return series.to_numpy(dtype=object)
+
+    def evaluate_binary_op_node(self, node):
+        if node.op in (Token.AND, Token.OR):
+            return self.logic_op(node)
+
+        left = self.evaluate_vector(node.left)
+        right = self.evaluate_vector(node.right)
+
+        if not self.is_array(left) and not self.is_array(right):
+            return self.evaluate_scalar(node)
+
+        if node.op in self.ARITHMETIC_OPS:
+            return self.arithmetic_op(node.op, left, right)
+        elif node.op in self.BITWISE_OPS:
+            return self.bitwise_op(node.op, left, right)
+        elif node.op in self.COMPARISON_OPS:
+            return self.comparison_op(node.op, left, right)
+        else:
+            raise NotVectorizable(f"binary operator '{node.op}'")
+
+    def logic_op(self, node):
+        left = self.evaluate_vector(node.left)
+
+        if not self.is_array(left):
+            # python short circuit
+            if node.op == Token.AND:
+                return self.evaluate_vector(node.right) if left else left
+            else:
+                return left if left else self.evaluate_vector(node.right)
+
+        mask = self.truthy(left)
+
+        # right operand is evaluated only for rows where python doesn't short circuit,
+        # so guarded expressions like `$x != 0 and 1 / $x < 1` stay vectorized
+        if node.op == Token.AND:
+            return self.select_lazy(mask, node.right, left)
+        else:
+            return self.select_lazy(~mask, node.right, left)
+
+    def arithmetic_op(self, op, left, right):
+        left = self.bool_to_int(left)
+        right = self.bool_to_int(right)
+
+        if not self.is_numeric(left) or not self.is_numeric(right):
+            return self.object_op(self.ARITHMETIC_OPS[op], left, right)
+
+        if op in self.UNBOUNDED_INT_OPS and self.is_int(left) and self.is_int(right):
+            return self.object_op(self.ARITHMETIC_OPS[op], left, right)
+
+        if op in (Token.DIV, Token.INT_DIV, Token.MODULO) and np.any(right == 0):
+            raise ZeroDivisionError(f"zero division in '{op}'")
+
+        if op == Token.BIT_RSHIFT and np.any(right < 0):
+            raise ValueError("negative shift count")
+
+        with np.errstate(all='ignore'):
+            if op == Token.POWER:
+                # ndarray ** 2 is computed as square, which may differ from python pow in the last digit
+                res = np.power(left, right)
+            else:
+                res = self.ARITHMETIC_OPS[op](left, right)
+
+        if op in self.CHECKED_INT_OPS and self.is_int(left) and self.is_int(right) and \
+            self.is_int_overflow(op, left, right, res):
+            # python ints don't wrap on overflow
+            return self.object_op(self.ARITHMETIC_OPS[op], left, right)
+
+        if op == Token.POWER and np.any(~np.isfinite(res) & np.isfinite(left) & np.isfinite(right)):
+            # python raises or returns complex numbers
+            raise NotVectorizable("power result is out of float range")
+
+        return res
+
+    @staticmethod
+    def is_int_overflow(op, left, right, res):
+        if op == Token.PLUS:
+            # operands have the same sign and result has the other one
+            return np.any(((left ^ res) & (right ^ res)) < 0)
+        elif op == Token.MINUS:
+            return np.any(((left ^ right) & (left ^ res)) < 0)
+        else:
+            return np.any((left == np.iinfo(res.dtype).min) & (right == -1))
+
+    def bitwise_op(self, op, left, right):
+        if self.is_bool(left) and self.is_bool(right):
+            return self.BITWISE_OPS[op](left, right)
+
+        left = self.bool_to_int(left)
+        right = self.bool_to_int(right)
+
+        if self.is_int(left) and self.is_int(right):
+            return self.BITWISE_OPS[op](left, right)
+
+        return self.object_op(self.BITWISE_OPS[op], left, right)
+
+    def comparison_op(self, op, left, right):
+        if self.is_numeric(left) and self.is_numeric(right):
+            return self.COMPARISON_OPS[op](left, right)
+
+        return self.to_bool_array(self.object_op(self.COMPARISON_OPS[op], left, right))
+
+    def evaluate_unary_op_node(self, node):
+        value = self.evaluate_vector(node.node)
+
+        if not self.is_array(value):
+            return self.evaluate_scalar(node)
+
+        if node.op == Token.PLUS:
+            return value
+        elif node.op == Token.MINUS:
+            value = self.bool_to_int(value)
+            if value.dtype.kind == 'i' and np.any(value == np.iinfo(value.dtype).min):
+                # python ints don't wrap on overflow
+                return self.to_object_array(-self.to_object_array(value))
+
+            return -value
+        elif node.op == Token.BIT_NOT:
+            return ~self.bool_to_int(value)
+        elif node.op == Token.NOT:
+            return ~self.truthy(value)
+        else:
+            raise NotVectorizable(f"unary operator '{node.op}'")
+
+    def evaluate_func_node(self, node):
+        func_name = node.func_name
+
+        if func_name in ("agg_max", "agg_min", "random", "randint"):
+            raise NotVectorizable(f"function '{func_name}'")
+
+        if func_name in ("if", "@if"):
+            return self.logic_if_vector(*node.arg_nodes)
+
+        args = list(map(self.evaluate_vector, node.arg_nodes))
+
+        if not any(map(self.is_array, args)):
+            return self.evaluate_scalar(node)
+
+        if func_name in ("min", "max"):
+            return self.min_max(Token.LT if func_name == "min" else Token.GT, args)
+
+        if len(args) == 1 and self.is_numeric(args[0]):
+            value = args[0]
+
+            if func_name == "abs" and value.dtype.kind in 'fb':
+                return np.abs(self.bool_to_int(value))
+            elif func_name in ("floor", "ceil", "round") and value.dtype.kind == 'f' and \
+                np.all(np.abs(value) < 2**62):
+                with np.errstate(all='ignore'):
+                    if func_name == "floor":
+                        res = np.floor(value)
+                    elif func_name == "ceil":
+                        res = np.ceil(value)
+                    else:
+                        res = np.rint(value)
+
+                return res.astype(np.int64)
+
+        func = self.func_values()[func_name]
+        if BaseInterpreter.is_static_func(func):
+            static_func = func
+            func = lambda *func_args: static_func(self, *func_args)
+
+        return self.to_object_array(np.frompyfunc(func, len(args), 1)(*self.to_object_args(args)))
+
+    def logic_if_vector(self, predicate, true_value, false_value):
+        mask = self.evaluate_vector(predicate)
+
+        if not self.is_array(mask):
+            return self.evaluate_vector(true_value if mask else false_value)
+
+        mask = self.truthy(mask)
+
+        if not mask.any():
+            return self.evaluate_vector(false_value)
+        elif mask.all():
+            return self.evaluate_vector(true_value)
+
+        return self.select(mask, self.evaluate_masked(true_value, mask), self.evaluate_masked(false_value, ~mask))
+
+    def min_max(self, op, args):
+        # Same as python min/max: next item replaces current one only if it is strictly less/greater
+        res = args[0]
+
+        for value in args[1:]:
+            res = self.select(self.comparison_or_scalar(op, value, res), value, res)
+
+        return res
+
+    def comparison_or_scalar(self, op, left, right):
+        if not self.is_array(left) and not self.is_array(right):
+            return self.COMPARISON_OPS[op](left, right)
+
+        return self.comparison_op(op, left, right)
+
+    def select_lazy(self, mask, node, other):
+        # node value for rows selected by mask and other for the rest
+        if not mask.any():
+            return other
+        elif mask.all():
+            return self.evaluate_vector(node)
+
+        return self.select(mask, self.evaluate_masked(node, mask), other)
+
+    def evaluate_masked(self, node, mask):
+        # Evaluate node only on rows selected by mask, values of other rows are undefined
+        df, size, rows = self.df, self.size, self.rows
+        self.set_frame(df[mask])
+
+        if rows is not None:
+            self.rows = [row for (row, selected) in zip(rows, mask) if selected]
+
+        try:
+            values = self.evaluate_vector(node)
+        finally:
+            self.df, self.size, self.rows = df, size, rows
+
+        if not self.is_array(values):
+            return values
+
+        res = np.zeros(size, dtype=values.dtype)
+        res[mask] = values
+        return res
+
+    def select(self, mask, true_value, false_value):
+        if not self.is_array(mask):
+            return true_value if mask else false_value
+
+        true_value = self.broadcast(self.scalar_to_array(true_value))
+        false_value = self.broadcast(self.scalar_to_array(false_value))
+
+        if true_value.dtype == false_value.dtype and true_value.dtype.kind != 'O':
+            return np.where(mask, true_value, false_value)
+
+        res = np.array(self.to_object_array(false_value), dtype=object)
+        res[mask] = self.to_object_array(true_value)[mask]
+        return res
+
+    def truthy(self, value):
+        if not self.is_array(value):
+            return bool(value)
+
+        if value.dtype.kind == 'b':
+            return value
+        elif value.dtype.kind in 'iuf':
+            return value != 0
+        else:
+            return self.to_bool_array(np.frompyfunc(bool, 1, 1)(value))
+
+    def object_op(self, op, left, right):
+        left, right = self.to_object_args([left, right])
+        return self.to_object_array(op(left, right))
+
+    def broadcast(self, value):
+        if self.is_array(value):
+            return value
+
+        res = np.empty(self.size, dtype=object)
+        res.fill(value)
+        return res
+
+    def scalar_to_array(self, value):
+        # Keep numpy types for numbers to let select() use np.where
+        if isinstance(value, (bool, int, float)) and not (isinstance(value, int) and abs(value) >= 2**63):
+            return np.full(self.size, value)
+
+        return value
+
+    def to_object_args(self, args):
+        return [arg.astype(object) if self.is_array(arg) else arg for arg in args]
+
+    def to_object_array(self, values):
+        if self.is_array(values):
+            # astype converts numpy scalars to python ones
+            return values if values.dtype.kind == 'O' else values.astype(object)
+
+        res = np.empty(len(values), dtype=object)
+        res[:] = list(values)
+        return res
+
+    @staticmethod
+    def to_bool_array(values):
+        if values.dtype.kind == 'b':
+            return values
+
+        if not all(isinstance(value, (bool, np.bool_)) for value in values):
+            raise NotVectorizable("comparison result is not bool")
+
+        return values.astype(bool)
+
+    @staticmethod
+    def is_array(value):
+        return isinstance(value, np.ndarray)
+
+    @staticmethod
+    def bool_to_int(value):
+        if isinstance(value, np.ndarray) and value.dtype.kind == 'b':
+            return value.astype(np.int64)
+
+        return value
+
+    @staticmethod
+    def is_bool(value):
+        if isinstance(value, np.ndarray):
+            return value.dtype.kind == 'b'
+
+        return isinstance(value, bool)
+
+    @staticmethod
+    def is_int(value):
+        if isinstance(value, np.ndarray):
+            return value.dtype.kind in 'bi'
+
+        return isinstance(value, int)
+
+    @staticmethod
+    def is_numeric(value):
+        # Unsigned arrays and ints out of int64 range are computed by python
+        if isinstance(value, np.ndarray):
+            return value.dtype.kind in 'bif'
+
+        return isinstance(value, float) or (isinstance(value, int) and abs(value) < 2**63)
@@ -1,13 +1,14 @@
 import numpy as np
-import pandas as pd
 import os
 
 from sklearn.mixture import GaussianMixture
 
 from a2ml.api.model_review.model_helper import ModelHelper
 from a2ml.api.model_review.model_review import ModelReview
+from a2ml.api.model_review.prediction_files_index import PredictionFilesIndex
 from a2ml.api.utils import fsclient
 from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.prefetch_loader import PrefetchLoader
 
 
 class FeatureDivergence:
@@ -155,21 +156,23 @@ class FeatureDivergence:
 
         res = {}
 
-        for (curr_date, files) in ModelReview._prediction_files_by_day(
+        files_index = PredictionFilesIndex(model_path)
+        days = ModelReview._prediction_files_by_day(
             model_path,
             date_from,
             date_to,
-            "_*_actuals.feather.zstd"
-        ):
-            daily_df = None
-            for (file, df) in DataFrame.load_from_files(files, features):
-                if daily_df != None:
-                    daily_df.df = pd.concat(
-                        [daily_df.df, df.df], ignore_index=True)
-                else:
-                    daily_df = df
-
-            if daily_df != None:
+            "_*_actuals.feather.zstd",
+            files_index
+        )
+        # Next days are loaded while current one is scored
+        loader = PrefetchLoader(lambda day: DataFrame.load_dataset(day[1], features),
+            get_size=lambda day: files_index.get_files_size(day[1]))
+
+        for ((curr_date, files), daily_df, exc) in loader.iter_results(days):
+            if exc is not None:
+                raise exc
+
+            if len(daily_df.columns) > 0:
                 sub_res = {}
 
                 for feature in features_source:
@@ -262,6 +262,15 @@ def sort_arrays(ar1, ar2, top_n=None, desc=True):
 def getsizeof_deep(obj):
     import gc
     import sys
+    import numpy as np
+
+    def getsizeof(obj):
+        size = sys.getsizeof(obj)
+        # Arrays which don't own data (views, arrays loaded by joblib) report header size only
+        if isinstance(obj, np.ndarray) and not obj.flags.owndata:
+            size += obj.nbytes
+
+        return size
 
     sz = 0
     try:
@@ -269,7 +278,7 @@ def getsizeof_deep(obj):
         obj_q = [obj]
 
         while obj_q:
-            sz += sum(map(sys.getsizeof, obj_q))
+            sz += sum(map(getsizeof, obj_q))
 
             # Lookup all the object referred to by the object in obj_q.
             # See: https://docs.python.org/3.7/library/gc.html#gc.get_referents
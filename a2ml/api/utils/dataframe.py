@@ -11,6 +11,7 @@ from functools import wraps
 
 from a2ml.api.utils import fsclient, get_uid, get_uid4, remove_dups_from_list, process_arff_line, download_file, retry_helper, parse_url
 from a2ml.api.utils.local_fsclient import LocalFSClient
+from a2ml.api.utils.prefetch_loader import PrefetchLoader
 
 
 # To avoid warnings for inplace operation on datasets
@@ -88,16 +89,112 @@ class DataFrame(object):
         return ds
 
     @staticmethod
-    def load_from_files(files, features=None):
-        for file in files:
+    def load_from_files(files, features=None, prefetch=True, workers=None, read_ahead=None,
+        max_inflight_bytes=None):
+        """Yields (file, DataFrame) in files order, files which failed to load are logged and skipped.
+
+        With prefetch next files are downloaded and decoded by PrefetchLoader threads while the
+        caller processes current one.
+        """
+        def load_file(file):
             path = file if type(file) == str else file['path']
 
             fsclient.wait_for_file(path, True)
+            return retry_helper(lambda: DataFrame.create_dataframe(path, None, features))
+
+        loader = PrefetchLoader(load_file, workers if prefetch else 0, read_ahead, max_inflight_bytes)
+        for (file, df, exc) in loader.iter_results(files):
+            if exc is not None:
+                path = file if type(file) == str else file['path']
+                logging.error("load_from_files failed for: %s. Error: %s"%(path, exc), exc_info=exc)
+                continue
+
+            yield (file, df)
+
+    @staticmethod
+    def load_dataset(files, features=None, filter=None, use_threads=True):
+        """Loads files into single DataFrame with pyarrow.dataset.
+
+        Local feather (uncompressed, zstd, lz4) and parquet files are read as one dataset:
+        only features columns are decoded (missed columns are skipped), filter (pyarrow.dataset
+        expression) is applied while scanning and the result is converted to pandas once.
+        Other files are loaded with load_from_files and concatenated once.
+        """
+        paths = [file if type(file) == str else file['path'] for file in files]
+        ds = DataFrame({})
+        ds.df = pd.DataFrame()
+        if not paths:
+            return ds
+
+        dataset_format = DataFrame._get_dataset_format(paths)
+        if dataset_format:
             try:
-                df = retry_helper(lambda: DataFrame.create_dataframe(path, None, features))
-                yield (file, df)
+                ds.df = DataFrame._load_arrow_dataset(paths, dataset_format, features, filter, use_threads)
+                return ds
             except Exception as exc:
-                logging.exception("load_from_files failed for: %s. Error: %s"%(path, exc))
+                logging.error("load_dataset with pyarrow.dataset failed: %s. Load files one by one." % exc)
+
+        dfs = []
+        # Items with sizes are passed to loader to not request sizes from storage
+        for (file, df) in DataFrame.load_from_files(files):
+            if features is not None:
+                df.df = df.df[[feature for feature in features if feature in df.df.columns]]
+
+            dfs.append(df.df)
+
+        if dfs:
+            ds.df = pd.concat(dfs, ignore_index=True)
+            if filter is not None:
+                import pyarrow as pa # pylint: disable=C0415
+
+                ds.df = pa.Table.from_pandas(ds.df, preserve_index=False).filter(filter).to_pandas()
+
+        return ds
+
+    @staticmethod
+    def _get_dataset_format(paths):
+        formats = set()
+        for path in paths:
+            if fsclient.is_s3_path(path):
+                return None
+
+            if path.endswith('.parquet'):
+                formats.add('parquet')
+            elif path.endswith('.feather') or path.endswith('.feather.zstd') or path.endswith('.feather.lz4'):
+                formats.add('feather')
+            else:
+                return None
+
+        return formats.pop() if len(formats) == 1 else None
+
+    @staticmethod
+    def _load_arrow_dataset(paths, dataset_format, features, filter, use_threads):
+        import pyarrow as pa # pylint: disable=C0415
+        import pyarrow.dataset as pa_ds # pylint: disable=C0415
+
+        for path in paths:
+            fsclient.wait_for_file(path, True)
+
+        # Files may have different columns, missed ones are filled with nulls like pd.concat does
+        schemas = [pa_ds.dataset(path, format=dataset_format).schema for path in paths]
+        schema = pa.unify_schemas(schemas)
+        dataset = pa_ds.dataset(paths, schema=schema, format=dataset_format)
+
+        # Not default pandas index is stored as column, it is not restored for concatenated data
+        index_columns = set()
+        for file_schema in schemas:
+            if file_schema.pandas_metadata:
+                index_columns.update(column for column in file_schema.pandas_metadata.get('index_columns', [])
+                    if isinstance(column, str))
+
+        columns = [name for name in schema.names if not name in index_columns]
+        if features is not None:
+            columns = [feature for feature in features if feature in columns]
+
+        table = dataset.to_table(columns=columns, filter=filter, use_threads=use_threads)
+
+        # Index of the first file from pandas metadata is not valid for all rows
+        return table.to_pandas(use_threads=use_threads, ignore_metadata=True)
 
     @staticmethod
     def is_dataframe(data):
@@ -1,13 +1,43 @@
+import collections
 import contextlib
 import logging
 import os
 import shutil
 import tempfile
+import threading
 import time
 
 from .local_fsclient import LocalFSClient
 
 
+# Read and write feather/parquet S3 objects in memory instead of local temp files
+S3_DIRECT_IO = os.environ.get('S3_DIRECT_IO', 'true').lower() == 'true'
+# Read JSON files directly, without parent folder listing and existence checks
+JSON_FAST_READ = os.environ.get('FSCLIENT_JSON_FAST_READ', 'true').lower() == 'true'
+# Texts of S3 JSON files, revalidated by ETag on each read
+JSON_CACHE_MAX_ITEMS = int(os.environ.get('FSCLIENT_JSON_CACHE_MAX_ITEMS', 1000))
+JSON_CACHE_MAX_SIZE = int(os.environ.get('FSCLIENT_JSON_CACHE_MAX_SIZE', 1024*1024))
+
+# Counts of file reads by function, reset and logged per task
+_read_stats_lock = threading.Lock()
+_read_stats = {}
+
+def _count_read(name):
+    with _read_stats_lock:
+        _read_stats[name] = _read_stats.get(name, 0) + 1
+
+_json_cache_lock = threading.Lock()
+_json_cache = collections.OrderedDict()
+
+def reset_read_stats():
+    with _read_stats_lock:
+        _read_stats.clear()
+
+def get_read_stats():
+    with _read_stats_lock:
+        return dict(_read_stats)
+
+
 def is_s3_path(path):
     return path.startswith("s3:/")
 
@@ -59,6 +89,17 @@ def remove_file(path, wild=False):
     client.remove_file(path, wild)
 
 
+def remove_files(paths):
+    """Removes files, S3 objects are deleted with batched delete_objects requests."""
+    s3_paths = [path for path in paths if is_s3_path(path)]
+    if s3_paths:
+        _get_fsclient_bypath(s3_paths[0]).remove_files(s3_paths)
+
+    for path in paths:
+        if not is_s3_path(path):
+            LocalFSClient().remove_file(path)
+
+
 def get_smart_open_transport_params(path):
     if is_s3_path(path):
         client = _get_fsclient_bypath(path)
@@ -130,6 +171,11 @@ def get_file_size(path):
     client = _get_fsclient_bypath(path)
     return client.get_file_size(path)
 
+
+def get_etag(path):
+    client = _get_fsclient_bypath(path)
+    return client.get_etag(path)
+
 # @classmethod
 # def openFile(cls, path, mode):
 #     client = cls._get_fsclient_bypath(path)
@@ -147,6 +193,7 @@ def is_folder_exists(path):
 
 
 def read_text_file(path):
+    _count_read('read_text_file')
     client = _get_fsclient_bypath(path)
     return client.read_text_file(path)
 
@@ -170,7 +217,16 @@ def update_json_file(path, data, atomic=False, allow_nan=False):
         fileData, allow_nan=allow_nan), atomic=atomic)
 
 
-def read_json_file(path, check_if_exist=True, if_wait_for_file=False):
+def read_json_file(path, check_if_exist=True, if_wait_for_file=False, refresh_folder=False):
+    """Returns data of JSON file, {} for missed file if check_if_exist.
+
+    File is read directly: open of local file or single GET of S3 object (conditional if it is
+    in cache). Set refresh_folder to list parent folder before read, it refreshes attributes
+    cache of network filesystems when file can be just written by other host.
+    """
+    if JSON_FAST_READ and not if_wait_for_file and not refresh_folder:
+        return _read_json_file_fast(path, check_if_exist)
+
     import json
 
     if not is_s3_path(path):
@@ -181,6 +237,7 @@ def read_json_file(path, check_if_exist=True, if_wait_for_file=False):
     if check_if_exist and not is_file_exists(path):
         return {}
 
+    _count_read('read_json_file')
     nTry = 0
     while True:
         json_text = read_text_file(path)
@@ -198,6 +255,69 @@ def read_json_file(path, check_if_exist=True, if_wait_for_file=False):
     return {}
 
 
+def _read_json_file_fast(path, check_if_exist):
+    import json
+
+    nTry = 0
+    while True:
+        try:
+            json_text = _read_json_text(path)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            if check_if_exist:
+                return {}
+
+            raise
+
+        _count_read('read_json_file')
+        try:
+            return json.loads(json_text)
+        except Exception as e:
+            logging.error("Load json failed: %s.Text: %s" %
+                          (repr(e), json_text))
+            if nTry > 10:
+                raise
+
+            # File can be partially written
+            _remove_cached_json(path)
+            nTry += 1
+            time.sleep(2)
+
+
+def _read_json_text(path):
+    if not is_s3_path(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    with _json_cache_lock:
+        cached = _json_cache.get(path)
+
+    try:
+        json_text, etag = _get_fsclient_bypath(path).read_text_if_changed(path, cached[0] if cached else None)
+    except FileNotFoundError:
+        _remove_cached_json(path)
+        raise
+
+    with _json_cache_lock:
+        if json_text is None:
+            _count_read('read_json_file_not_modified')
+            _json_cache[path] = cached
+            _json_cache.move_to_end(path)
+            return cached[1]
+
+        if etag and len(json_text) <= JSON_CACHE_MAX_SIZE:
+            _json_cache[path] = (etag, json_text)
+            _json_cache.move_to_end(path)
+            while len(_json_cache) > JSON_CACHE_MAX_ITEMS:
+                _json_cache.popitem(last=False)
+
+    return json_text
+
+
+def _remove_cached_json(path):
+    with _json_cache_lock:
+        _json_cache.pop(path, None)
+
+
 def wait_for_file(path, if_wait_for_file, num_tries=30, interval_sec=1):
     if if_wait_for_file:
         nTry = 0
@@ -297,6 +417,14 @@ def _save_to_feather(obj, path, compress):
 
     feather.write_feather(obj, path, compression=compress)
 
+def _save_to_feather_buffer(obj, compress):
+    import pyarrow as pa
+    from pyarrow import feather
+
+    stream = pa.BufferOutputStream()
+    feather.write_feather(obj, stream, compression=compress)
+    return stream.getvalue()
+
 def save_object_to_file(obj, path, fmt="pickle"):
     
     remove_file(path)
@@ -311,7 +439,9 @@ def save_object_to_file(obj, path, fmt="pickle"):
         elif path.endswith('.lz4'):
             compress = "lz4"
 
-        if is_s3_path(path):
+        if is_s3_path(path) and fmt == "feather" and S3_DIRECT_IO:
+            _get_fsclient_bypath(path).write_bytes(path, _save_to_feather_buffer(obj, compress=compress))
+        elif is_s3_path(path):
             with save_atomic(path) as local_path:
                 if fmt == "pickle":
                     _save_to_pickle(obj, local_path, compress=compress)
@@ -399,6 +529,7 @@ def load_object_from_file(path, use_local_cache=False):
     import joblib
     import urllib.parse
 
+    _count_read('load_object_from_file')
     path_to_load = None
     if is_s3_path(path):
         if use_local_cache:
@@ -445,6 +576,7 @@ def load_object_from_file(path, use_local_cache=False):
 def load_npobject_from_file(path):
     import numpy as np
 
+    _count_read('load_npobject_from_file')
     if is_s3_path(path):
         with save_atomic(path, move_file=False) as local_path:
             download_file(path, local_path)
@@ -461,7 +593,19 @@ def _read_feather(path, features=None):
 
     return feather.read_feather(path, columns=features, use_threads=bool(True))
 
+def _is_s3_direct_read(path):
+    return is_s3_path(path) and S3_DIRECT_IO and not (path.endswith(".gz") or path.endswith(".zip"))
+
 def load_db_from_feather_file(path, features=None):
+    _count_read('load_db_from_feather_file')
+
+    if _is_s3_direct_read(path):
+        import pyarrow as pa
+        from pyarrow import feather
+
+        data = _get_fsclient_bypath(path).read_bytes(path)
+        return feather.read_feather(pa.BufferReader(pa.py_buffer(data)), columns=features, use_threads=True)
+
     if is_s3_path(path):
         with save_atomic(path, move_file=False) as local_path:
             download_file(path, local_path)
@@ -475,6 +619,22 @@ def _read_parquet(path, features=None):
     return pd.read_parquet(path, columns=features)
 
 def load_db_from_parquet_file(path, features=None):
+    _count_read('load_db_from_parquet_file')
+
+    if _is_s3_direct_read(path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        client = _get_fsclient_bypath(path)
+        if features is None:
+            source = pa.BufferReader(pa.py_buffer(client.read_bytes(path)))
+        else:
+            # Footer and needed column chunks are fetched with ranged GETs
+            source = pa.PythonFile(client.open_range_file(path), mode='r')
+
+        # Same as pd.read_parquet with pyarrow engine
+        return pq.read_table(source, columns=features, use_pandas_metadata=True).to_pandas()
+
     if is_s3_path(path):
         with save_atomic(path, move_file=False) as local_path:
             download_file(path, local_path)
@@ -482,6 +642,32 @@ def load_db_from_parquet_file(path, features=None):
 
     return _read_parquet(path, features)
 
+def read_arrow_schema(path):
+    """Returns pyarrow schema of parquet or feather file, only footer is read. None for other formats."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    is_parquet = path.endswith(".parquet")
+    is_feather = path.endswith(".feather") or path.endswith(".feather.zstd") or path.endswith(".feather.lz4")
+    if not (is_parquet or is_feather) or (is_s3_path(path) and not S3_DIRECT_IO):
+        return None
+
+    _count_read('read_arrow_schema')
+    if is_s3_path(path):
+        # Footer is fetched with ranged GETs
+        source = pa.PythonFile(_get_fsclient_bypath(path).open_range_file(path), mode='r')
+    else:
+        source = path
+
+    try:
+        if is_parquet:
+            return pq.read_schema(source)
+        else:
+            return pa.ipc.open_file(source).schema
+    except pa.ArrowInvalid:
+        # feather v1 files have no IPC footer
+        return None
+
 def is_abs_path(path):
     import platform
 
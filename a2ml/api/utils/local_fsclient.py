@@ -37,7 +37,8 @@ class LocalFSClient:
             return
 
         if not self.is_folder_exists(path):
-            os.makedirs(path)
+            # Parallel downloads may create the same folder
+            os.makedirs(path, exist_ok=True)
 
         # try:
         # except OSError:
@@ -125,6 +126,11 @@ class LocalFSClient:
     def get_file_size(self, path):
         return os.path.getsize(path)
 
+    def get_etag(self, path):
+        # Files have no content hash, modification time and size identify version
+        stat = os.stat(path)
+        return "%s-%s" % (stat.st_mtime_ns, stat.st_size)
+
     @contextlib.contextmanager
     def open_atomic(self, path, mode):
         parent = self.get_parent_folder(os.path.abspath(path))
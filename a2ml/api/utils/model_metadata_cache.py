@@ -0,0 +1,94 @@
+import collections
+import os
+import threading
+import time
+
+from a2ml.api.utils import fsclient
+
+
+MODEL_METADATA_CACHE_TTL = float(os.environ.get('MODEL_METADATA_CACHE_TTL', 10))
+MODEL_METADATA_CACHE_MAX_MODELS = int(os.environ.get('MODEL_METADATA_CACHE_MAX_MODELS', 256))
+
+METADATA_FILES = {
+    'options': 'options.json',
+    'target_categoricals': 'target_categoricals.json',
+}
+
+
+class ModelMetadataCache(object):
+    """Process-wide cache of model options.json and target_categoricals.json.
+
+    Metadata is returned from cache without any storage calls during ttl seconds after it
+    was loaded or validated, after that versions of files (mtime and size of local file,
+    ETag of S3 object) are checked and files are read again only if they were changed.
+    Returned dicts are shared, callers should copy them before modification.
+    """
+    def __init__(self, ttl=None, max_models=None):
+        self.ttl = MODEL_METADATA_CACHE_TTL if ttl is None else ttl
+        self.max_models = MODEL_METADATA_CACHE_MAX_MODELS if max_models is None else max_models
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.reset_stats()
+
+    def get(self, model_path, ttl=None):
+        """Returns {'options': ..., 'target_categoricals': ...} of model, missed files are empty dicts."""
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            entry = self._entries.get(model_path)
+            if entry is not None and time.time() - entry['validated_at'] < ttl:
+                self._entries.move_to_end(model_path)
+                self._stats['hits'] += 1
+                return entry['metadata']
+
+        version = ModelMetadataCache.get_version(model_path)
+        with self._lock:
+            if entry is not None and entry['version'] == version:
+                entry['validated_at'] = time.time()
+                self._stats['revalidations'] += 1
+                return entry['metadata']
+
+        metadata = dict((name, fsclient.read_json_file(os.path.join(model_path, file_name)))
+            for (name, file_name) in METADATA_FILES.items())
+
+        with self._lock:
+            self._stats['misses'] += 1
+            self._entries[model_path] = {'metadata': metadata, 'version': version, 'validated_at': time.time()}
+            self._entries.move_to_end(model_path)
+            while len(self._entries) > self.max_models:
+                self._entries.popitem(last=False)
+
+        return metadata
+
+    def remove(self, model_path):
+        with self._lock:
+            self._entries.pop(model_path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = collections.OrderedDict()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hits': 0, 'revalidations': 0, 'misses': 0}
+
+    def get_stats(self):
+        with self._lock:
+            res = dict(self._stats)
+            res['models'] = len(self._entries)
+
+        return res
+
+    @staticmethod
+    def get_version(model_path):
+        res = []
+        for file_name in METADATA_FILES.values():
+            try:
+                res.append(fsclient.get_etag(os.path.join(model_path, file_name)))
+            except Exception:
+                res.append(None)
+
+        return tuple(res)
+
+
+model_metadata_cache = ModelMetadataCache()
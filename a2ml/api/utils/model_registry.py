@@ -0,0 +1,141 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+from a2ml.api.utils import fsclient, getsizeof_deep
+
+
+MODEL_REGISTRY_MAX_BYTES = int(os.environ.get('MODEL_REGISTRY_MAX_BYTES', 4*1024*1024*1024))
+MODEL_REGISTRY_MAX_MODELS = int(os.environ.get('MODEL_REGISTRY_MAX_MODELS', 16))
+
+
+class ModelRegistry(object):
+    """Process-wide LRU cache of loaded models for local predictions.
+
+    Models are keyed by model path (it contains model id) and validated by version of the path:
+    mtime and size of local file or folder, ETag of S3 object, so redeployed model is loaded again.
+    Memory budget is counted in deep size of loaded models (size of model files if it can't be
+    calculated), least recently used models are evicted when it or max models count is exceeded.
+    The last loaded model is kept even if it is bigger than the budget.
+    """
+    def __init__(self, max_bytes=None, max_models=None):
+        self.max_bytes = MODEL_REGISTRY_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_models = MODEL_REGISTRY_MAX_MODELS if max_models is None else max_models
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._models = collections.OrderedDict()
+        self.reset_stats()
+
+    def get(self, path, load_func):
+        """Returns model of path loaded by load_func(path) or cached one if model files were not changed."""
+        version = ModelRegistry.get_version(path)
+
+        with self._lock:
+            entry = self._get_entry(path, version)
+            if entry is not None:
+                self._stats['hits'] += 1
+                return entry['model']
+
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        # Concurrent requests of the same model wait for single load
+        with load_lock:
+            with self._lock:
+                entry = self._get_entry(path, version)
+                if entry is not None:
+                    self._stats['hits'] += 1
+                    return entry['model']
+
+            start = time.time()
+            model = load_func(path)
+            load_time = time.time() - start
+            size = getsizeof_deep(model) or ModelRegistry.get_size(path)
+
+            with self._lock:
+                self._stats['misses'] += 1
+                self._stats['load_time'] += load_time
+                self._models[path] = {'model': model, 'version': version, 'size': size, 'load_time': load_time}
+                self._models.move_to_end(path)
+                self._evict()
+
+        logging.info("ModelRegistry loaded %s in %.3f sec" % (path, load_time))
+        return model
+
+    def preload(self, paths, load_func):
+        for path in paths:
+            try:
+                self.get(path, load_func)
+            except Exception as e:
+                logging.error("ModelRegistry preload of %s failed: %s" % (path, e))
+
+    def remove(self, path):
+        with self._lock:
+            self._models.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._models = collections.OrderedDict()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'load_time': 0.0}
+
+    def get_stats(self):
+        with self._lock:
+            res = dict(self._stats)
+            res['models'] = len(self._models)
+            res['bytes'] = sum(entry['size'] for entry in self._models.values())
+
+        requests = res['hits'] + res['misses']
+        res['hit_rate'] = res['hits'] / requests if requests else None
+        res['avg_load_time'] = res['load_time'] / res['misses'] if res['misses'] else None
+
+        return res
+
+    def _get_entry(self, path, version):
+        entry = self._models.get(path)
+        if entry is None:
+            return None
+
+        if entry['version'] != version:
+            del self._models[path]
+            return None
+
+        self._models.move_to_end(path)
+        return entry
+
+    def _evict(self):
+        total_bytes = sum(entry['size'] for entry in self._models.values())
+        while len(self._models) > 1 and (total_bytes > self.max_bytes or len(self._models) > self.max_models):
+            path, entry = self._models.popitem(last=False)
+            total_bytes -= entry['size']
+            self._stats['evictions'] += 1
+            logging.info("ModelRegistry evicted %s" % path)
+
+    @staticmethod
+    def get_version(path):
+        if fsclient.is_s3_path(path) or not os.path.isdir(path):
+            return fsclient.get_etag(path)
+
+        # Model folder is extracted again on deploy
+        return os.stat(path).st_mtime_ns
+
+    @staticmethod
+    def get_size(path):
+        if fsclient.is_s3_path(path):
+            return fsclient.get_file_size(path)
+
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+
+        res = 0
+        for folder, _, files in os.walk(path):
+            for file in files:
+                res += os.path.getsize(os.path.join(folder, file))
+
+        return res
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,82 @@
+import collections
+import logging
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+from a2ml.api.utils import fsclient
+
+
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', 4))
+PREFETCH_READ_AHEAD = int(os.environ.get('PREFETCH_READ_AHEAD', 4))
+PREFETCH_MAX_INFLIGHT_BYTES = int(os.environ.get('PREFETCH_MAX_INFLIGHT_BYTES', 512*1024*1024))
+
+
+class PrefetchLoader(object):
+    """Loads files in a thread pool ahead of the consumer, results are returned in files order.
+
+    At most read_ahead files are loading or loaded and not consumed yet, and their total size
+    (file size from list_folder meta_info or fsclient, or get_size of item) is kept under
+    max_inflight_bytes. One file is always loaded even if it is bigger than the budget.
+    """
+    def __init__(self, load_func, workers=None, read_ahead=None, max_inflight_bytes=None, get_size=None):
+        self.load_func = load_func
+        self.get_size = get_size or PrefetchLoader.get_file_size
+        self.workers = PREFETCH_WORKERS if workers is None else workers
+        self.read_ahead = PREFETCH_READ_AHEAD if read_ahead is None else read_ahead
+        self.max_inflight_bytes = PREFETCH_MAX_INFLIGHT_BYTES if max_inflight_bytes is None else max_inflight_bytes
+
+    def iter_results(self, files):
+        """Yields (file, result, error) for each file, error is exception raised by load_func or None."""
+        files = list(files)
+        # Single file is loaded without sizes requests
+        if self.workers < 1 or self.read_ahead < 1 or len(files) < 2:
+            for file in files:
+                yield (file,) + self._load(file)
+
+            return
+
+        pending = collections.deque()
+        inflight_bytes = 0
+        next_idx = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                while next_idx < len(files) and len(pending) < self.read_ahead:
+                    size = self.get_size(files[next_idx])
+                    if pending and inflight_bytes + size > self.max_inflight_bytes:
+                        break
+
+                    pending.append((files[next_idx], size, executor.submit(self._load, files[next_idx])))
+                    inflight_bytes += size
+                    next_idx += 1
+
+                if not pending:
+                    break
+
+                file, size, future = pending.popleft()
+                yield (file,) + future.result()
+                inflight_bytes -= size
+        finally:
+            for (file, size, future) in pending:
+                future.cancel()
+
+            executor.shutdown(wait=True)
+
+    def _load(self, file):
+        try:
+            return (self.load_func(file), None)
+        except Exception as exc:
+            return (None, exc)
+
+    @staticmethod
+    def get_file_size(file):
+        if type(file) != str and file.get('size') is not None:
+            return file['size']
+
+        try:
+            return fsclient.get_file_size(file if type(file) == str else file['path'])
+        except Exception as exc:
+            logging.error("Get file size of %s failed: %s" % (file, exc))
+            return 0
@@ -1,10 +1,12 @@
 import boto3
 import botocore
 import datetime
+import io
 import json
 import logging
 import mimetypes
 import os
+import threading
 import time
 import uuid
 
@@ -13,6 +15,30 @@ from dateutil.tz import tzutc
 from urllib.parse import urlparse
 
 AWS_S3_HOST = "s3.amazonaws.com"
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 10))
+S3_READ_PART_SIZE = int(os.environ.get('S3_READ_PART_SIZE', 8*1024*1024))
+S3_READ_CONCURRENCY = int(os.environ.get('S3_READ_CONCURRENCY', 8))
+S3_TRANSFER_USE_THREADS = os.environ.get('S3_TRANSFER_USE_THREADS', 'true').lower() == 'true'
+S3_TRANSFER_MAX_CONCURRENCY = int(os.environ.get('S3_TRANSFER_MAX_CONCURRENCY', 10))
+S3_TRANSFER_PART_SIZE = int(os.environ.get('S3_TRANSFER_PART_SIZE', 8*1024*1024))
+S3_TRANSFER_THRESHOLD = int(os.environ.get('S3_TRANSFER_THRESHOLD', 8*1024*1024))
+S3_TRANSFER_FILES_CONCURRENCY = int(os.environ.get('S3_TRANSFER_FILES_CONCURRENCY', 8))
+S3_DELETE_BATCH_SIZE = 1000 # delete_objects can't delete more that 1000 keys at once
+S3_MAX_COPY_OBJECT_SIZE = 5*1024*1024*1024 # bigger objects are copied by multipart copy
+
+def get_transfer_config():
+    """Settings of boto3 managed transfers: uploads, downloads and copies of single objects."""
+    return boto3.s3.transfer.TransferConfig(
+        multipart_threshold=S3_TRANSFER_THRESHOLD,
+        multipart_chunksize=S3_TRANSFER_PART_SIZE,
+        max_concurrency=S3_TRANSFER_MAX_CONCURRENCY,
+        use_threads=S3_TRANSFER_USE_THREADS,
+    )
+
+def log_transfer(operation, path, size, start):
+    duration = time.time() - start
+    logging.info("S3 %s %s: %s bytes in %.3f sec, %.2f MB/sec" % (
+        operation, path, size, duration, size / 1024.0 / 1024.0 / duration if duration > 0 else 0))
 
 def retry_handler(decorated):
     def wrapper(self, *args, **kwargs):
@@ -20,6 +46,95 @@ def retry_handler(decorated):
 
     return wrapper
 
+class BotoClientRegistry:
+    """Process-wide cache of boto3 clients.
+
+    boto3 clients are thread safe, but building one is expensive and every client owns its own
+    connection pool. Clients are keyed by (service, region, endpoint_url, role ARN, addressing style),
+    so all S3FSClient/BotoClient instances in a process share the same connection pools.
+    The cache is dropped in a forked child (Celery prefork), since sockets can't be shared between processes.
+    """
+    def __init__(self, max_pool_connections=None):
+        self.max_pool_connections = max_pool_connections or S3_MAX_POOL_CONNECTIONS
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+        self._stats = {'clients_created': 0, 'clients_reused': 0}
+        self._connections_base = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def get_client(self, service_name, region=None, endpoint_url=None, aws_role_arn=None, addressing_style=None):
+        self._check_fork()
+
+        key = (service_name, region, endpoint_url, aws_role_arn, addressing_style)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._stats['clients_reused'] += 1
+                return client
+
+            config_params = {
+                'signature_version': 's3v4',
+                'max_pool_connections': self.max_pool_connections,
+            }
+            if addressing_style:
+                config_params['s3'] = {'addressing_style': addressing_style}
+
+            client = boto3.session.Session().client(
+                service_name,
+                endpoint_url=endpoint_url,
+                config=boto3.session.Config(**config_params),
+                region_name=region,
+            )
+            self._clients[key] = client
+            self._stats['clients_created'] += 1
+
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+    def reset_stats(self):
+        self._check_fork()
+
+        with self._lock:
+            self._stats = {'clients_created': 0, 'clients_reused': 0}
+            self._connections_base = self._count_connections()
+
+    def get_stats(self):
+        self._check_fork()
+
+        with self._lock:
+            res = dict(self._stats)
+            res['clients_cached'] = len(self._clients)
+            res['connections_created'] = self._count_connections() - self._connections_base
+
+        return res
+
+    def _count_connections(self):
+        # urllib3 pools count every new connection they open
+        res = 0
+        for client in self._clients.values():
+            try:
+                manager = client._endpoint.http_session._manager
+                for pool_key in manager.pools.keys():
+                    pool = manager.pools.get(pool_key)
+                    if pool is not None:
+                        res += pool.num_connections
+            except Exception:
+                pass
+
+        return res
+
+boto_client_registry = BotoClientRegistry()
+
 class BotoClient:
     def __init__(self, region=None, aws_role_arn=None, endpoint_url=None):
         self.endpoint_url = endpoint_url or os.environ.get('S3_ENDPOINT_URL')
@@ -28,11 +143,11 @@ class BotoClient:
         self.client = self._build_client('s3')
 
     def _build_client(self, service_name):
-        return boto3.client(
+        return boto_client_registry.get_client(
             service_name,
+            region=self.region,
             endpoint_url=self.endpoint_url,
-            config=boto3.session.Config(signature_version='s3v4'),
-            region_name=self.region,
+            aws_role_arn=self.aws_role_arn,
         )
 
     @retry_handler
@@ -89,10 +204,44 @@ class BotoClient:
     def copy_object(self, *args, **kwargs):
         return self.client.copy_object(*args, **kwargs)
 
+    @retry_handler
+    def delete_objects(self, *args, **kwargs):
+        return self.client.delete_objects(*args, **kwargs)
+
     @retry_handler
     def head_object(self, *args, **kwargs):
         return self.client.head_object(*args, **kwargs)
 
+    @retry_handler
+    def get_object_range(self, Bucket, Key, start, end):
+        # Body is read inside retry, so broken connections are retried too
+        return self.client.get_object(Bucket=Bucket, Key=Key, Range='bytes=%s-%s' % (start, end))['Body'].read()
+
+    def get_object_if_changed(self, Bucket, Key, etag=None):
+        """Returns (body, etag) of object, body is None if object ETag is still etag.
+
+        Missed object raises FileNotFoundError without retries.
+        """
+        def get():
+            kwargs = {'Bucket': Bucket, 'Key': Key}
+            if etag:
+                kwargs['IfNoneMatch'] = etag
+
+            try:
+                res = self.client.get_object(**kwargs)
+            except botocore.exceptions.ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code in ['304', 'NotModified']:
+                    return None, etag
+                if code in ['404', 'NoSuchKey']:
+                    raise FileNotFoundError("s3://%s/%s does not exist" % (Bucket, Key))
+
+                raise
+
+            return res['Body'].read(), res.get('ETag')
+
+        return retry_helper(get, ['InvalidAccessKeyId', 'Please try again'])
+
     @retry_handler
     def list_objects(self, *args, **kwargs):
         return self.client.list_objects(*args, **kwargs)
@@ -105,6 +254,14 @@ class BotoClient:
     def upload_file(self, *args, **kwargs):
         return self.client.upload_file(*args, **kwargs)
 
+    def upload_fileobj(self, Fileobj, *args, **kwargs):
+        # Stream position is restored before every try
+        def upload():
+            Fileobj.seek(0)
+            return self.client.upload_fileobj(Fileobj, *args, **kwargs)
+
+        return retry_helper(upload, ['InvalidAccessKeyId', 'NoSuchKey', 'Please try again'])
+
     @retry_handler
     def copy(self, *args, **kwargs):
         return self.client.copy(*args, **kwargs)
@@ -117,14 +274,11 @@ class BotoClient:
     def generate_presigned_url_ex(self, bucket, key, method="GET", expires_in=None, max_content_length=None):
         response = self.client.get_bucket_location(Bucket=bucket)
 
-        s3_client = boto3.client(
+        s3_client = boto_client_registry.get_client(
             's3',
+            region=response.get('LocationConstraint'),
             endpoint_url=self.endpoint_url,
-            config=boto3.session.Config(
-                signature_version='s3v4',
-                region_name=response.get('LocationConstraint'),
-                s3={'addressing_style': 'virtual'},
-            )
+            addressing_style='virtual',
         )
 
         if method == 'POST':
@@ -212,6 +366,53 @@ class BotoClient:
     def get_waiter_names(self):
         return self.client.waiter_names
 
+class S3RangeFile(io.RawIOBase):
+    """Read-only seekable file of S3 object, every read is a ranged GET.
+
+    Readers with random access (parquet footer and column chunks) fetch only the bytes they need.
+    """
+    def __init__(self, client, bucket, key, size):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.pos = 0
+        self.stats = {'requests': 0, 'bytes': 0}
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        elif whence == io.SEEK_END:
+            self.pos = self.size + offset
+        else:
+            raise ValueError("Invalid whence: %s" % whence)
+
+        return self.pos
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self.size - self.pos)
+        if count <= 0:
+            return 0
+
+        data = self.client.get_object_range(self.bucket, self.key, self.pos, self.pos + count - 1)
+        buffer[:len(data)] = data
+        self.pos += len(data)
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(data)
+
+        return len(data)
+
 class S3FSClient:
     @staticmethod
     def split_path_to_bucket_and_key(path):
@@ -435,13 +636,8 @@ class S3FSClient:
             if wild:
                 files = self.list_folder(path, wild)
                 path = self._get_relative_path(path)
-                for file in files:
-                    path_to_remove = os.path.join(os.path.dirname(path), file)
-                    # print(path_to_remove)
-                    self.client.delete_object(
-                        Bucket=self.s3BucketName, Key=path_to_remove)
-
-                #raise Exception("S3FSClient::remove_file wild is not implemented:%s"%path)
+                self.delete_objects(self.s3BucketName,
+                    [os.path.join(os.path.dirname(path), file) for file in files])
             else:
                 path = self._get_relative_path(path)
                 self.client.delete_object(Bucket=self.s3BucketName, Key=path)
@@ -449,43 +645,93 @@ class S3FSClient:
             if e.response['Error']['Code'] != 'NoSuchBucket':
                 raise
 
+    def remove_files(self, paths):
+        keys_by_bucket = {}
+        for path in paths:
+            bucket, key = S3FSClient.split_path_to_bucket_and_key(path)
+            keys_by_bucket.setdefault(bucket, []).append(key)
+
+        self.client = BotoClient()
+        for bucket, keys in keys_by_bucket.items():
+            self.delete_objects(bucket, keys)
+
     def _s3_removeFolder(self, path, remove_self=True):
         path = path + "/" if not path.endswith("/") else path
 
-        # print("Remove:%s"%path)
-        ContinuationToken = None
-        while True:
-            if ContinuationToken:
-                listFiles = self.client.list_objects_v2(
-                    Bucket=self.s3BucketName, Prefix=path, Delimiter='/', ContinuationToken=ContinuationToken)
-            else:
-                listFiles = self.client.list_objects_v2(
-                    Bucket=self.s3BucketName, Prefix=path, Delimiter='/')
+        keys = [item['key'] for item in self._list_objects_flat(self.s3BucketName, path)]
+        if remove_self:
+            # Folder marker object and object with the folder name
+            keys.extend([path, path[:-1]])
 
-            # print(listFiles)
-            ContinuationToken = listFiles.get('NextContinuationToken', None)
-            files = None
-            folders = None
-            if listFiles is not None:
-                files = listFiles.get('Contents')
-                folders = listFiles.get('CommonPrefixes')
+        self.delete_objects(self.s3BucketName, keys)
 
-            if files is not None:
-                for file in files:
-                    #print("Delete path:%s"%file.get('Key'))
-                    self.client.delete_object(
-                        Bucket=self.s3BucketName, Key=file.get('Key'))
+    def list_objects_flat(self, path):
+        """Returns all objects under the folder with one recursive listing.
 
-            if folders is not None:
-                for folder in folders:
-                    self._s3_removeFolder(folder.get(
-                        'Prefix'), remove_self=False)
+        Items have key, path relative to the folder, size and last_modified. Folders are not listed,
+        their zero-byte marker objects (keys ending with /) are skipped as in list_folder.
+        """
+        prefix = self._get_relative_path(path)
+        prefix = prefix + "/" if prefix and not prefix.endswith("/") else prefix
 
-            if not ContinuationToken:
+        return [item for item in self._list_objects_flat(self.s3BucketName, prefix) if not item['key'].endswith('/')]
+
+    def _list_objects_flat(self, bucket, prefix):
+        res = []
+        args = {'Bucket': bucket, 'Prefix': prefix}
+        while True:
+            list_res = self.client.list_objects_v2(**args)
+            for item in list_res.get('Contents', []):
+                if item['Key'] != prefix:
+                    res.append({'key': item['Key'], 'path': item['Key'][len(prefix):], 'size': item.get('Size', 0),
+                        'last_modified': self._get_seconds_from_epoch(item.get('LastModified'))})
+
+            if not list_res.get('NextContinuationToken'):
                 break
 
-        if remove_self:
-            self.client.delete_object(Bucket=self.s3BucketName, Key=path[:-1])
+            args['ContinuationToken'] = list_res['NextContinuationToken']
+
+        return res
+
+    def delete_objects(self, bucket, keys):
+        """Deletes keys with delete_objects requests of up to S3_DELETE_BATCH_SIZE keys."""
+        start = time.time()
+        for idx in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            res = self.client.delete_objects(Bucket=bucket, Delete={
+                'Objects': [{'Key': key} for key in keys[idx:idx + S3_DELETE_BATCH_SIZE]],
+                'Quiet': True
+            })
+
+            errors = [error for error in res.get('Errors', []) if error.get('Code') != 'NoSuchKey']
+            if errors:
+                raise Exception("S3 delete_objects failed for %s keys, first error: %s" % (len(errors), errors[0]))
+
+        if keys:
+            logging.info("S3 deleted %s objects in %.3f sec" % (len(keys), time.time() - start))
+
+    def copy_objects(self, items):
+        """Server-side copies (src_bucket, src_key, dst_bucket, dst_key, size) with S3_TRANSFER_FILES_CONCURRENCY threads."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        client = self.client = BotoClient()
+        def copy_object(item):
+            src_bucket, src_key, dst_bucket, dst_key, size = item
+            copy_source = {'Bucket': src_bucket, 'Key': src_key}
+            if size > S3_MAX_COPY_OBJECT_SIZE:
+                client.copy(copy_source, dst_bucket, dst_key, Config=get_transfer_config())
+            else:
+                client.copy_object(Bucket=dst_bucket, Key=dst_key, CopySource=copy_source)
+
+        start = time.time()
+        if len(items) > 1 and S3_TRANSFER_FILES_CONCURRENCY > 1:
+            with ThreadPoolExecutor(max_workers=min(S3_TRANSFER_FILES_CONCURRENCY, len(items))) as executor:
+                list(executor.map(copy_object, items))
+        else:
+            for item in items:
+                copy_object(item)
+
+        logging.info("S3 copied %s objects, %s bytes in %.3f sec" % (
+            len(items), sum(item[4] for item in items), time.time() - start))
 
     def _s3_moveFile(self, oldName, newName):
         self.client.copy_object(Bucket=self.s3BucketName, CopySource={
@@ -540,6 +786,52 @@ class S3FSClient:
 
         return res
 
+    def read_bytes(self, path, part_size=None, max_concurrency=None):
+        """Downloads object to memory, big objects are fetched with concurrent ranged GETs."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        part_size = part_size or S3_READ_PART_SIZE
+        max_concurrency = max_concurrency or S3_READ_CONCURRENCY
+
+        key = self._get_relative_path(path)
+        bucket = self.s3BucketName
+        size = self.client.head_object(Bucket=bucket, Key=key)['ContentLength']
+
+        res = bytearray(size)
+        def read_part(start):
+            data = self.client.get_object_range(bucket, key, start, min(start + part_size, size) - 1)
+            res[start:start + len(data)] = data
+
+        parts = list(range(0, size, part_size))
+        if len(parts) > 1 and max_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(parts))) as executor:
+                list(executor.map(read_part, parts))
+        else:
+            for start in parts:
+                read_part(start)
+
+        return res
+
+    def open_range_file(self, path):
+        key = self._get_relative_path(path)
+        size = self.client.head_object(Bucket=self.s3BucketName, Key=key)['ContentLength']
+
+        return S3RangeFile(self.client, self.s3BucketName, key, size)
+
+    def write_bytes(self, path, data):
+        start = time.time()
+        key = self._get_relative_path(path)
+        self.client.upload_fileobj(io.BytesIO(data), Bucket=self.s3BucketName, Key=key,
+            Config=get_transfer_config(), ExtraArgs=self._get_upload_args(path))
+        log_transfer("upload", path, len(data), start)
+
+    def get_etag(self, path):
+        path = self._get_relative_path(path)
+        try:
+            return self.client.head_object(Bucket=self.s3BucketName, Key=path).get('ETag')
+        except Exception as e:
+            return None
+
     def is_folder_exists(self, path):
         path = self._get_relative_path(path)
         listFiles = self.client.list_objects(
@@ -554,6 +846,13 @@ class S3FSClient:
         # print(listFiles)
         return listFiles is not None
 
+    def read_text_if_changed(self, path, etag=None):
+        """Single GET of object text, returns (text, etag), text is None if object ETag is still etag."""
+        key = self._get_relative_path(path)
+        body, etag = self.client.get_object_if_changed(self.s3BucketName, key, etag)
+
+        return (body.decode('utf-8') if body is not None else None), etag
+
     def read_text_file(self, path):
         from .local_fsclient import LocalFSClient
 
@@ -567,13 +866,7 @@ class S3FSClient:
     def write_text_file(self, path, data, atomic=False, mode="w"):
         #TODO: support mode="a"
         path = self._get_relative_path(path)
-        mimetype, encoding = mimetypes.guess_type(path)
-        args = {}
-        if mimetype:
-            args['ContentType'] = mimetype
-        if encoding:
-            args['ContentType'] = "application/octet-stream"
-
+        args = self._get_upload_args(path)
         self.client.put_object(Body=data, Bucket=self.s3BucketName, Key=path, **args)
 
     def copy_file_remote(self, path_src, path_dst):
@@ -584,7 +877,7 @@ class S3FSClient:
         }
 
         path = self._get_relative_path(path_dst)
-        self.client.copy(copy_source, self.s3BucketName, path)
+        self.client.copy(copy_source, self.s3BucketName, path, Config=get_transfer_config())
 
     def copy_file(self, path_src, path_dst):
         if path_src.startswith("s3") and path_dst.startswith("s3"):
@@ -595,36 +888,72 @@ class S3FSClient:
         elif path_src.startswith("s3"):
             self.download_file(path_src, path_dst)
 
-    def _s3_upload_file(self, path_local, path_s3):
-        s3_config = boto3.s3.transfer.TransferConfig(use_threads=False)
-
-        mimetype, encoding = mimetypes.guess_type(path_local)
+    @staticmethod
+    def _get_upload_args(path):
+        mimetype, encoding = mimetypes.guess_type(path)
         args = {}
         if mimetype:
             args['ContentType'] = mimetype
         if encoding:
             args['ContentType'] = "application/octet-stream"
 
-        self.client.upload_file(path_local, Bucket=self.s3BucketName, Key=path_s3, Config=s3_config,
+        return args
+
+    def _s3_upload_file(self, path_local, path_s3):
+        start = time.time()
+
+        args = self._get_upload_args(path_local)
+        self.client.upload_file(path_local, Bucket=self.s3BucketName, Key=path_s3, Config=get_transfer_config(),
             ExtraArgs=args
         )
+        log_transfer("upload", path_s3, os.path.getsize(path_local), start)
 
     def copy_files(self, path_src, path_dst):
         files = self.list_folder(path_src, wild=True)
-        for file in files:
-            self.copy_file(os.path.join(os.path.dirname(
-                path_src), file), os.path.join(path_dst, file))
+        self._copy_files_parallel([(os.path.join(os.path.dirname(
+            path_src), file), os.path.join(path_dst, file)) for file in files])
 
     def copy_folder(self, path_src, path_dst):
+        if path_src.startswith("s3") and path_dst.startswith("s3"):
+            src_bucket, _ = S3FSClient.split_path_to_bucket_and_key(path_src)
+            dst_bucket, dst_prefix = S3FSClient.split_path_to_bucket_and_key(path_dst)
+
+            self.copy_objects([(src_bucket, item['key'], dst_bucket, os.path.join(dst_prefix, item['path']), item['size'])
+                for item in self.list_objects_flat(path_src)])
+        else:
+            self._copy_files_parallel(self._get_folder_files(path_src, path_dst))
+
+    def _get_folder_files(self, path_src, path_dst):
         from  a2ml.api.utils import fsclient
 
+        res = []
         files = fsclient.list_folder(path_src)
         for file in files:
             full_src = os.path.join(path_src, file)
             if fsclient.is_file_exists(full_src):
-                self.copy_file(full_src, os.path.join(path_dst, file))
+                res.append((full_src, os.path.join(path_dst, file)))
             else:
-                self.copy_folder(full_src, os.path.join(path_dst, file))
+                res.extend(self._get_folder_files(full_src, os.path.join(path_dst, file)))
+
+        return res
+
+    @staticmethod
+    def _copy_files_parallel(files):
+        """Copies (path_src, path_dst) pairs with S3_TRANSFER_FILES_CONCURRENCY threads."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Client keeps bucket of the last path, so every copy uses own one
+        copy_file = lambda item: S3FSClient().copy_file(item[0], item[1])
+
+        start = time.time()
+        if len(files) > 1 and S3_TRANSFER_FILES_CONCURRENCY > 1:
+            with ThreadPoolExecutor(max_workers=min(S3_TRANSFER_FILES_CONCURRENCY, len(files))) as executor:
+                list(executor.map(copy_file, files))
+        else:
+            for item in files:
+                copy_file(item)
+
+        logging.info("S3 copied %s files in %.3f sec" % (len(files), time.time() - start))
 
     def download_file(self, path, local_path):
         from .local_fsclient import LocalFSClient
@@ -647,20 +976,19 @@ class S3FSClient:
             # with fsclient.open(path, "rb", encoding=None) as fd:
             #     self.client.upload_fileobj(fd, Bucket=self.s3BucketName, Key=s3_path)
         else:
+            start = time.time()
+            s3_path = path
             path = self._get_relative_path(path)
             LocalFSClient().create_parent_folder(local_path)
             self.client.download_file(
-                Bucket=self.s3BucketName, Key=path, Filename=local_path)
+                Bucket=self.s3BucketName, Key=path, Filename=local_path, Config=get_transfer_config())
+            log_transfer("download", s3_path, os.path.getsize(local_path), start)
 
     def download_folder(self, path, local_path):
-        files = self.list_folder(path)
-        for file in files:
-            if file.endswith('/'):
-                self.download_folder(os.path.join(
-                    path, file), os.path.join(local_path, file))
-            else:
-                self.copy_file(os.path.join(path, file),
-                               os.path.join(local_path, file))
+        bucket, _ = S3FSClient.split_path_to_bucket_and_key(path)
+
+        self._copy_files_parallel([("s3://%s/%s" % (bucket, item['key']), os.path.join(local_path, item['path']))
+            for item in self.list_objects_flat(path)])
 
     def move_file(self, path_src, path_dst):
         self.copy_file(path_src, path_dst)
@@ -5,6 +5,18 @@ class Config:
         self.debug = os.environ.get('DEBUG', 'false').lower() == 'true'
         self.notificator_redis_host = os.environ.get('NOTIFICATOR_REDIS_HOST')
         self.notificator_redis_port = int(os.environ.get('NOTIFICATOR_REDIS_PORT', 6379))
+        self.notificator_max_connections = int(os.environ.get('NOTIFICATOR_MAX_CONNECTIONS', 100))
+        self.notificator_stream_maxlen = int(os.environ.get('NOTIFICATOR_STREAM_MAXLEN', 1000))
+        self.notificator_log_flush_interval = float(os.environ.get('NOTIFICATOR_LOG_FLUSH_INTERVAL', 0.2))
+        self.notificator_log_batch_size = int(os.environ.get('NOTIFICATOR_LOG_BATCH_SIZE', 100))
+        self.notificator_read_count = int(os.environ.get('NOTIFICATOR_READ_COUNT', 100))
+        self.notificator_read_block_ms = int(os.environ.get('NOTIFICATOR_READ_BLOCK_MS', 100))
+        self.notificator_client_queue_size = int(os.environ.get('NOTIFICATOR_CLIENT_QUEUE_SIZE', 1000))
+
+        self.predict_batching = os.environ.get('PREDICT_BATCHING', 'false').lower() == 'true'
+        self.predict_batch_window_ms = int(os.environ.get('PREDICT_BATCH_WINDOW_MS', 20))
+        self.predict_batch_max_records = int(os.environ.get('PREDICT_BATCH_MAX_RECORDS', 1000))
+        self.predict_batch_max_requests = int(os.environ.get('PREDICT_BATCH_MAX_REQUESTS', 64))
 
         self.aws_access_key_id = os.environ.get('AWS_ACCESS_KEY_ID')
         self.aws_secret_access_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
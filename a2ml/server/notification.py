@@ -1,28 +1,79 @@
+import asyncio
 import json
+import logging
+import threading
+
 import redis
+import redis.asyncio
 
 from a2ml.server.config import Config
 
 config = Config()
 
+# Connection pools are shared by all senders of worker process and all receivers of server process
+sync_pool = None
+async_pool = None
+
+def get_sync_pool():
+    global sync_pool
+
+    if sync_pool is None:
+        sync_pool = redis.BlockingConnectionPool(
+            host=config.notificator_redis_host,
+            port=config.notificator_redis_port,
+            max_connections=config.notificator_max_connections
+        )
+
+    return sync_pool
+
+def get_async_pool():
+    global async_pool
+
+    if async_pool is None:
+        async_pool = redis.asyncio.BlockingConnectionPool(
+            host=config.notificator_redis_host,
+            port=config.notificator_redis_port,
+            max_connections=config.notificator_max_connections
+        )
+
+    return async_pool
+
 class SyncSender:
+    """Publishes messages to request streams, trimmed to NOTIFICATOR_STREAM_MAXLEN messages.
+
+    Log messages are buffered and sent in one pipeline when NOTIFICATOR_LOG_BATCH_SIZE messages
+    are collected or NOTIFICATOR_LOG_FLUSH_INTERVAL seconds are passed. Other messages are sent
+    right away together with buffered logs, so order of messages is kept.
+    """
     def __init__(self):
         self.connection = None
+        self._lock = threading.RLock()
+        self._logs = []
+        self._flush_timer = None
 
     def publish(self, request_id, message):
         if config.notificator_redis_host:
-            if not self.connection:
-                self._open()
-
-            if isinstance(message, dict):
-                message = json.dumps(message)
-
-            self.connection.xadd(request_id, {'json': message})
+            with self._lock:
+                self._send(self._take_logs() + [(request_id, message)])
         else:
             # Not set NOTIFICATOR_REDIS_HOST env var if worker is run as Hub worker witouh A2ML server
             # in this case worker will not try to notify about progress
             pass
 
+    def publish_buffered(self, request_id, message):
+        if not config.notificator_redis_host:
+            return
+
+        with self._lock:
+            self._logs.append((request_id, message))
+
+            if len(self._logs) >= config.notificator_log_batch_size or config.notificator_log_flush_interval <= 0:
+                self._send(self._take_logs())
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(config.notificator_log_flush_interval, self._flush_by_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
     def publish_result(self, request_id, status, result):
         self.publish(
             request_id,
@@ -30,20 +81,60 @@ class SyncSender:
         )
 
     def publish_log(self, request_id, level, msg, *args, **kwargs):
-        self.publish(
+        self.publish_buffered(
             request_id,
             {'type': 'log', 'level': level, 'msg': msg, 'args': args, 'kwargs': kwargs}
         )
 
+    def flush(self):
+        with self._lock:
+            self._send(self._take_logs())
+
+    def _flush_by_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error("Sending of log notifications failed: %s" % e)
+
+    def _take_logs(self):
+        logs, self._logs = self._logs, []
+
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        return logs
+
+    def _send(self, messages):
+        if not messages:
+            return
+
+        if not self.connection:
+            self._open()
+
+        pipeline = self.connection.pipeline(transaction=False)
+        for (request_id, message) in messages:
+            if isinstance(message, dict):
+                message = json.dumps(message)
+
+            pipeline.xadd(
+                request_id,
+                {'json': message},
+                maxlen=config.notificator_stream_maxlen or None,
+                approximate=True
+            )
+
+        pipeline.execute()
+
     def _open(self):
-        self.connection = redis.Redis(
-            host=config.notificator_redis_host,
-            port=config.notificator_redis_port
-        )
+        self.connection = redis.Redis(connection_pool=get_sync_pool())
 
     def close(self):
         if self.connection:
+            self.flush()
+            # Shared pool is not disconnected
             self.connection.close()
+            self.connection = None
 
     # support with
     def __enter__(self):
@@ -60,25 +151,161 @@ class AsyncReceiver:
         self.last_msg_id = last_msg_id
 
     async def _open(self):
-        self.connection = await redis.create_redis(
-            'redis://' + config.notificator_redis_host + ':' + str(config.notificator_redis_port)
-        )
+        self.connection = redis.asyncio.Redis(connection_pool=get_async_pool())
 
     async def get_message(self, timeout=5):
         if not self.connection:
             await self._open()
 
-        res = await self.connection.xread([self.request_id], timeout=timeout, count=1, latest_ids=[self.last_msg_id])
-        if len(res) > 0:
-            msg = res[0]
-            self.last_msg_id = msg[1]
-            data = json.loads(msg[2][b'json'])
-            data['_msg_id'] = self.last_msg_id.decode('utf-8')
+        res = await self.connection.xread(
+            {self.request_id: self.last_msg_id}, count=1, block=int(timeout * 1000))
+        if res:
+            msg_id, fields = res[0][1][0]
+            self.last_msg_id = msg_id.decode('utf-8')
+            data = json.loads(fields[b'json'])
+            data['_msg_id'] = self.last_msg_id
             return json.dumps(data)
         else:
             return None
 
     async def close(self):
         if self.connection:
-            self.connection.close()
-            await self.connection.wait_closed()
+            await self.connection.aclose()
+            self.connection = None
+
+
+def parse_msg_id(msg_id):
+    if isinstance(msg_id, bytes):
+        msg_id = msg_id.decode('utf-8')
+
+    parts = str(msg_id).split('-')
+    return (int(parts[0]), int(parts[1]) if len(parts) > 1 else 0)
+
+def normalize_msg_id(msg_id):
+    # Stream is read from explicit ids of subscriptions only, so special ids like `$` or
+    # malformed ones read stream from the start instead of failing XREAD of all streams
+    try:
+        return '%d-%d' % parse_msg_id(msg_id)
+    except ValueError:
+        logging.warning("Invalid last message id %r, stream is read from the start" % msg_id)
+        return '0'
+
+class Subscription:
+    def __init__(self, request_id, last_msg_id):
+        self.request_id = request_id
+        self.last_msg_id = normalize_msg_id(last_msg_id)
+        self.last_msg_key = parse_msg_id(self.last_msg_id)
+        self.queue = asyncio.Queue(maxsize=config.notificator_client_queue_size)
+
+    def is_full(self):
+        return self.queue.full()
+
+    async def get_message(self, timeout=5):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class AsyncStreamReader:
+    """Reads request streams of all WebSocket clients of the server process by one background task.
+
+    Each XREAD gets up to NOTIFICATOR_READ_COUNT messages of all subscribed streams and messages
+    are dispatched to queues of subscriptions, clients of the same request id share one stream read.
+    Stream is read from the oldest message id of its subscriptions, so reconnected clients get
+    missed messages and others skip already received ones. When queue of subscription is full,
+    it is not used to read the stream until client takes messages from it, stream of only full
+    subscriptions is not read at all.
+    """
+    def __init__(self):
+        self.connection = None
+        self._streams = {}
+        self._task = None
+        self.reset_stats()
+
+    def subscribe(self, request_id, last_msg_id='0'):
+        subscription = Subscription(request_id, last_msg_id)
+        self._streams.setdefault(request_id, []).append(subscription)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self._streams.get(subscription.request_id, [])
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+
+        if not subscriptions:
+            self._streams.pop(subscription.request_id, None)
+
+    def reset_stats(self):
+        self.stats = {'reads': 0, 'messages': 0, 'dispatched': 0, 'errors': 0}
+
+    def get_stats(self):
+        return dict(self.stats, streams=len(self._streams),
+            subscriptions=sum(len(subscriptions) for subscriptions in self._streams.values()))
+
+    def _get_read_positions(self):
+        res = {}
+        for (request_id, subscriptions) in self._streams.items():
+            active = [subscription for subscription in subscriptions if not subscription.is_full()]
+            if active:
+                res[request_id] = min(active, key=lambda subscription: subscription.last_msg_key).last_msg_id
+
+        return res
+
+    async def _run(self):
+        # Connection is kept to the next run, it takes pool connection only for the command
+        if not self.connection:
+            self.connection = redis.asyncio.Redis(connection_pool=get_async_pool())
+
+        while self._streams:
+            streams = self._get_read_positions()
+            if not streams:
+                # All clients are slow, wait until they take messages
+                await asyncio.sleep(config.notificator_read_block_ms / 1000.0)
+                continue
+
+            try:
+                res = await self.connection.xread(
+                    streams, count=config.notificator_read_count, block=config.notificator_read_block_ms)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logging.error("Reading of notification streams failed: %s" % e)
+                await asyncio.sleep(1)
+                continue
+
+            self.stats['reads'] += 1
+            for (stream, messages) in res or []:
+                self._dispatch(stream.decode('utf-8'), messages)
+
+    def _dispatch(self, request_id, messages):
+        self.stats['messages'] += len(messages)
+
+        for (msg_id, fields) in messages:
+            msg_id = msg_id.decode('utf-8')
+            msg_key = parse_msg_id(msg_id)
+            reply = None
+
+            for subscription in self._streams.get(request_id, []):
+                if msg_key <= subscription.last_msg_key or subscription.is_full():
+                    continue
+
+                if reply is None:
+                    try:
+                        data = json.loads(fields[b'json'])
+                        data['_msg_id'] = msg_id
+                        reply = json.dumps(data)
+                    except Exception as e:
+                        # Skip bad message, the shared task keeps reading for all clients
+                        self.stats['errors'] += 1
+                        logging.error("Bad message %s in notification stream %s: %s" % (msg_id, request_id, e))
+                        reply = False
+
+                if reply is not False:
+                    subscription.queue.put_nowait(reply)
+                    self.stats['dispatched'] += 1
+
+                subscription.last_msg_id = msg_id
+                subscription.last_msg_key = msg_key
@@ -0,0 +1,212 @@
+import asyncio
+import collections
+import json
+import logging
+import time
+import uuid
+
+
+# Predict arguments which can be different in batched requests
+RECORDS_ARGS = ['data']
+# Requests with these arguments are sent as is
+NOT_BATCHED_ARGS = ['filename', 'output', 'score', 'score_true_data', 'predict_labels']
+STATS_SAMPLES = 1000
+
+
+def get_percentiles(values):
+    if not values:
+        return {'p50': None, 'p99': None}
+
+    values = sorted(values)
+    def percentile(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    return {'p50': percentile(0.5), 'p99': percentile(0.99)}
+
+
+class PredictBatcher(object):
+    """Merges concurrent predict requests with records of the same model into one predict task.
+
+    Requests are batched by task, model id, context and all predict arguments except data,
+    batch is sent when window_ms is passed since its first request, or it has max_requests
+    requests, or adding of next request would exceed max_records. The batch task gets params
+    of the first request with concatenated data and '_batch' with request ids and record counts,
+    so results can be split and published to each request id.
+    Must be used from the server event loop.
+    """
+    def __init__(self, send_func, window_ms=20, max_records=1000, max_requests=64):
+        self.send_func = send_func
+        self.window_ms = window_ms
+        self.max_records = max_records
+        self.max_requests = max_requests
+        self._batches = {}
+        self.reset_stats()
+
+    def add(self, task, params):
+        """Adds request to the batch, returns False if request can't be batched and should be sent as is."""
+        key = PredictBatcher.get_batch_key(task, params)
+        if key is None:
+            return False
+
+        records = len(params['kwargs']['data'])
+        if records >= self.max_records:
+            return False
+
+        batch = self._batches.get(key)
+        if batch is not None and batch['records'] + records > self.max_records:
+            self.flush(key)
+            batch = None
+
+        if batch is None:
+            batch = {'task': task, 'requests': [], 'records': 0, 'created_at': time.time()}
+            batch['timer'] = asyncio.get_event_loop().call_later(self.window_ms / 1000.0, self.flush, key)
+            self._batches[key] = batch
+
+        batch['requests'].append({
+            'params': params,
+            'request_id': params['_request_id'],
+            'count': records,
+            'received_at': time.time()
+        })
+        batch['records'] += records
+
+        if len(batch['requests']) >= self.max_requests:
+            self.flush(key)
+
+        return True
+
+    def flush(self, key):
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+
+        batch['timer'].cancel()
+        dispatched_at = time.time()
+        params = PredictBatcher.merge_params(batch)
+        params['_batch']['dispatched_at'] = dispatched_at
+
+        self._stats['batches'] += 1
+        self._stats['requests'] += len(batch['requests'])
+        self._stats['records'] += batch['records']
+        self._batch_sizes.append(len(batch['requests']))
+        for request in batch['requests']:
+            self._wait_times.append(dispatched_at - request['received_at'])
+
+        logging.info("Predict batch %s: %s requests, %s records, wait %.3f sec" % (
+            params['_request_id'], len(batch['requests']), batch['records'], dispatched_at - batch['created_at']))
+
+        try:
+            self.send_func(params)
+        except Exception as e:
+            logging.error("Sending of predict batch %s failed: %s" % (params['_request_id'], e))
+
+    def flush_all(self):
+        for key in list(self._batches.keys()):
+            self.flush(key)
+
+    def reset_stats(self):
+        self._stats = {'batches': 0, 'requests': 0, 'records': 0}
+        self._batch_sizes = collections.deque(maxlen=STATS_SAMPLES)
+        self._wait_times = collections.deque(maxlen=STATS_SAMPLES)
+
+    def get_stats(self):
+        res = dict(self._stats)
+        res['pending_batches'] = len(self._batches)
+        res['avg_batch_size'] = sum(self._batch_sizes) / len(self._batch_sizes) if self._batch_sizes else None
+        res['max_batch_size'] = max(self._batch_sizes) if self._batch_sizes else None
+        res['wait_time'] = get_percentiles(list(self._wait_times))
+
+        return res
+
+    @staticmethod
+    def get_batch_key(task, params):
+        args = list(params.get('args') or [])
+        kwargs = dict(params.get('kwargs') or {})
+        if len(args) > 1:
+            return None
+
+        model_id = args[0] if args else kwargs.pop('model_id', None)
+        data = kwargs.pop('data', None)
+        if not model_id or not isinstance(data, list) or not data:
+            return None
+
+        if any(kwargs.get(name) for name in NOT_BATCHED_ARGS):
+            return None
+
+        # Records should be of the same type: dicts or lists of columns values
+        if kwargs.get('columns'):
+            if not all(isinstance(record, list) for record in data):
+                return None
+        elif not all(isinstance(record, dict) for record in data):
+            return None
+
+        other_params = {name: value for (name, value) in params.items()
+            if name not in ['args', 'kwargs', '_request_id']}
+        try:
+            return (task.__name__, model_id, json.dumps(other_params, sort_keys=True),
+                json.dumps(kwargs, sort_keys=True))
+        except TypeError:
+            return None
+
+    @staticmethod
+    def merge_params(batch):
+        params = dict(batch['requests'][0]['params'])
+        params['kwargs'] = dict(params['kwargs'])
+        params['kwargs']['data'] = []
+        for request in batch['requests']:
+            params['kwargs']['data'].extend(request['params']['kwargs']['data'])
+
+        params['_request_id'] = str(uuid.uuid4())
+        params['_batch'] = {
+            'task': batch['task'].__name__,
+            'created_at': batch['created_at'],
+            'requests': [
+                {'request_id': request['request_id'], 'count': request['count'], 'received_at': request['received_at']}
+                for request in batch['requests']
+            ]
+        }
+
+        return params
+
+    @staticmethod
+    def split_response(response, counts):
+        """Splits predict response of the batch to responses of the batched requests."""
+        predicted = None
+        if isinstance(response, dict) and response.get('result') and isinstance(response.get('data'), dict):
+            predicted = response['data'].get('predicted')
+
+        if isinstance(predicted, dict) and isinstance(predicted.get('data'), list):
+            records = predicted['data']
+        elif isinstance(predicted, list):
+            records = predicted
+        else:
+            # Error or not records result
+            return [response] * len(counts)
+
+        if len(records) != sum(counts):
+            raise Exception("Predict batch returned %s records instead of %s" % (len(records), sum(counts)))
+
+        res = []
+        start = 0
+        for count in counts:
+            part = records[start:start + count]
+            start += count
+
+            if isinstance(predicted, dict):
+                part = dict(predicted, data=part)
+
+            res.append(dict(response, data=dict(response['data'], predicted=part)))
+
+        return res
+
+    @staticmethod
+    def get_batch_stats(batch, finished_at=None):
+        finished_at = finished_at or time.time()
+        latencies = [finished_at - request['received_at'] for request in batch['requests']]
+
+        return {
+            'size': len(batch['requests']),
+            'records': sum(request['count'] for request in batch['requests']),
+            'wait_time': batch['dispatched_at'] - batch['created_at'],
+            'latency': get_percentiles(latencies),
+        }
@@ -8,7 +8,8 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 
 from a2ml.server.config import Config
-from a2ml.server.notification import AsyncReceiver
+from a2ml.server.notification import AsyncStreamReader
+from a2ml.server.predict_batcher import PredictBatcher
 from a2ml.tasks_queue.tasks_api import (
     actuals_model_task,
     actuals_task,
@@ -25,6 +26,7 @@ from a2ml.tasks_queue.tasks_api import (
     list_projects_task,
     new_dataset_task,
     new_project_task,
+    predict_batch_task,
     predict_model_task,
     predict_task,
     review_task,
@@ -37,6 +39,19 @@ from a2ml.tasks_queue.tasks_api import (
 
 app = FastAPI()
 config = Config()
+stream_reader = AsyncStreamReader()
+
+BATCHED_TASKS = [predict_task, predict_model_task]
+
+if config.predict_batching:
+    predict_batcher = PredictBatcher(
+        predict_batch_task.delay,
+        window_ms=config.predict_batch_window_ms,
+        max_records=config.predict_batch_max_records,
+        max_requests=config.predict_batch_max_requests
+    )
+else:
+    predict_batcher = None
 
 API_SCHEMA = {
     '/api/v1/datasets': {
@@ -125,6 +140,18 @@ def upload_credentials():
         'session_token': None
     })
 
+@app.get('/api/v1/predict_batches/stats')
+def predict_batches_stats():
+    stats = predict_batcher.get_stats() if predict_batcher else {}
+    stats['stream_reader'] = stream_reader.get_stats()
+
+    return __render_json_response(stats)
+
+@app.on_event('shutdown')
+def flush_predict_batches():
+    if predict_batcher:
+        predict_batcher.flush_all()
+
 def define_endpoints(schema):
     for path in schema.keys():
         endpoints = schema[path]
@@ -150,7 +177,10 @@ async def __run_task(task, request):
     request_id = __generate_request_id()
     params = await __get_body_and_query_params(request)
     params['_request_id'] = request_id
-    task.delay(params)
+
+    if not (predict_batcher and task in BATCHED_TASKS and predict_batcher.add(task, params)):
+        task.delay(params)
+
     return __render_request_response(request_id)
 
 async def __get_body_and_query_params(request):
@@ -183,25 +213,22 @@ async def websocket_endpoint(websocket: WebSocket, id: str = None, last_msg_id:
             await websocket.accept()
             await websocket.send_json({"type": "start", 'request_id': id}, mode="text")
 
+            subscription = stream_reader.subscribe(id, last_msg_id)
             try:
-                notificator = AsyncReceiver(id, last_msg_id)
                 try:
                     while True:
-                        try:
-                            # Periodically iterrupt waiting of message from subscription
-                            # to check is websocket is still alive or not
-                            reply = await asyncio.wait_for(notificator.get_message(), timeout=5.0)
-                            if reply:
-                                log("Broadcast: ", repr(reply))
-                                await websocket.send_text(reply)
-                            else:
-                                await websocket.send_json({"type": "ping"}, mode="text")
-                        except asyncio.TimeoutError:
+                        # Periodically iterrupt waiting of message from subscription
+                        # to check is websocket is still alive or not
+                        reply = await subscription.get_message(timeout=5.0)
+                        if reply:
+                            log("Broadcast: ", repr(reply))
+                            await websocket.send_text(reply)
+                        else:
                             await websocket.send_json({"type": "ping"}, mode="text")
                 except (websockets.exceptions.ConnectionClosedOK, websockets.exceptions.ConnectionClosedError) as e:
                     log(f"WebSocket {id} disconnected: {str(e)}")
             finally:
-                await notificator.close()
+                stream_reader.unsubscribe(subscription)
     finally:
         log('WebSocket stopped')
         await websocket.close()
@@ -6,3 +6,7 @@ class Config:
         self.broker_url = os.environ.get('BROKER_URL', 'amqp://localhost/vhost')
         self.task_result_queue = os.environ.get('TASK_RESULT_QUEUE', 'task_result')
         self.task_queue = os.environ.get('TASK_QUEUE', 'a2ml')
+        self.hub_publish_confirms = os.environ.get('HUB_PUBLISH_CONFIRMS', 'false').lower() == 'true'
+        self.hub_publish_batch_interval = float(os.environ.get('HUB_PUBLISH_BATCH_INTERVAL', 0.05))
+        # Comma separated local Azure model paths (model.pkl.gz) loaded at worker start
+        self.preload_models = [path for path in os.environ.get('MODEL_REGISTRY_PRELOAD', '').split(',') if path]
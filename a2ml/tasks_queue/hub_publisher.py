@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+
+from urllib.parse import urlparse
+
+
+PERSISTENT_DELIVERY_MODE = 2
+
+
+class HubPublisher(object):
+    """Publishes messages to Hub result queue with one AMQP connection per worker process.
+
+    Connection and channel are opened on the first message, result queue is declared once,
+    publish is retried once on new connection if the broker connection was lost. Messages are
+    buffered for batch_interval seconds (or until batch_size messages) and published together,
+    flush() should be called at the end of task. After fork connection and buffered messages of
+    the parent process are dropped without closing, so prefork workers never share a socket.
+    """
+    def __init__(self, broker_url, queue, confirms=False, batch_interval=0.0, batch_size=100):
+        self.broker_url = broker_url
+        self.queue = queue
+        self.confirms = confirms
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        self._connection = None
+        self._channel = None
+        self._queue_declared = False
+        self._messages = []
+        self._flush_timer = None
+        self.reset_stats()
+
+    def publish(self, data):
+        with self._lock:
+            self._check_process()
+            self._messages.append(data)
+
+            if self.batch_interval <= 0 or len(self._messages) >= self.batch_size:
+                self._flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.batch_interval, self._flush_by_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._check_process()
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._check_process()
+            try:
+                self._flush()
+            finally:
+                self._close_connection()
+
+    def reset(self):
+        """Drops connection and messages inherited from parent process."""
+        with self._lock:
+            self._pid = os.getpid()
+            self._connection = None
+            self._channel = None
+            self._messages = []
+            self._flush_timer = None
+            self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'messages': 0, 'batches': 0, 'connections': 0, 'reconnects': 0}
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def _check_process(self):
+        if self._pid != os.getpid():
+            self.reset()
+
+    def _flush_by_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error("Publishing of messages to Hub failed: %s" % e)
+
+    def _flush(self):
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        if not self._messages:
+            return
+
+        try:
+            self._publish_messages()
+        except Exception as e:
+            logging.warning("Publishing to Hub failed, reconnecting: %s" % e)
+            self.stats['reconnects'] += 1
+            self._close_connection()
+            self._publish_messages()
+
+        self.stats['batches'] += 1
+
+    def _publish_messages(self):
+        import amqp # pylint: disable=C0415
+
+        channel = self._get_channel()
+        while self._messages:
+            channel.basic_publish(
+                amqp.Message(self._messages[0], delivery_mode=PERSISTENT_DELIVERY_MODE),
+                routing_key=self.queue
+            )
+            # Failed message is kept to be published on new connection
+            self._messages.pop(0)
+            self.stats['messages'] += 1
+
+    def _get_channel(self):
+        if self._channel is not None and self._connection.connected:
+            return self._channel
+
+        import amqp # pylint: disable=C0415
+
+        self._close_connection()
+        o = urlparse(self.broker_url)
+        connection = amqp.Connection(
+            host='%s:%s' % (o.hostname, o.port or 5672),
+            userid=o.username,
+            password=o.password,
+            virtual_host=o.path.replace('/', '')
+        )
+        connection.connect()
+        self.stats['connections'] += 1
+
+        channel = connection.channel()
+        if not self._queue_declared:
+            channel.queue_declare(self.queue, durable=True, auto_delete=False)
+            self._queue_declared = True
+
+        if self.confirms:
+            # basic_publish waits for broker ack after this
+            channel.confirm_select()
+
+        self._connection = connection
+        self._channel = channel
+        return channel
+
+    def _close_connection(self):
+        connection = self._connection
+        self._connection = None
+        self._channel = None
+
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.warning("Closing of Hub connection failed: %s" % e)
@@ -13,6 +13,7 @@ from a2ml.api.a2ml_experiment import A2MLExperiment
 from a2ml.api.a2ml_model import A2MLModel
 from a2ml.api.a2ml_project import A2MLProject
 from a2ml.server.notification import SyncSender
+from a2ml.server.predict_batcher import PredictBatcher
 
 notificator = SyncSender()
 
@@ -57,6 +58,35 @@ def __handle_task_result(self, status, retval, task_id, args, kwargs, einfo):
             __error_to_result(retval, einfo)
         )
 
+def __handle_batch_task_result(self, status, retval, task_id, args, kwargs, einfo):
+    batch = args[0]['_batch']
+    requests = batch['requests']
+
+    if status == 'SUCCESS':
+        try:
+            responses = PredictBatcher.split_response(retval['response'], [request['count'] for request in requests])
+        except Exception as e:
+            status, retval, einfo = 'FAILURE', e, None
+
+    stats = PredictBatcher.get_batch_stats(batch)
+    logging.info("Predict batch %s: %s requests, %s records, wait %.3f sec, latency p50 %.3f p99 %.3f sec" % (
+        args[0]['_request_id'], stats['size'], stats['records'], stats['wait_time'],
+        stats['latency']['p50'], stats['latency']['p99']))
+
+    for idx, request in enumerate(requests):
+        if status == 'SUCCESS':
+            notificator.publish_result(
+                request['request_id'],
+                status,
+                {'response': responses[idx], 'config': retval['config'], 'batch': stats}
+            )
+        else:
+            notificator.publish_result(
+                request['request_id'],
+                status,
+                __error_to_result(retval, einfo)
+            )
+
 # Projects
 @celeryApp.task(after_return=__handle_task_result)
 def new_project_task(params):
@@ -183,6 +213,17 @@ def predict_model_task(params):
 
     return with_context(params, _predict)
 
+# Batched predict_task and predict_model_task requests
+@celeryApp.task(after_return=__handle_batch_task_result)
+def predict_batch_task(params):
+    def _predict(ctx):
+        if params['_batch']['task'] == 'predict_model_task':
+            return A2MLModel(ctx).predict(*params['args'], **params['kwargs'])
+
+        return A2ML(ctx).predict(*params['args'], **params['kwargs'])
+
+    return with_context(params, _predict)
+
 # Complex tasks
 @celeryApp.task(after_return=__handle_task_result)
 def import_data_task(params):
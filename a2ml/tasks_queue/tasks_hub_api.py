@@ -9,7 +9,6 @@ import traceback
 from celery import current_task
 from celery.utils.log import get_task_logger
 from functools import wraps
-from urllib.parse import urlparse
 
 from a2ml.api.a2ml import A2ML
 from a2ml.api.a2ml_model import A2MLModel
@@ -18,18 +17,26 @@ from a2ml.api.a2ml_project import A2MLProject
 from a2ml.api.model_review.model_helper import ModelHelper
 from a2ml.api.model_review.model_review import ModelReview
 from a2ml.api.stats.feature_divergence import FeatureDivergence
-from a2ml.api.utils import dict_dig, merge_dicts
+from a2ml.api.utils import dict_dig, fsclient, merge_dicts
 from a2ml.api.utils.json_utils import json_dumps_np
 from a2ml.api.utils.context import Context
-from a2ml.api.utils.s3_fsclient import S3FSClient, BotoClient
+from a2ml.api.utils.model_metadata_cache import model_metadata_cache
+from a2ml.api.utils.model_registry import model_registry
+from a2ml.api.utils.s3_fsclient import S3FSClient, BotoClient, boto_client_registry
+from a2ml.api.roi.expression_cache import expression_cache as roi_expression_cache
 from a2ml.tasks_queue.config import Config
+from a2ml.tasks_queue.hub_publisher import HubPublisher
 
 from .celery_app import celeryApp
 
-PERSISTENT_DELIVERY_MODE = 2
-
 task_config = Config()
 logger = get_task_logger(__name__)
+hub_publisher = HubPublisher(
+    task_config.broker_url,
+    task_config.task_result_queue,
+    confirms=task_config.hub_publish_confirms,
+    batch_interval=task_config.hub_publish_batch_interval
+)
 
 def _log(payload, level=logging.INFO):
     if (level == logging.DEBUG and task_config.debug) or level == logging.INFO:
@@ -48,30 +55,11 @@ def _exception_traces_chain(e):
         return ''.join(traceback.format_tb(e.__traceback__))
 
 def send_result_to_hub(json_data):
-    import amqp
-
     json_data = json_dumps_np(json_data)
 
     # _log('Send JSON data to Hub: ' + json_data, level=logging.DEBUG)
 
-    o = urlparse(task_config.broker_url)
-
-    connection_params = {
-        'host': o.hostname,
-        'port': o.port,
-        'userid': o.username,
-        'password': o.password,
-        'virtual_host': o.path.replace('/', '')
-    }
-
-    with amqp.Connection(**connection_params) as c:
-        channel = c.channel()
-        channel.queue_declare(task_config.task_result_queue, durable=True, auto_delete=False)
-
-        channel.basic_publish(
-            amqp.Message(json_data, delivery_mode=PERSISTENT_DELIVERY_MODE),
-            routing_key=task_config.task_result_queue
-        )
+    hub_publisher.publish(json_data)
 
 def build_and_send_task_result_to_hub(args, status, result, traceback=None):
     if args:
@@ -88,11 +76,61 @@ def build_and_send_task_result_to_hub(args, status, result, traceback=None):
                 'traceback': traceback,
             }
 
+            if getattr(current_task, 'result_stats', None):
+                response['stats'] = current_task.result_stats
+
             send_result_to_hub(response)
 
+@celery.signals.worker_process_init.connect
+def celery_worker_process_init(**kwargs):
+    hub_publisher.reset()
+
+    if task_config.preload_models:
+        _preload_models(task_config.preload_models)
+
+def _preload_models(paths):
+    # Only Azure local predict keeps loaded models in model_registry
+    from a2ml.api.azure.model import AzureModel # pylint: disable=C0415
+
+    for path in paths:
+        if path.endswith('.pkl.gz'):
+            model_registry.preload([path], AzureModel.load_local_model)
+        else:
+            _log("Model %s is not preloaded, only Azure models (.pkl.gz) are cached" % path)
+
+    _log("Preloaded models stats: %s" % model_registry.get_stats())
+
+@celery.signals.worker_process_shutdown.connect
+def celery_worker_process_shutdown(**kwargs):
+    hub_publisher.close()
+
 @celery.signals.task_prerun.connect
 def celery_task_prerun(**kwargs):
     current_task.start_time = time.time()
+    current_task.result_stats = None
+    boto_client_registry.reset_stats()
+    roi_expression_cache.reset_stats()
+    model_registry.reset_stats()
+    model_metadata_cache.reset_stats()
+    fsclient.reset_read_stats()
+    hub_publisher.reset_stats()
+
+@celery.signals.task_postrun.connect
+def celery_task_postrun(task=None, **kwargs):
+    hub_publisher.flush()
+
+    _log("Task %s S3 clients stats: %s" % (
+        task.name if task else None, boto_client_registry.get_stats()))
+    _log("Task %s ROI expressions cache stats: %s" % (
+        task.name if task else None, roi_expression_cache.get_stats()))
+    _log("Task %s model registry stats: %s" % (
+        task.name if task else None, model_registry.get_stats()))
+    _log("Task %s model metadata cache stats: %s" % (
+        task.name if task else None, model_metadata_cache.get_stats()))
+    _log("Task %s file reads: %s" % (
+        task.name if task else None, fsclient.get_read_stats()))
+    _log("Task %s Hub publisher stats: %s" % (
+        task.name if task else None, hub_publisher.get_stats()))
 
 def process_task_result(task_func):
     @wraps(task_func)
@@ -536,6 +574,7 @@ def predict_by_model_task(params):
         no_features_in_result=params.get('no_features_in_result', False)
     )
     _update_hub_objects(ctx, params.get('provider'), params)
+    current_task.result_stats = {'model_registry': model_registry.get_stats()}
 
     return res['predicted']
 
@@ -586,7 +625,8 @@ def score_model_performance_daily_task(params):
         ctx = _read_hub_experiment_session(ctx, params)
         ctx.config.clean_changes()
 
-    return ModelReview(params).score_model_performance_daily(
+    model_review = ModelReview(params)
+    res = model_review.score_model_performance_daily(
         date_from=params.get('date_from'),
         date_to=params.get('date_to'),
         extra_features=params.get("features", []),
@@ -595,6 +635,12 @@ def score_model_performance_daily_task(params):
         ctx=ctx
     )
 
+    current_task.result_stats = {'file_reads': fsclient.get_read_stats()}
+    if model_review.scores_cache_stats:
+        current_task.result_stats['scores_cache'] = model_review.scores_cache_stats
+
+    return res
+
 @celeryApp.task(ignore_result=True)
 @process_task_result
 def set_support_review_model_flag_task(params):
@@ -634,12 +680,15 @@ def build_review_data_task(params):
     if ctx.config.get('experiment/retrain_policy_type'):
         retrain_policy = {'type': ctx.config.get('experiment/retrain_policy_type'), 'value':ctx.config.get('experiment/retrain_policy_value')}
 
-    return ModelReview(params).build_review_data(
+    model_review = ModelReview(params)
+    res = model_review.build_review_data(
         data_path=params.get('data_path'),
         date_col = date_col,
         retrain_policy = retrain_policy,
         date_to=params.get('date_to')
     )
+    current_task.result_stats = {'build_review_data': model_review.build_review_stats}
+    return res
 
 @celeryApp.task(ignore_result=True)
 @process_task_result
@@ -0,0 +1,126 @@
+"""Compares fsclient.read_json_file with folder listing and existence checks (FSCLIENT_JSON_FAST_READ=false)
+with direct reads and ETag revalidated S3 reads.
+
+Counts file system calls of local reads in a folder with many files and S3 requests of reads against
+in-process moto S3, or against minio/S3 compatible server with --endpoint-url (bucket should exist).
+
+Usage: python benchmarks/json_reads.py [--files 5000] [--reads 100] [--endpoint-url http://localhost:9000]
+"""
+import argparse
+import collections
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from a2ml.api.utils import fsclient
+from a2ml.api.utils.s3_fsclient import BotoClient, boto_client_registry
+
+
+BUCKET = 'a2ml-benchmark'
+OS_CALLS = ['stat', 'lstat', 'listdir', 'scandir']
+
+@contextlib.contextmanager
+def s3_server(endpoint_url):
+    if endpoint_url:
+        os.environ['S3_ENDPOINT_URL'] = endpoint_url
+        yield
+        return
+
+    import boto3
+    from moto import mock_aws
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        boto_client_registry.clear()
+        boto3.client('s3').create_bucket(Bucket=BUCKET)
+        yield
+
+@contextlib.contextmanager
+def count_os_calls(counts):
+    originals = dict((name, getattr(os, name)) for name in OS_CALLS)
+
+    def counted(name):
+        def call(*args, **kwargs):
+            counts[name] += 1
+            return originals[name](*args, **kwargs)
+
+        return call
+
+    for name in OS_CALLS:
+        setattr(os, name, counted(name))
+    try:
+        yield
+    finally:
+        for name in OS_CALLS:
+            setattr(os, name, originals[name])
+
+def count_opens(counts):
+    def hook(event, args):
+        if event == 'open' and counts.get('enabled'):
+            counts['open'] += 1
+
+    sys.addaudithook(hook)
+
+def measure(name, path, reads, fast_read, counts):
+    fast_read_value = fsclient.JSON_FAST_READ
+    fsclient.JSON_FAST_READ = fast_read
+    counts.clear()
+    counts['enabled'] = 1
+    try:
+        start = time.time()
+        with count_os_calls(counts):
+            for _ in range(reads):
+                fsclient.read_json_file(path)
+        duration = time.time() - start
+    finally:
+        counts['enabled'] = 0
+        fsclient.JSON_FAST_READ = fast_read_value
+
+    calls = ", ".join("%s: %s" % (key, value) for (key, value) in sorted(counts.items()) if key != 'enabled')
+    print("%-30s %8.3f ms per read, per %s reads: %s" % (name, duration * 1000 / reads, reads, calls))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--reads', type=int, default=100)
+    parser.add_argument('--endpoint-url', default=None)
+    args = parser.parse_args()
+
+    counts = collections.Counter()
+    count_opens(counts)
+
+    local_dir = tempfile.mkdtemp()
+    try:
+        for idx in range(args.files):
+            with open(os.path.join(local_dir, 'prediction_%s.csv' % idx), 'w') as file:
+                file.write('a\n1\n')
+
+        path = os.path.join(local_dir, 'options.json')
+        fsclient.write_json_file(path, {'targetFeature': 'y'})
+        print("Local folder with %s files" % args.files)
+        measure("listing and checks", path, args.reads, False, counts)
+        measure("direct read", path, args.reads, True, counts)
+    finally:
+        shutil.rmtree(local_dir)
+
+    with s3_server(args.endpoint_url):
+        path = 's3://%s/benchmark/options.json' % BUCKET
+        fsclient.write_json_file(path, {'targetFeature': 'y'})
+
+        def count_request(request, **kwargs):
+            if counts.get('enabled'):
+                counts['s3 %s' % request.method] += 1
+
+        BotoClient().client.meta.events.register('before-send.s3.*', count_request)
+        print("S3 object")
+        measure("existence check and download", path, args.reads, False, counts)
+        measure("conditional GET", path, args.reads, True, counts)
+
+
+if __name__ == '__main__':
+    main()
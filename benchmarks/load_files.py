@@ -0,0 +1,71 @@
+"""Compares DataFrame.load_from_files + pd.concat in a loop with DataFrame.load_dataset.
+
+Usage: python benchmarks/load_files.py [--files 100] [--rows 20000] [--columns 20]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyarrow import feather
+
+from a2ml.api.utils.dataframe import DataFrame
+
+
+def write_files(path, files_count, rows, columns):
+    random = np.random.RandomState(0)
+    paths = []
+
+    for idx in range(files_count):
+        data = {'a2ml_actual': random.randint(0, 2, rows), 'a2ml_predicted': random.randint(0, 2, rows)}
+        for column in range(columns):
+            if column % 4 == 0:
+                data['cat_%s' % column] = random.choice(['a', 'b', 'c'], rows)
+            else:
+                data['num_%s' % column] = random.rand(rows)
+
+        file_path = os.path.join(path, '2021-01-01_%s_full_data.feather.zstd' % idx)
+        feather.write_feather(pd.DataFrame(data), file_path, compression='zstd')
+        paths.append(file_path)
+
+    return paths
+
+def load_by_files(paths, features=None):
+    # Path used by callers before load_dataset
+    res = DataFrame({})
+    for (file, df) in DataFrame.load_from_files(paths, features):
+        res.df = pd.concat([res.df, df.df])
+
+    return res
+
+def measure(name, func):
+    start = time.time()
+    res = func()
+    print("%-40s %8.3fs rows: %s columns: %s" % (name, time.time() - start, len(res.df), len(res.df.columns)))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--columns', type=int, default=20)
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        paths = write_files(path, args.files, args.rows, args.columns)
+        features = ['a2ml_actual', 'a2ml_predicted']
+
+        measure("load_from_files + concat", lambda: load_by_files(paths))
+        measure("load_dataset", lambda: DataFrame.load_dataset(paths))
+        measure("load_from_files + concat, 2 columns", lambda: load_by_files(paths, features))
+        measure("load_dataset, 2 columns", lambda: DataFrame.load_dataset(paths, features))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
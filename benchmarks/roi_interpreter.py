@@ -0,0 +1,72 @@
+"""Compares per row cost of ROI expressions evaluated by walking the expression tree for each row
+(ROI_COMPILED_INTERPRETER=false) and by closures compiled once per expression.
+
+Expressions are taken from tests/api/roi, expressions which fail on test rows are skipped.
+
+Usage: PYTHONPATH=. python benchmarks/roi_interpreter.py [--rows 10000] [--repeat 3] [--verbose]
+"""
+import argparse
+import copy
+import time
+
+from a2ml.api.roi import interpreter as interpreter_module
+from a2ml.api.roi.interpreter import Interpreter
+from tests.api.roi.test_vectorized_interpreter import (
+    ROW_EXPRESSIONS, TOP_EXPRESSIONS, TOP_ROWS, build_frame, df_to_rows
+)
+
+
+def measure(expression, rows, compiled, repeat):
+    interpreter_module.ROI_COMPILED_INTERPRETER = compiled
+    interpreter = Interpreter(expression)
+    best = None
+
+    for _ in range(repeat):
+        # with expressions add columns to rows
+        variables = copy.deepcopy(rows) if "with" in expression else rows
+        start = time.time()
+        interpreter.run(variables)
+        duration = time.time() - start
+        best = duration if best is None else min(best, duration)
+
+    return best * 1e6 / len(rows)
+
+def is_valid(expression, rows):
+    try:
+        Interpreter(expression).run(copy.deepcopy(rows[:10]))
+        return True
+    except Exception:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    test_rows = df_to_rows(build_frame())
+    suites = [
+        ("row expressions", ROW_EXPRESSIONS, test_rows),
+        ("top expressions", TOP_EXPRESSIONS, TOP_ROWS),
+    ]
+
+    for name, expressions, suite_rows in suites:
+        rows = [dict(suite_rows[idx % len(suite_rows)]) for idx in range(args.rows)]
+        expressions = [expression for expression in expressions if is_valid(expression, rows)]
+        totals = [0, 0]
+
+        for expression in expressions:
+            times = [measure(expression, rows, compiled, args.repeat) for compiled in (False, True)]
+            totals = [total + value for (total, value) in zip(totals, times)]
+
+            if args.verbose:
+                print("%-50s %8.3f us %8.3f us %6.2fx" % (expression, times[0], times[1], times[0] / times[1]))
+
+        print("%s: %s expressions, %s rows, per row: tree walk %.3f us, compiled %.3f us, %.2fx" % (
+            name, len(expressions), args.rows, totals[0] / len(expressions), totals[1] / len(expressions),
+            totals[0] / totals[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Compares temp file S3 reads of feather/parquet files with in-memory reads (S3_DIRECT_IO).
+
+Runs against in-process moto S3 by default, or against minio/S3 compatible server with --endpoint-url
+(bucket should exist, credentials are taken from environment).
+
+Usage: python benchmarks/s3_reads.py [--rows 1000000] [--columns 20] [--repeat 3] [--endpoint-url http://localhost:9000]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from a2ml.api.utils import fsclient
+from a2ml.api.utils.s3_fsclient import S3FSClient, boto_client_registry
+
+
+BUCKET = 'a2ml-benchmark'
+
+@contextlib.contextmanager
+def s3_server(endpoint_url):
+    if endpoint_url:
+        os.environ['S3_ENDPOINT_URL'] = endpoint_url
+        yield
+        return
+
+    import boto3
+    from moto import mock_aws
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        boto_client_registry.clear()
+        boto3.client('s3').create_bucket(Bucket=BUCKET)
+        yield
+
+def make_df(rows, columns):
+    random = np.random.RandomState(0)
+    data = {}
+    for column in range(columns):
+        if column % 4 == 0:
+            data['cat_%s' % column] = random.choice(['a', 'b', 'c'], rows)
+        else:
+            data['num_%s' % column] = random.rand(rows)
+
+    return pd.DataFrame(data)
+
+def measure(name, func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        res = func()
+        times.append(time.time() - start)
+
+    print("%-45s %8.3fs rows: %s columns: %s" % (name, min(times), len(res), len(res.columns)))
+
+def set_direct_io(value, func):
+    def run():
+        direct_io = fsclient.S3_DIRECT_IO
+        fsclient.S3_DIRECT_IO = value
+        try:
+            return func()
+        finally:
+            fsclient.S3_DIRECT_IO = direct_io
+
+    return run
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--columns', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--endpoint-url', default=None)
+    args = parser.parse_args()
+
+    df = make_df(args.rows, args.columns)
+    features = list(df.columns[:2])
+    local_dir = tempfile.mkdtemp()
+
+    try:
+        with s3_server(args.endpoint_url):
+            feather_path = 's3://%s/benchmark/data.feather.zstd' % BUCKET
+            parquet_path = 's3://%s/benchmark/data.parquet' % BUCKET
+
+            local_parquet = os.path.join(local_dir, 'data.parquet')
+            df.to_parquet(local_parquet, index=False)
+            fsclient.copy_file(local_parquet, parquet_path)
+            fsclient.save_object_to_file(df, feather_path, fmt='feather')
+
+            print("feather: %s bytes, parquet: %s bytes" % (
+                fsclient.get_file_size(feather_path), fsclient.get_file_size(parquet_path)))
+
+            for (name, func) in [
+                    ("feather", lambda: fsclient.load_db_from_feather_file(feather_path)),
+                    ("feather, 2 columns", lambda: fsclient.load_db_from_feather_file(feather_path, features)),
+                    ("parquet", lambda: fsclient.load_db_from_parquet_file(parquet_path)),
+                    ("parquet, 2 columns", lambda: fsclient.load_db_from_parquet_file(parquet_path, features))]:
+                measure("temp file, " + name, set_direct_io(False, func), args.repeat)
+                measure("in memory, " + name, set_direct_io(True, func), args.repeat)
+
+            range_file = S3FSClient().open_range_file(parquet_path)
+            pq.read_table(pa.PythonFile(range_file, mode='r'), columns=features)
+            print("parquet, 2 columns fetched: %s bytes in %s requests" % (
+                range_file.stats['bytes'], range_file.stats['requests']))
+    finally:
+        shutil.rmtree(local_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -53,6 +53,8 @@ extras = {
     'testing': [
         'flake8<=3.7.9,>=3.1.0',  # version for azure
         'mock',
+        'fakeredis',
+        'moto[s3]>=5',
         'pytest',
         'pytest-cov',
         'pytest-runner',
@@ -69,7 +71,7 @@ extras = {
         'celery==5.2.7',
         'fastapi==0.85',
         'gevent',
-        'redis',
+        'redis>=5.0.1',
         's3fs>=0.4.0,<0.5.0',
         'uvicorn',
         'scikit-learn==1.2.0'
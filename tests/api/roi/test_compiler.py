@@ -0,0 +1,65 @@
+import copy
+import pytest
+
+from a2ml.api.roi import interpreter as interpreter_module
+from a2ml.api.roi.interpreter import Interpreter
+from tests.api.roi.test_vectorized_interpreter import (
+    ROW_EXPRESSIONS, SCALAR_EXPRESSIONS, TOP_EXPRESSIONS, TOP_ROWS, assert_same_values, build_frame, df_to_rows,
+    evaluate
+)
+
+
+def run(monkeypatch, compiled, expression, variables, vars_mapping={}, filter=False):
+    monkeypatch.setattr(interpreter_module, 'ROI_COMPILED_INTERPRETER', compiled)
+    # with expressions add columns to rows
+    variables = copy.deepcopy(variables)
+    return evaluate(lambda: Interpreter(expression, vars_mapping).run(variables, filter=filter))
+
+def assert_same_as_tree_walk(monkeypatch, expression, variables, vars_mapping={}):
+    for filter in (False, True):
+        expected, expected_error = run(monkeypatch, False, expression, variables, vars_mapping, filter)
+        res, error = run(monkeypatch, True, expression, variables, vars_mapping, filter)
+
+        assert error == expected_error
+        if expected_error is None and isinstance(expected, list) and not filter:
+            assert_same_values(res, expected)
+        else:
+            assert res == expected
+
+@pytest.mark.parametrize("expression", SCALAR_EXPRESSIONS)
+def test_scalar_expressions(monkeypatch, expression):
+    assert_same_as_tree_walk(monkeypatch, expression, {"$price": 50, "$taxes": 0.15, "A": 10})
+
+@pytest.mark.parametrize("expression", ROW_EXPRESSIONS)
+def test_row_expressions(monkeypatch, expression):
+    assert_same_as_tree_walk(monkeypatch, expression, df_to_rows(build_frame()))
+
+@pytest.mark.parametrize("expression", TOP_EXPRESSIONS)
+def test_top_expressions(monkeypatch, expression):
+    assert_same_as_tree_walk(monkeypatch, expression, TOP_ROWS)
+
+def test_vars_mapping(monkeypatch):
+    rows = [{"a2ml_actual": 1.0, "class": 1.0, "cost": 1}, {"a2ml_actual": 2.5, "class": 0.0, "cost": 2}]
+    vars_mapping = {"A": "a2ml_actual", "P": "class", "$cost": "cost"}
+
+    assert_same_as_tree_walk(monkeypatch, "(A + P) * $cost - $100", rows, vars_mapping)
+    assert_same_as_tree_walk(monkeypatch, "A + $missed", rows, vars_mapping)
+
+def test_missed_var_error():
+    interpreter = Interpreter("$a + $b + $c")
+
+    assert interpreter.run([{"$a": 1, "b": 2, "$c": 3}]) == [6]
+
+    with pytest.raises(interpreter_module.MissedVariable, match='missed var `\\$c` in row `{"\\$a": 1, "b": 2}`'):
+        interpreter.run([{"$a": 1, "b": 2}])
+
+def test_nodes_are_compiled_once():
+    rows = df_to_rows(build_frame())
+    interpreter = Interpreter("if($a > 2, $b, $c) + len($s)")
+
+    first = interpreter.run(rows)
+    compiled_nodes = dict(interpreter.compiled_nodes)
+
+    assert interpreter.run(rows) == first
+    assert interpreter.compiled_nodes == compiled_nodes
+    assert list(compiled_nodes) == [interpreter.root]
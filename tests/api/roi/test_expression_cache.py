@@ -0,0 +1,78 @@
+import pytest
+
+from a2ml.api.roi.calculator import Calculator
+from a2ml.api.roi.expression_cache import ExpressionCache, expression_cache
+from a2ml.api.roi.interpreter import Interpreter
+from a2ml.api.roi.validator import ValidationError, Validator
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    expression_cache.clear()
+    expression_cache.reset_stats()
+    yield
+    expression_cache.clear()
+
+def test_expression_parsed_once():
+    interpreter = Interpreter("$a + $b")
+
+    assert interpreter.run([{"$a": 1, "$b": 2}]) == [3]
+    assert interpreter.run([{"$a": 2, "$b": 2}]) == [4]
+    assert Interpreter("$a + $b").run({"$a": 1, "$b": 1}) == 2
+
+    stats = expression_cache.get_stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+    assert stats['size'] == 1
+
+def test_known_vars_are_part_of_key():
+    assert Validator("$a + B", ["$a"]).validate(force_raise=False).is_valid == False
+    assert Validator("$a + B", ["$a", "B"]).validate(force_raise=False).is_valid == True
+    assert Validator("$a + B", set(["B", "$a"])).validate(force_raise=False).is_valid == True
+
+    stats = expression_cache.get_stats()
+    assert stats['misses'] == 2
+    assert stats['hits'] == 1
+
+def test_vars_mapping_change():
+    calc = Calculator(revenue="A * $cost", investment="$cost", vars_mapping={"A": "actual"})
+    assert calc.calculate([{"actual": 1, "cost": 2}])["revenue"] == 2
+
+    calc = Calculator(revenue="A * $cost", investment="$cost", vars_mapping={"A": "other"})
+    assert calc.calculate([{"other": 3, "cost": 2}])["revenue"] == 6
+
+def test_errors_are_cached():
+    for _ in range(2):
+        with pytest.raises(ValidationError, match="unknown function 'somefunc' at position 1"):
+            Validator("somefunc(1)", []).validate()
+
+        res = Validator("somefunc(1)", []).validate(force_raise=False)
+        assert res.is_valid == False
+        assert res.error == "unknown function 'somefunc' at position 1"
+
+    assert expression_cache.get_stats()['misses'] == 1
+
+def test_defined_vars_added_on_hit():
+    expression = "all with agg_max(P) as max_p per $a"
+
+    for _ in range(2):
+        known_vars = ["P", "$a"]
+        assert Validator(expression, known_vars).validate().is_valid
+        assert known_vars == ["P", "$a", "max_p"]
+
+def test_lru_eviction():
+    cache = ExpressionCache(max_size=2)
+
+    cache.put(ExpressionCache.build_key("1", []), 1)
+    cache.put(ExpressionCache.build_key("2", []), 2)
+    assert cache.get(ExpressionCache.build_key("1", [])) == 1
+
+    cache.put(ExpressionCache.build_key("3", []), 3)
+    assert cache.get(ExpressionCache.build_key("2", [])) is None
+    assert cache.get(ExpressionCache.build_key("1", [])) == 1
+
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['size'] == 2
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
@@ -0,0 +1,353 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+from a2ml.api.roi.calculator import Calculator
+from a2ml.api.roi.interpreter import Interpreter
+from a2ml.api.roi.vectorized_interpreter import NotVectorizable, VectorizedInterpreter
+
+
+def df_to_rows(df):
+    return list(map(lambda x: x[1].to_dict(), df.iterrows()))
+
+def evaluate(func):
+    try:
+        return func(), None
+    except Exception as e:
+        return None, (type(e), str(e))
+
+def assert_same_values(values, expected):
+    assert len(values) == len(expected)
+
+    for value, expected_value in zip(values, expected):
+        assert type(value) == type(expected_value), (value, expected_value)
+
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(expected_value)
+        else:
+            assert value == expected_value
+
+def assert_same_as_interpreter(expression, df, vars_mapping={}):
+    rows = df_to_rows(df)
+    expected, expected_error = evaluate(lambda: Interpreter(expression, vars_mapping).run(rows))
+    values, error = evaluate(lambda: VectorizedInterpreter(expression, vars_mapping).run(df).tolist())
+
+    assert error == expected_error
+    if expected_error is None:
+        assert_same_values(values, expected)
+
+    expected, expected_error = evaluate(lambda: Interpreter(expression, vars_mapping).run(rows, filter=True))
+    mask, error = evaluate(lambda: VectorizedInterpreter(expression, vars_mapping).run(df, filter=True))
+
+    assert error == expected_error
+    if expected_error is None:
+        assert [row for row, selected in zip(rows, mask) if selected] == expected
+
+def assert_same_as_row_calculator(df, **kwargs):
+    expected, expected_error = evaluate(lambda: Calculator(vectorized=False, **kwargs).calculate(df))
+    res, error = evaluate(lambda: Calculator(**kwargs).calculate(df))
+
+    assert error == expected_error
+    if expected_error is None:
+        for key in ("count", "revenue", "investment", "roi"):
+            assert_same_values([res[key]], [expected[key]])
+
+        assert res["filtered_rows"] == expected["filtered_rows"]
+
+
+def assert_same_top_as_interpreter(expression, df, vectorizable=True):
+    expected, expected_error = evaluate(lambda: Interpreter(expression).run(df_to_rows(df)))
+    rows, error = evaluate(lambda: df_to_rows(VectorizedInterpreter(expression).select_rows(df)))
+
+    if error and error[0] == NotVectorizable:
+        assert not vectorizable, error
+        return
+
+    assert error == expected_error
+    if expected_error is not None:
+        return
+
+    assert rows == expected
+    assert [list(map(type, row.values())) for row in rows] == [list(map(type, row.values())) for row in expected]
+
+
+SCALAR_EXPRESSIONS = [
+    "3 / 2", "3 // 2", "8 % 3", "2 ** 4", "2 > 1 and 2 <= 2", "2 < 1 or 2 >= 2", "2 == 2 and 1 = 1",
+    "3 != 1 + 2", "3 ^ 4", "3 | 6", "3 & 6", "3 << 2", "100 >> 1", "+2 + -3", "~5", "min(1, 2, 3)",
+    "max(1, 2, 3)", "abs(-1.5)", 'len("some string")', "round(1.23456)", "round(1.23456, 3)",
+    "ceil(1.2)", "floor(1.2)", "exp(5)", "log(5)", "log(4, 2)", "log2(5)", "log10(5)",
+    "$price * 1.4 - $12", "($price * 1.4 - $12) * (1 - $taxes)", "($price * $1.4 - A) * (1 - $taxes)",
+    "if($price > $100, $taxes + 0.1, $taxes + 0.05)",
+]
+
+ROW_EXPRESSIONS = [
+    "$a + $b", "$a + $b > 5", "$a - $b * $c", "$a / $b", "$a // $b", "$a % $b", "$b / $a", "$a ** $b",
+    "$a ** 0.5", "$c ** $b", "$a << $b", "$a >> $b", "$a & $b", "$a | 3", "$a ^ $b", "~$a", "-$a", "not $a",
+    "$a and $b", "$a or $c", "$c and $a or $b", "not $a and $c > 0", "$a = $b", "$a != $c", "$c >= 0.5",
+    "min($a, $b)", "max($a, $b, $c)", "min($c, 0.3)", "abs($a - $b)", "abs($c - 1)", "floor($c * 10)",
+    "ceil($c)", "round($c * 3)", "round($c, 2)", "sqrt($c)", "sqrt($a - 2)", "log($a + 1)", "log($c)",
+    "if($a > 2, $b, $c)", "if($c, $a, 0)", "@if($a > $b, $a - $b, None)", "$a * 1.5 + if($b > 3, 1, 0)",
+    "$s", "len($s)", '$s == "x"', '$s + "y"', "$s > 1", "$n", "$n = None", "$n != None and ($n > 0.1)",
+    "$n > 0.1", "$n + 1", "$flag", "$flag and $a", "$flag + $flag", "$flag & ($a > 2)", "$flag * 2.5",
+    "-$flag", "~$flag", "$a * $big", "$big * $big", "$big + 1", "$a in $s", "random() < 2",
+    "randint(1, 3) > 0", "$missed + 1", "$a / 0", "$a + $s", "1 + 1", "1 / 0",
+]
+
+GUARDED_EXPRESSIONS = [
+    "$a != 0 and 1 / $a < 1", "$a == 0 or 10 // $a > 1", "if($a != 0, 1 / $a, 0)", "if($a == 0, None, $b % $a)",
+    "$a > 0 and $c != 0 and $a / $c > 1", "if($a != 0, if($c != 0, $a / $c, $a), -1)",
+]
+
+TOP_EXPRESSIONS = [
+    "top 1 by P per $symbol", "bottom 1 by P per $symbol", "top 2 by P from (bottom 1 by $spread per $symbol)",
+    "top 2 by P from (bottom 1 by $spread per $symbol where P > 0.7)",
+    'top 3 by P - $spread / 2 per $symbol < "Z" where P ** 2 > 0', "all with agg_max(P) per $symbol",
+    "top 1 by P per $symbol having $spread > 0.8", "all with agg_min($spread) as low per ($symbol, P > 0.6)",
+    "bottom 2 by $missed per $symbol",
+]
+
+TOP_ROWS = [
+    { "P": 0.6, "$symbol": "T", "$spread": 0.5 },
+    { "P": 0.7, "$symbol": "T", "$spread": 1 },
+    { "P": 0.9, "$symbol": "A", "$spread": 0.5 },
+    { "P": 0.5, "$symbol": "A", "$spread": 0.9 },
+    { "P": 0.7, "$symbol": "A", "$spread": 0.8 },
+]
+
+def build_frame():
+    return pd.DataFrame({
+        "$a": [1, 4, 2, 0, -3, 7],
+        "$b": [3, 6, 2, 5, 2, 1],
+        "$c": [0.5, 0.0, 1.25, -0.7, 0.3, 2.0],
+        "$s": ["x", "y", "", "xyz", "x", "ab"],
+        "$n": [None, 0.2, 0.1, None, 1.0, 0.0],
+        "$flag": [True, False, True, True, False, False],
+        "$big": [2**40, 2**41, 1, 3, 2**62, 5],
+    })
+
+@pytest.mark.parametrize("expression", SCALAR_EXPRESSIONS)
+def test_scalar_expressions(expression):
+    df = pd.DataFrame({
+        "$price": [50, 120, 80],
+        "$taxes": [0.15, 0.2, 0.0],
+        "A": [10, 20, 1],
+    })
+
+    assert_same_as_interpreter(expression, df)
+
+@pytest.mark.parametrize("expression", ROW_EXPRESSIONS)
+def test_row_expressions(expression):
+    df = build_frame()
+
+    # mixed columns give python objects in rows
+    assert_same_as_interpreter(expression, df)
+
+@pytest.mark.parametrize("expression", [expr for expr in ROW_EXPRESSIONS if not "$s" in expr])
+def test_row_expressions_with_numeric_frame(expression):
+    df = build_frame().drop(columns=["$s", "$flag"])
+    df["$n"] = df["$n"].astype(float)
+
+    # numeric columns are upcasted to float in rows
+    assert_same_as_interpreter(expression, df)
+    assert_same_as_interpreter(expression, df.drop(columns=["$c", "$n"]))
+
+@pytest.mark.parametrize("expression", [expr for expr in ROW_EXPRESSIONS if "$flag" in expr or not "$" in expr])
+def test_row_expressions_with_bool_frame(expression):
+    df = pd.DataFrame({"$flag": [True, False, True], "$other": [False, False, True]})
+
+    assert_same_as_interpreter(expression, df)
+
+@pytest.mark.parametrize("expression", GUARDED_EXPRESSIONS)
+def test_guarded_expressions_are_vectorized(expression):
+    df = build_frame().drop(columns=["$s"])
+    interpreter = VectorizedInterpreter(expression)
+
+    assert_same_as_interpreter(expression, df)
+    assert_same_as_interpreter(expression, build_frame())
+
+    interpreter.run(df)
+    assert interpreter.stats['row_nodes'] == 0
+
+@pytest.mark.parametrize("expression", [
+    "$a + $b", "$a - $b", "$b - $a", "-$a", "-$b", "$a // $b", "$a + 1", "$b - 1", "-$b - 1", "$a + $b - $b",
+    "if($a > 0, $a + $a, -$b)",
+])
+def test_int_overflow(expression):
+    limits = np.iinfo(np.int64)
+    df = pd.DataFrame({
+        "$a": [2**62, 3, limits.max, limits.min, -1, 0],
+        "$b": [2**62, 2**53 + 1, 1, -1, limits.min, limits.min],
+    })
+
+    # python ints in rows don't wrap around
+    assert_same_as_interpreter(expression, df)
+    assert_same_as_row_calculator(df, revenue="$a + $b", investment="$b - $a")
+
+def test_vars_mapping():
+    df = pd.DataFrame({"a2ml_actual": [1.0, 2.5, 4.0], "class": [1.0, 0.0, 1.0], "cost": [1, 2, 3]})
+    vars_mapping = {"A": "a2ml_actual", "P": "class", "$cost": "cost"}
+
+    assert_same_as_interpreter("(A + P) * $cost - $100", df, vars_mapping)
+
+def test_top_expression_is_not_vectorizable():
+    df = build_frame()
+
+    with pytest.raises(NotVectorizable):
+        VectorizedInterpreter("top 1 by $a per $s").run(df, filter=True)
+
+@pytest.mark.parametrize("expression", TOP_EXPRESSIONS)
+def test_top_expressions(expression):
+    df = pd.DataFrame(TOP_ROWS)
+
+    assert_same_top_as_interpreter(expression, df, vectorizable=not "$missed" in expression)
+    assert_same_top_as_interpreter(expression, df.drop(columns=["$symbol"]), vectorizable=False)
+
+def test_top_expression_with_tuples():
+    expression = """
+        top 1 by max_p per $date from (
+            top 1 by P per ($symbol, $date) where $close_ask<4 and $close_ask>=0.1
+            from (
+                all with agg_max(P) as max_p per ($symbol, $date)
+            )
+        )
+    """
+    df = pd.DataFrame({
+        "$close_ask": [1, 1, 0, 1, 1, 1, 1, 1, 1, 0],
+        "P": [0.6, 0.7, 0.9, 0.5, 0.7, 0.7, 0.8, 0.7, 0.5, 1.0],
+        "$symbol": ["T", "T", "A", "A", "A", "T", "T", "A", "A", "A"],
+        "$date": ["2021-07-05"] * 5 + ["2021-07-06"] * 5,
+    })
+
+    assert_same_top_as_interpreter(expression, df)
+    assert_same_top_as_interpreter(expression, df.iloc[0:0])
+
+def test_top_expressions_not_vectorizable():
+    df = pd.DataFrame({
+        "P": [0.5, np.nan, 0.7, 0.7],
+        "$symbol": ["A", None, "A", "B"],
+        "$count": [1, 2, 3, 4],
+        "$mixed": ["x", 1, "y", 2.5],
+    })
+
+    for expression in [
+        "top 1 by P", "top 1 by $count per $symbol", "top 1 by $count per $mixed", "top 1.5 by $count",
+        "top $count by $count", "all with agg_max(P) per $count",
+        "all with max($count, 1) per $count", "all with agg_max($mixed) per $count",
+    ]:
+        assert_same_top_as_interpreter(expression, df, vectorizable=False)
+
+    # with aggregates of float values can't be added to int rows
+    assert_same_top_as_interpreter("all with agg_max($count / 2) as half per $count", df[["$count"]], vectorizable=False)
+    assert_same_top_as_interpreter("all with agg_max($count) as top per $count", df[["$count"]])
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_top_random_frames(seed):
+    random = np.random.RandomState(seed)
+    size = 1000
+    df = pd.DataFrame({
+        "P": random.rand(size).round(2),
+        "$score": random.randint(0, 50, size),
+        "$customer_id": random.randint(0, 100, size),
+        "$region": random.choice(["east", "west", "north"], size),
+        "$cost": random.randint(1, 100, size),
+    })
+
+    expressions = [
+        "top 3 by $score per $customer_id", "bottom 2 by $score per ($region, $customer_id) where P > 0.2",
+        "top 5 by $score", "bottom 10 by P - $cost / 100", "top 1 by ($score, P) per $region",
+        "top 2 by P per $customer_id having $cost > 95", "all with agg_max($score) as best per $customer_id",
+        "top 1 by best per $region from (all with agg_max($score) as best, agg_min(P) as low per $customer_id)",
+        "top 3 by low per $region having best > 45 from (all with agg_max($score) as best, agg_min(P) as low per $customer_id)",
+        "all where P > 0.9", "top 0 by P per $region", "top 2 by $score per $score > 25",
+    ]
+
+    for expression in expressions:
+        assert_same_top_as_interpreter(expression, df)
+        assert_same_top_as_interpreter(expression, df.drop(columns=["$region"]).astype(float),
+            vectorizable=not "$region" in expression)
+
+    assert_same_as_row_calculator(df, filter="top 3 by $score per $customer_id where P > 0.3",
+        revenue="$score * P", investment="$cost")
+    assert_same_as_row_calculator(df, filter="top 1 by best per $region from (all with agg_max($score) as best per $customer_id)",
+        revenue="best * P", investment="$cost")
+
+def test_random_frames():
+    random = np.random.RandomState(42)
+    df = pd.DataFrame({
+        "A": random.randint(0, 2, 1000),
+        "P": random.rand(1000),
+        "$cost": random.randint(1, 100, 1000),
+        "$spread": random.randn(1000),
+        "$symbol": random.choice(["A", "B", "C"], 1000),
+    })
+
+    expressions = [
+        "P >= 0.5", "(1 + A) * $cost", "$cost * 1.1", "$spread > 0 and $symbol != \"B\"",
+        "if(P > 0.3, $cost / 3, $cost // 3)", "max($spread, P) ** 2 - min($cost, 10) % 3",
+    ]
+
+    for expression in expressions:
+        assert_same_as_interpreter(expression, df)
+        assert_same_as_interpreter(expression, df.drop(columns=["$symbol"]))
+
+    assert_same_as_row_calculator(df, filter="P >= 0.4 and $spread < 1", revenue="(1 + A) * $cost",
+        investment="$cost", known_vars=["A", "P"])
+
+class TestCalculator:
+    def test_calculator_cases(self):
+        cases = [
+            (dict(filter="P >= 0.2", revenue="(1 + A) * $100", investment="$100", known_vars=["A", "P"]),
+                [{"A": 0.1, "P": 0.1}, {"A": 0.1, "P": 0.15}, {"A": 0.5, "P": 0.2}, {"A": 0.3, "P": 0.3}]),
+            (dict(filter="top 2 by P where P >= 0.1 from (bottom 1 by $spread per $symbol)",
+                revenue="(1 + A) * $100", investment="$100", known_vars=["A", "P", "spread", "symbol"]),
+                [
+                    {"A": 0.1, "P": 0.10, "$spread": 0.3, "$symbol": "A"},
+                    {"A": 0.1, "P": 0.15, "$spread": 0.4, "$symbol": "A"},
+                    {"A": 0.5, "P": 0.20, "$spread": 0.5, "$symbol": "T"},
+                    {"A": 0.3, "P": 0.30, "$spread": 0.3, "$symbol": "T"},
+                ]),
+            (dict(filter="top 2 by P where P >= 0.1 from (bottom 1 by $spread per $symbol)",
+                revenue="(1 + A) * $100", investment="$100", known_vars=["A", "P", "spread", "symbol"]),
+                [
+                    {"A": 0.1, "P": 0.10, "$symbol": "A"},
+                    {"A": 0.1, "P": 0.15, "$spread": 0.4, "$symbol": "A"},
+                    {"A": 0.5, "P": 0.20, "$spread": 0.5, "$symbol": "T"},
+                    {"A": 0.3, "P": 0.30, "$spread": 0.3},
+                ]),
+            (dict(revenue="min(A, P) * $10", investment="$2 * max(P - 10, 0)", known_vars=["A", "P"]),
+                [{"A": 10, "P": 5}, {"A": 10, "P": 10}, {"A": 10, "P": 15}, {"A": 20, "P": 15}]),
+            (dict(filter="P=True", revenue="if(A=True, $1050, $0)", investment="$1000", known_vars=["A", "P"]),
+                [{"A": True, "P": True}, {"A": True, "P": False}, {"A": False, "P": True}, {"A": False, "P": False}]),
+            (dict(filter="P=True", revenue="if(A=True, $1050, $0)", investment="$1000", known_vars=["A", "P"]),
+                [{"A": True, "P": False}, {"A": False, "P": False}]),
+            (dict(filter="P=True", revenue="if(A=True, $1050, $0)", investment="$1000",
+                known_vars=["a2ml_actual", "class"], vars_mapping={"A": "a2ml_actual", "P": "class"}),
+                [
+                    {"a2ml_actual": True, "class": True},
+                    {"a2ml_actual": True, "class": False},
+                    {"a2ml_actual": False, "class": True},
+                    {"a2ml_actual": False, "class": False},
+                ]),
+            (dict(filter="", revenue="$revenue", investment="$cost", known_vars=["revenue"]),
+                [{"revenue": 5, "cost": 1}, {"revenue": 10, "cost": 2}]),
+            (dict(filter="$delta != None and ($delta > 0.1)", revenue="$id * 2", investment="$id + 1"),
+                [{"$id": 0, "$delta": 0}, {"$id": 1, "$delta": None}, {"$id": 2, "$delta": 0.1}, {"$id": 3, "$delta": 0.2}]),
+        ]
+
+        for kwargs, rows in cases:
+            df = pd.DataFrame(rows)
+
+            assert_same_as_row_calculator(df, **kwargs)
+            assert_same_as_row_calculator(df.iloc[0:0], **kwargs)
+
+    def test_without_filtered_rows(self):
+        calc = Calculator(filter="P >= 0.2", revenue="(1 + A) * $100", investment="$100", known_vars=["A", "P"])
+        df = pd.DataFrame([{"A": 0.1, "P": 0.1}, {"A": 0.5, "P": 0.2}, {"A": 0.3, "P": 0.3}])
+
+        res = calc.calculate(df, with_filtered_rows=False)
+
+        assert res["filtered_rows"] is None
+        assert 2 == res["count"]
+        assert (0.5 + 0.3 + 2) * 100 == res["revenue"]
+        assert 200 == res["investment"]
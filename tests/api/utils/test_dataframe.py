@@ -1,8 +1,78 @@
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as pa_ds
+import pytest
+
+from pyarrow import feather
+
 from a2ml.api.utils.dataframe import DataFrame
 
+
 def test_feather_segfault():
     # without explicit list of features this file cause a segfault
     # Looks like a bug in feather
     # https://issues.apache.org/jira/browse/ARROW-9662
     ds = DataFrame({'data_path': 'tests/fixtures/feather/2020-07-30_BF43CA09E5404F9_actuals.feather.zstd'})
     ds.load(features = ['class'])
+
+def write_files(tmp_path, extension='.feather.zstd'):
+    random = np.random.RandomState(0)
+    paths = []
+
+    for idx in range(5):
+        df = pd.DataFrame({
+            'x': random.rand(10),
+            'n': random.randint(0, 100, 10),
+            'label': random.choice(['a', 'b'], 10),
+            'date': pd.date_range('2021-01-01', periods=10).date,
+        })
+        if idx % 2:
+            # Filtered frame has not default index, some files don't have columns
+            df = df[df['n'] > 20].drop(columns=['label'])
+
+        path = str(tmp_path / ('%s_data%s' % (idx, extension)))
+        if extension.startswith('.feather'):
+            feather.write_feather(df, path, compression=None if extension == '.feather' else 'zstd')
+        else:
+            df.to_parquet(path)
+
+        paths.append(path)
+
+    return paths
+
+def load_by_files(paths, features=None):
+    return pd.concat([df.df for (_, df) in DataFrame.load_from_files(paths, features)], ignore_index=True)
+
+@pytest.mark.parametrize("extension", ['.feather.zstd', '.feather', '.parquet'])
+def test_load_dataset(tmp_path, extension):
+    paths = write_files(tmp_path, extension)
+
+    res = DataFrame.load_dataset(paths).df
+    pd.testing.assert_frame_equal(res, load_by_files(paths))
+
+def test_projection_and_filter(tmp_path):
+    paths = write_files(tmp_path)
+
+    res = DataFrame.load_dataset(paths, features=['n', 'x', 'missed'], filter=pa_ds.field('n') > 50).df
+
+    expected = load_by_files(paths)
+    expected = expected[expected['n'] > 50][['n', 'x']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(res, expected)
+
+def test_not_dataset_files(tmp_path):
+    paths = write_files(tmp_path)
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({'n': [1, 2], 'x': [0.5, 0.7]}).to_csv(csv_path, index=False)
+
+    # Loaded file by file and concatenated once
+    res = DataFrame.load_dataset(paths + [csv_path], features=['n'], filter=pa_ds.field('n') < 10).df
+
+    expected = load_by_files(paths + [csv_path])
+    assert res['n'].tolist() == expected[expected['n'] < 10]['n'].tolist()
+    assert res['n'].tolist()[-2:] == [1, 2]
+
+def test_empty_files_list():
+    res = DataFrame.load_dataset([])
+
+    assert res.count() == 0
+    assert res.columns == []
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+
+from a2ml.api.model_review.model_helper import ModelHelper
+from a2ml.api.utils import fsclient
+from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.model_metadata_cache import ModelMetadataCache
+
+
+def write_metadata(model_path, target='y', categories=['a', 'b']):
+    os.makedirs(model_path, exist_ok=True)
+    with open(os.path.join(model_path, 'options.json'), 'w') as file:
+        json.dump({'targetFeature': target}, file)
+    with open(os.path.join(model_path, 'target_categoricals.json'), 'w') as file:
+        json.dump({target: {'categories': categories}}, file)
+
+    return model_path
+
+def test_metadata_is_cached(tmp_path):
+    model_path = write_metadata(str(tmp_path / 'model'))
+    cache = ModelMetadataCache(ttl=60)
+
+    fsclient.reset_read_stats()
+    for _ in range(5):
+        metadata = cache.get(model_path)
+
+    assert metadata['options'] == {'targetFeature': 'y'}
+    assert metadata['target_categoricals'] == {'y': {'categories': ['a', 'b']}}
+    assert fsclient.get_read_stats()['read_json_file'] == 2
+    assert cache.get_stats() == {'hits': 4, 'revalidations': 0, 'misses': 1, 'models': 1}
+
+def test_changed_metadata_is_loaded_after_ttl(tmp_path):
+    model_path = write_metadata(str(tmp_path / 'model'))
+    cache = ModelMetadataCache(ttl=0)
+    cache.get(model_path)
+    cache.get(model_path)
+    assert cache.get_stats()['revalidations'] == 1
+
+    time.sleep(0.01)
+    write_metadata(model_path, target='target')
+    assert cache.get(model_path)['options'] == {'targetFeature': 'target'}
+    assert cache.get_stats()['misses'] == 2
+
+def test_missed_metadata(tmp_path):
+    cache = ModelMetadataCache(ttl=0, max_models=1)
+
+    assert cache.get(str(tmp_path / 'model1')) == {'options': {}, 'target_categoricals': {}}
+    cache.get(str(tmp_path / 'model2'))
+    cache.get(str(tmp_path / 'model1'))
+    assert cache.get_stats() == {'hits': 0, 'revalidations': 0, 'misses': 3, 'models': 1}
+
+def test_preprocess_target_with_preloaded_options(tmp_path):
+    model_path = write_metadata(str(tmp_path / 'model'))
+    options = {'targetFeature': 'y'}
+    target_categoricals = {'y': {'categories': ['a', 'b']}}
+
+    fsclient.reset_read_stats()
+    for _ in range(3):
+        ds = DataFrame.create_dataframe(records=[['b'], ['a']], features=['y'])
+        y_true, _ = ModelHelper.preprocess_target_ds(model_path, ds, options, target_categoricals)
+
+    assert list(y_true) == [1, 0]
+    assert fsclient.get_read_stats() == {}
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from a2ml.api.azure.model import AzureModel
+from a2ml.api.utils import fsclient
+from a2ml.api.utils.model_registry import ModelRegistry
+
+
+def write_model(path, value, size=10):
+    fsclient.save_object_to_file({'value': value, 'weights': np.zeros(size)}, path)
+    return path
+
+def load_model(path):
+    return fsclient.load_object_from_file(path)
+
+def test_get_caches_model(tmp_path):
+    registry = ModelRegistry()
+    path = write_model(str(tmp_path / 'model.pkl.gz'), 1)
+
+    model = registry.get(path, load_model)
+    assert registry.get(path, load_model) is model
+
+    stats = registry.get_stats()
+    assert 1 == stats['hits']
+    assert 1 == stats['misses']
+    assert 0.5 == stats['hit_rate']
+    assert 1 == stats['models']
+    assert stats['bytes'] > 0
+    assert stats['avg_load_time'] >= 0
+
+def test_changed_model_is_loaded_again(tmp_path):
+    registry = ModelRegistry()
+    path = write_model(str(tmp_path / 'model.pkl.gz'), 1)
+    assert 1 == registry.get(path, load_model)['value']
+
+    time.sleep(0.01)
+    write_model(path, 2, size=20)
+    assert 2 == registry.get(path, load_model)['value']
+    assert 2 == registry.get_stats()['misses']
+
+def test_lru_eviction(tmp_path):
+    paths = [write_model(str(tmp_path / ('model_%s.pkl.gz' % idx)), idx) for idx in range(3)]
+
+    registry = ModelRegistry(max_models=2)
+    for path in paths[:2]:
+        registry.get(path, load_model)
+    # First model becomes most recently used
+    registry.get(paths[0], load_model)
+    registry.get(paths[2], load_model)
+
+    registry.reset_stats()
+    registry.get(paths[0], load_model)
+    registry.get(paths[2], load_model)
+    assert 2 == registry.get_stats()['hits']
+
+    registry.get(paths[1], load_model)
+    stats = registry.get_stats()
+    assert 1 == stats['misses']
+    assert 1 == stats['evictions']
+
+def test_memory_budget(tmp_path):
+    small_path = write_model(str(tmp_path / 'small.pkl.gz'), 1, size=10)
+    big_path = write_model(str(tmp_path / 'big.pkl.gz'), 2, size=100000)
+
+    registry = ModelRegistry(max_bytes=100000)
+    registry.get(small_path, load_model)
+    registry.get(big_path, load_model)
+
+    # Model bigger than budget is kept, others are evicted
+    stats = registry.get_stats()
+    assert 1 == stats['models']
+    assert 1 == stats['evictions']
+    assert 2 == registry.get(big_path, load_model)['value']
+
+def test_concurrent_requests_load_model_once(tmp_path):
+    registry = ModelRegistry()
+    path = write_model(str(tmp_path / 'model.pkl.gz'), 1)
+
+    def slow_load(path):
+        time.sleep(0.1)
+        return load_model(path)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get(path, slow_load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 1 == registry.get_stats()['misses']
+    assert all(result is results[0] for result in results)
+
+def test_preload_skips_failed_models(tmp_path):
+    registry = ModelRegistry()
+    path = write_model(str(tmp_path / 'model.pkl.gz'), 1)
+
+    registry.preload([path, str(tmp_path / 'missed.pkl.gz')], load_model)
+    registry.get(path, load_model)
+
+    assert 1 == registry.get_stats()['hits']
+
+def test_azure_local_model(tmp_path):
+    path = write_model(str(tmp_path / 'model.pkl.gz'), 1)
+    with open(str(tmp_path / 'options.json'), 'w') as file:
+        json.dump({'originalFeatureColumns': ['a']}, file)
+    with open(str(tmp_path / 'target_categoricals.json'), 'w') as file:
+        json.dump({'y': {'categories': ['x', 'y']}}, file)
+
+    local_model = ModelRegistry().get(path, AzureModel.load_local_model)
+
+    assert 1 == local_model['model']['value']
+    assert ['a'] == local_model['options']['originalFeatureColumns']
+    assert ['x', 'y'] == local_model['target_categoricals']['y']['categories']
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.prefetch_loader import PrefetchLoader
+
+
+class LoadCounter(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loading = 0
+        self.max_loading = 0
+        self.started = []
+
+    def __call__(self, file):
+        with self.lock:
+            self.loading += 1
+            self.max_loading = max(self.max_loading, self.loading)
+            self.started.append(file['path'])
+
+        # Later files finish first
+        time.sleep(0.01 * (10 - int(file['path'])))
+        with self.lock:
+            self.loading -= 1
+
+        if file['path'] == '3':
+            raise ValueError("Bad file")
+
+        return int(file['path'])
+
+def make_files(count, size=1):
+    return [{'path': str(idx), 'size': size} for idx in range(count)]
+
+@pytest.mark.parametrize("workers", [0, 1, 4])
+def test_results_order_and_errors(workers):
+    loader = PrefetchLoader(LoadCounter(), workers=workers, read_ahead=4)
+    res = list(loader.iter_results(make_files(8)))
+
+    assert [file['path'] for (file, result, error) in res] == [str(idx) for idx in range(8)]
+    assert [result for (file, result, error) in res] == [0, 1, 2, None, 4, 5, 6, 7]
+    assert [type(error) for (file, result, error) in res] == [type(None)]*3 + [ValueError] + [type(None)]*4
+
+def test_read_ahead_bounds_loads():
+    counter = LoadCounter()
+    loader = PrefetchLoader(counter, workers=8, read_ahead=2)
+
+    for (file, result, error) in loader.iter_results(make_files(8)):
+        # Current file is consumed, only one more is loading
+        assert len(counter.started) <= int(file['path']) + 2
+
+    assert counter.max_loading <= 2
+
+def test_inflight_bytes_budget():
+    counter = LoadCounter()
+    loader = PrefetchLoader(counter, workers=4, read_ahead=4, max_inflight_bytes=250)
+
+    for (file, result, error) in loader.iter_results(make_files(6, size=100)):
+        assert len(counter.started) <= int(file['path']) + 2
+
+    # File bigger than budget is still loaded
+    loader = PrefetchLoader(counter, workers=4, read_ahead=4, max_inflight_bytes=10)
+    assert len(list(loader.iter_results(make_files(3, size=100)))) == 3
+
+def test_close_cancels_pending():
+    counter = LoadCounter()
+    loader = PrefetchLoader(counter, workers=1, read_ahead=4)
+
+    results = loader.iter_results(make_files(8))
+    next(results)
+    results.close()
+
+    assert len(counter.started) < 8
+
+def test_load_from_files_skips_failed_files(tmp_path, monkeypatch):
+    monkeypatch.setattr('a2ml.api.utils.dataframe.retry_helper', lambda func: func())
+
+    paths = []
+    for idx in range(4):
+        path = str(tmp_path / ("%s.csv" % idx))
+        pd.DataFrame({'a': [idx]}).to_csv(path, index=False)
+        paths.append(path)
+
+    bad_path = str(tmp_path / "bad.parquet")
+    with open(bad_path, 'w') as file:
+        file.write("not parquet")
+    paths.insert(2, bad_path)
+    res = [(file, df.df['a'].tolist()) for (file, df) in DataFrame.load_from_files(paths, read_ahead=3)]
+
+    assert res == [(path, [idx]) for (idx, path) in enumerate(paths[:2] + paths[3:])]
+
+def test_file_sizes_requests(tmp_path, monkeypatch):
+    requested = []
+    monkeypatch.setattr('a2ml.api.utils.fsclient.get_file_size', lambda path: requested.append(path) or 100)
+
+    files = make_files(3, size=None)
+    files[1]['size'] = 10
+    assert len(list(PrefetchLoader(LoadCounter(), workers=2).iter_results(files))) == 3
+    # Unknown sizes are requested, known ones are used as is
+    assert requested == ['0', '2']
+
+    requested.clear()
+    list(PrefetchLoader(LoadCounter(), workers=2).iter_results(make_files(1, size=None)))
+    assert requested == []
+
+    paths = []
+    for idx in range(2):
+        paths.append(str(tmp_path / ("%s.csv" % idx)))
+        pd.DataFrame({'a': [idx]}).to_csv(paths[-1], index=False)
+
+    ds = DataFrame.load_dataset([{'path': path, 'size': 10} for path in paths])
+    assert ds.df['a'].tolist() == [0, 1]
+    assert requested == []
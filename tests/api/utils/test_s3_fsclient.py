@@ -1,4 +1,12 @@
-from a2ml.api.utils.s3_fsclient import S3FSClient
+import os
+
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+
+from a2ml.api.utils import fsclient, s3_fsclient
+from a2ml.api.utils.s3_fsclient import BotoClient, BotoClientRegistry, S3FSClient, boto_client_registry
 
 def test_split_path_to_bucket_and_key_plain_key():
     path = "s3://auger-options-1sunr2/temp/options-a2ml/data_temp/parquet_review_B26364B24FF94E7.parquet"
@@ -20,3 +28,289 @@ def test_split_path_to_bucket_and_key_with_double_leading_slash():
 
     assert "auger-options-1sunr2" == bucket
     assert "/temp/options-a2ml/data_temp/key" == key # Hm, looks like source code whanted something else
+
+def test_boto_client_registry_reuses_clients():
+    registry = BotoClientRegistry(max_pool_connections=20)
+
+    client1 = registry.get_client('s3', region='us-west-2', endpoint_url='http://localhost:9000')
+    client2 = registry.get_client('s3', region='us-west-2', endpoint_url='http://localhost:9000')
+    client3 = registry.get_client('s3', region='us-east-1', endpoint_url='http://localhost:9000')
+
+    assert client1 is client2
+    assert client1 is not client3
+    assert 20 == client1.meta.config.max_pool_connections
+
+    stats = registry.get_stats()
+    assert 2 == stats['clients_created']
+    assert 1 == stats['clients_reused']
+    assert 2 == stats['clients_cached']
+    assert 0 == stats['connections_created']
+
+    registry.reset_stats()
+    registry.get_client('s3', region='us-west-2', endpoint_url='http://localhost:9000')
+
+    stats = registry.get_stats()
+    assert 0 == stats['clients_created']
+    assert 1 == stats['clients_reused']
+
+def test_boto_client_registry_key_includes_role_arn():
+    registry = BotoClientRegistry()
+
+    client1 = registry.get_client('s3', endpoint_url='http://localhost:9000', aws_role_arn='role1')
+    client2 = registry.get_client('s3', endpoint_url='http://localhost:9000', aws_role_arn='role2')
+
+    assert client1 is not client2
+
+def test_boto_client_registry_drops_clients_after_fork(monkeypatch):
+    import os
+
+    registry = BotoClientRegistry()
+    client1 = registry.get_client('s3', endpoint_url='http://localhost:9000')
+
+    pid = os.getpid()
+    monkeypatch.setattr(os, 'getpid', lambda: pid + 1)
+    client2 = registry.get_client('s3', endpoint_url='http://localhost:9000')
+
+    assert client1 is not client2
+    assert 1 == registry.get_stats()['clients_created']
+
+def test_botoclient_uses_registry(monkeypatch):
+    monkeypatch.setenv('S3_ENDPOINT_URL', 'http://localhost:9000')
+
+    assert BotoClient().client is BotoClient().client
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    moto = pytest.importorskip('moto')
+
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.delenv('S3_ENDPOINT_URL', raising=False)
+    monkeypatch.delenv('AWS_ROLE_ARN', raising=False)
+
+    with moto.mock_aws():
+        # Cached clients were created without mock
+        boto_client_registry.clear()
+        boto3.client('s3').create_bucket(Bucket='a2ml-test')
+        yield 's3://a2ml-test'
+
+    boto_client_registry.clear()
+
+def make_df(rows):
+    return pd.DataFrame({'a': np.arange(rows), 'b': np.arange(rows) * 0.5, 'c': ['x', 'y'] * (rows // 2)})
+
+def test_read_bytes_concurrent_parts(s3_bucket):
+    data = bytes(bytearray(range(256)) * 1000)
+    path = s3_bucket + '/data/file.bin'
+    S3FSClient().write_bytes(path, data)
+
+    assert bytes(S3FSClient().read_bytes(path, part_size=1000, max_concurrency=4)) == data
+    assert bytes(S3FSClient().read_bytes(s3_bucket + '/data/file.bin')) == data
+
+def test_write_bytes_sets_content_type(s3_bucket, tmp_path):
+    client = S3FSClient()
+
+    for name in ('file.json', 'file.csv.gz'):
+        local_path = str(tmp_path / name)
+        with open(local_path, 'wb') as f:
+            f.write(b'{}')
+
+        client.write_bytes(s3_bucket + '/bytes/' + name, b'{}')
+        client.copy_file(local_path, s3_bucket + '/uploaded/' + name)
+
+        content_types = [client.client.head_object(Bucket='a2ml-test', Key=folder + name)['ContentType']
+            for folder in ('bytes/', 'uploaded/')]
+        assert content_types[0] == content_types[1] == client._get_upload_args(name)['ContentType']
+
+def test_feather_in_memory_round_trip(s3_bucket, monkeypatch):
+    df = make_df(1000)
+    path = s3_bucket + '/data/file.feather.zstd'
+    fsclient.save_object_to_file(df, path, fmt='feather')
+
+    monkeypatch.setattr(fsclient, 'save_atomic', None)
+    pd.testing.assert_frame_equal(fsclient.load_db_from_feather_file(path), df)
+    pd.testing.assert_frame_equal(fsclient.load_db_from_feather_file(path, ['c']), df[['c']])
+
+def test_parquet_projection_reads_column_chunks(s3_bucket, tmp_path, monkeypatch):
+    df = make_df(100000)
+    local_path = str(tmp_path / 'file.parquet')
+    df.to_parquet(local_path, index=False)
+    path = s3_bucket + '/data/file.parquet'
+    fsclient.copy_file(local_path, path)
+
+    range_files = []
+    open_range_file = S3FSClient.open_range_file
+    def open_range_file_spy(self, path):
+        range_files.append(open_range_file(self, path))
+        return range_files[-1]
+
+    monkeypatch.setattr(S3FSClient, 'open_range_file', open_range_file_spy)
+    monkeypatch.setattr(fsclient, 'save_atomic', None)
+
+    pd.testing.assert_frame_equal(fsclient.load_db_from_parquet_file(path), df)
+    pd.testing.assert_frame_equal(fsclient.load_db_from_parquet_file(path, ['c']), df[['c']])
+
+    # Footer and small dictionary encoded column only
+    assert len(range_files) == 1
+    assert 0 < range_files[0].stats['bytes'] < os.path.getsize(local_path) / 10
+
+def test_read_arrow_schema_reads_footer(s3_bucket, tmp_path):
+    import pyarrow.parquet as pq
+
+    df = make_df(100000)
+    local_path = str(tmp_path / 'file.parquet')
+    df.to_parquet(local_path, index=False)
+    fsclient.copy_file(local_path, s3_bucket + '/data/file.parquet')
+    fsclient.save_object_to_file(df, s3_bucket + '/data/file.feather.zstd', fmt='feather')
+
+    requests = []
+    BotoClient().client.meta.events.register('before-send.s3.*',
+        lambda request, **kwargs: requests.append((request.method, request.headers.get('Range'))))
+
+    assert fsclient.read_arrow_schema(s3_bucket + '/data/file.parquet') == pq.read_schema(local_path)
+    assert fsclient.read_arrow_schema(s3_bucket + '/data/file.feather.zstd').names == ['a', 'b', 'c']
+    assert fsclient.read_arrow_schema(s3_bucket + '/data/file.csv') is None
+    # Whole objects are never downloaded
+    assert all(method == 'HEAD' or range is not None for (method, range) in requests)
+
+def test_review_data_writer_loads_s3_files_once(s3_bucket, tmp_path):
+    from a2ml.api.model_review.review_data_writer import ReviewDataWriter
+
+    files = []
+    for idx in range(3):
+        files.append(s3_bucket + '/predictions/2020-10-2%s_actuals.feather.zstd' % idx)
+        fsclient.save_object_to_file(make_df(10), files[-1], fmt='feather')
+
+    fsclient.reset_read_stats()
+    output = str(tmp_path / 'review.parquet')
+    ReviewDataWriter().write(make_df(4), files, output)
+
+    assert fsclient.get_read_stats()['load_db_from_feather_file'] == 3
+    assert len(pd.read_parquet(output)) == 34
+
+def test_transfer_config(monkeypatch):
+    monkeypatch.setattr(s3_fsclient, 'S3_TRANSFER_PART_SIZE', 16*1024*1024)
+    monkeypatch.setattr(s3_fsclient, 'S3_TRANSFER_MAX_CONCURRENCY', 4)
+
+    config = s3_fsclient.get_transfer_config()
+    assert 16*1024*1024 == config.multipart_chunksize
+    assert 4 == config.max_concurrency
+    assert config.use_threads
+
+def write_folder(path):
+    files = {'a.txt': 'a', 'b/c.txt': 'c', 'b/d/e.txt': 'e'}
+    for name, text in files.items():
+        fsclient.write_text_file(os.path.join(path, name), text)
+
+    return files
+
+@pytest.mark.parametrize("files_concurrency", [1, 4])
+def test_copy_and_download_folder(s3_bucket, tmp_path, monkeypatch, files_concurrency):
+    monkeypatch.setattr(s3_fsclient, 'S3_TRANSFER_FILES_CONCURRENCY', files_concurrency)
+    files = write_folder(str(tmp_path / 'src'))
+
+    fsclient.copy_folder(str(tmp_path / 'src'), s3_bucket + '/src')
+    fsclient.copy_folder(s3_bucket + '/src', s3_bucket + '/dst')
+    S3FSClient().download_folder(s3_bucket + '/dst', str(tmp_path / 'dst'))
+
+    for name, text in files.items():
+        assert fsclient.read_text_file(os.path.join(s3_bucket + '/dst', name)) == text
+        assert fsclient.read_text_file(str(tmp_path / 'dst' / name)) == text
+
+def test_list_objects_flat(s3_bucket, tmp_path):
+    files = write_folder(str(tmp_path / 'src'))
+    fsclient.copy_folder(str(tmp_path / 'src'), s3_bucket + '/src')
+
+    items = S3FSClient().list_objects_flat(s3_bucket + '/src')
+    assert sorted(item['path'] for item in items if not item['path'].endswith('/')) == sorted(files.keys())
+    assert all(item['key'] == 'src/' + item['path'] for item in items)
+
+def test_folder_markers_are_not_copied(s3_bucket, tmp_path):
+    files = write_folder(str(tmp_path / 'src'))
+    fsclient.copy_folder(str(tmp_path / 'src'), s3_bucket + '/src')
+    for folder in ('/src/b', '/src/empty'):
+        S3FSClient().create_folder(s3_bucket + folder)
+
+    def list_keys(prefix):
+        return sorted(item['Key'] for item in
+            boto3.client('s3').list_objects_v2(Bucket='a2ml-test', Prefix=prefix).get('Contents', []))
+
+    assert sorted(item['path'] for item in S3FSClient().list_objects_flat(s3_bucket + '/src')) == sorted(files.keys())
+
+    S3FSClient().copy_folder(s3_bucket + '/src', s3_bucket + '/dst')
+    assert list_keys('dst/') == sorted('dst/' + name for name in files.keys())
+
+    # Removal still deletes markers
+    fsclient.remove_folder(s3_bucket + '/src')
+    assert list_keys('src') == []
+
+def test_remove_folder_deletes_folder_marker(s3_bucket, tmp_path):
+    write_folder(str(tmp_path / 'model'))
+    fsclient.copy_folder(str(tmp_path / 'model'), s3_bucket + '/model')
+    for folder in ('/model', '/model/b'):
+        S3FSClient().create_folder(s3_bucket + folder)
+
+    assert S3FSClient().is_folder_exists(s3_bucket + '/model')
+    fsclient.remove_folder(s3_bucket + '/model')
+
+    assert boto3.client('s3').list_objects_v2(Bucket='a2ml-test').get('Contents', []) == []
+    assert not S3FSClient().is_folder_exists(s3_bucket + '/model')
+
+def test_folder_operations_are_batched(s3_bucket, tmp_path, monkeypatch):
+    write_folder(str(tmp_path / 'src'))
+    fsclient.copy_folder(str(tmp_path / 'src'), s3_bucket + '/src')
+
+    def head_object(self, *args, **kwargs):
+        raise AssertionError("Object HEAD request")
+
+    delete_requests = []
+    delete_objects = BotoClient.delete_objects
+    def delete_objects_spy(self, *args, **kwargs):
+        delete_requests.append(kwargs['Delete']['Objects'])
+        return delete_objects(self, *args, **kwargs)
+
+    monkeypatch.setattr(BotoClient, 'head_object', head_object)
+    monkeypatch.setattr(BotoClient, 'delete_objects', delete_objects_spy)
+    monkeypatch.setattr(s3_fsclient, 'S3_DELETE_BATCH_SIZE', 2)
+
+    S3FSClient().copy_folder(s3_bucket + '/src', s3_bucket + '/dst')
+    assert S3FSClient().list_objects_flat(s3_bucket + '/dst') != []
+
+    count = len(S3FSClient().list_objects_flat(s3_bucket + '/src'))
+    fsclient.remove_folder(s3_bucket + '/src')
+    assert S3FSClient().list_objects_flat(s3_bucket + '/src') == []
+    # Folder objects, the folder marker and object with the folder name
+    assert sum(len(keys) for keys in delete_requests) == count + 2
+    assert len(delete_requests) == (count + 3) // 2
+
+    fsclient.remove_files([s3_bucket + '/dst/a.txt', s3_bucket + '/dst/b/c.txt'])
+    assert sorted(item['path'] for item in S3FSClient().list_objects_flat(s3_bucket + '/dst')
+        if not item['path'].endswith('/')) == ['b/d/e.txt']
+
+def test_read_json_file_revalidates_by_etag(s3_bucket):
+    path = s3_bucket + '/model/options.json'
+    fsclient.write_json_file(path, {'targetFeature': 'y'})
+
+    requests = []
+    BotoClient().client.meta.events.register(
+        'before-send.s3.*', lambda request, **kwargs: requests.append((request.method, request.headers.get('If-None-Match'))))
+
+    fsclient.reset_read_stats()
+    for _ in range(3):
+        data = fsclient.read_json_file(path)
+        data['changed'] = True
+
+    assert fsclient.read_json_file(path) == {'targetFeature': 'y'}
+    # Single GET per read, conditional after the first one
+    assert [method for (method, etag) in requests] == ['GET'] * 4
+    assert requests[0][1] is None and all(requests[1:])
+    assert fsclient.get_read_stats()['read_json_file_not_modified'] == 3
+
+    fsclient.write_json_file(path, {'targetFeature': 'target'})
+    assert fsclient.read_json_file(path) == {'targetFeature': 'target'}
+
+    fsclient.remove_file(path)
+    assert fsclient.read_json_file(path) == {}
+    with pytest.raises(FileNotFoundError):
+        fsclient.read_json_file(path, check_if_exist=False)
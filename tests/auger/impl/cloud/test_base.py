@@ -0,0 +1,66 @@
+import pytest
+
+from a2ml.api.auger.impl.cloud.base import AugerBaseApi, PollPolicy
+from a2ml.api.auger.impl.cloud.prediction import AugerPredictionApi
+from a2ml.api.auger.impl.exceptions import AugerException
+
+
+class StatusApi(AugerBaseApi):
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.logged = []
+
+    def status(self):
+        return self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+
+    def properties(self):
+        return {'error_message': 'bad data'}
+
+    def _get_readable_name(self):
+        return 'Object'
+
+    def _log_status(self, status):
+        self.logged.append(status)
+
+class TestAugerBaseApi():
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr('a2ml.api.auger.impl.cloud.base.time.sleep', sleeps.append)
+        return sleeps
+
+    def test_poll_intervals(self):
+        intervals = PollPolicy(min_interval=0.25, max_interval=2, backoff=2, jitter=0).intervals()
+        assert [next(intervals) for _ in range(6)] == [0.25, 0.5, 1, 2, 2, 2]
+
+        intervals = PollPolicy(min_interval=1, max_interval=10, backoff=1, jitter=0.2).intervals()
+        assert all(0.8 <= next(intervals) <= 1.2 for _ in range(100))
+
+    def test_wait_for_status(self, sleeps):
+        api = StatusApi(['requested'] * 4 + ['running'] * 2 + ['processed'])
+        api.poll_policy = PollPolicy(min_interval=0.1, max_interval=0.5, backoff=2, jitter=0)
+
+        assert api.wait_for_status(['requested', 'running']) == 'processed'
+        assert api.logged == ['requested', 'running', 'processed']
+        # Intervals are reset when status is changed
+        assert sleeps == [0.1, 0.2, 0.4, 0.5, 0.1, 0.2]
+
+    def test_wait_for_status_error(self, sleeps):
+        api = StatusApi(['running', 'processed_with_error'])
+
+        with pytest.raises(AugerException, match='Object processed with error: bad data'):
+            api.wait_for_status(['running'])
+
+    def test_wait_for_statuses(self, sleeps):
+        apis = [StatusApi(['running'] * count + ['processed']) for count in [1, 3, 2]]
+
+        statuses = AugerBaseApi.wait_for_statuses(
+            apis, ['running'], PollPolicy(min_interval=1, backoff=1, jitter=0))
+
+        assert statuses == ['processed'] * 3
+        assert sleeps == [1, 1, 1]
+        assert [len(api.statuses) for api in apis] == [1, 1, 1]
+
+    def test_prediction_policy(self):
+        assert AugerPredictionApi.poll_policy.min_interval < 1
+        assert AugerPredictionApi.poll_policy.max_interval < AugerBaseApi.poll_policy.max_interval
@@ -0,0 +1,137 @@
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from a2ml.api.model_review.actuals_stats import ActualsStats
+from a2ml.api.model_review.model_review import ModelReview
+from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.json_utils import json_dumps_np
+
+
+DATE_FROM = '2020-10-20'
+DATE_TO = '2020-10-24'
+
+def copy_model(tmp_path, name='lucas-iris'):
+    model_path = str(tmp_path / name)
+    # other tests leave prediction and actuals files in fixture folder
+    shutil.copytree(os.path.join('tests/fixtures/test_score_actuals', name), model_path,
+        ignore=shutil.ignore_patterns('predictions'))
+
+    options_path = os.path.join(model_path, 'options.json')
+    with open(options_path) as file:
+        options = json.load(file)
+
+    # neg_log_loss needs probabilities, it is calculated from data files
+    options['scoreNames'].remove('neg_log_loss')
+    with open(options_path, 'w') as file:
+        json.dump(options, file)
+
+    return model_path
+
+def create_regression_model(tmp_path):
+    model_path = str(tmp_path / 'regression')
+    os.makedirs(model_path)
+
+    with open(os.path.join(model_path, 'options.json'), 'w') as file:
+        json.dump({
+            'targetFeature': 'y',
+            'task_type': 'regression',
+            'score_name': 'r2',
+            'scoreNames': ['r2', 'neg_mean_absolute_error', 'neg_rmse'],
+            'originalFeatureColumns': ['x', 'c'],
+            'categoricalFeatures': ['c'],
+        }, file)
+
+    return model_path
+
+def remove_sidecars(model_path):
+    sidecars = glob.glob(os.path.join(model_path, 'predictions', '*' + ActualsStats.SIDECAR_SUFFIX))
+    for path in sidecars:
+        os.remove(path)
+
+    return len(sidecars)
+
+def get_sidecars_in_range(model_path):
+    sidecars = glob.glob(os.path.join(model_path, 'predictions', '*' + ActualsStats.SIDECAR_SUFFIX))
+
+    # data files names start with date
+    return [path for path in sidecars if DATE_FROM <= os.path.basename(path)[:10] <= DATE_TO]
+
+def review_results(model_path):
+    model_review = ModelReview({'model_path': model_path})
+
+    return (model_review.score_model_performance_daily(DATE_FROM, DATE_TO),
+        model_review.distribution_chart_stats(DATE_FROM, DATE_TO))
+
+def review_results_from_sidecars(model_path, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(DataFrame, 'load_from_files', None)
+        return review_results(model_path)
+
+def assert_same_results(res, expected):
+    scores, distribution = res
+    expected_scores, expected_distribution = expected
+
+    assert set(scores.keys()) == set(expected_scores.keys())
+    for day, day_res in expected_scores.items():
+        assert set(scores[day]['scores'].keys()) == set(day_res['scores'].keys())
+        for name, value in day_res['scores'].items():
+            assert scores[day]['scores'][name] == pytest.approx(value, abs=1e-12), name
+
+    # Hub gets json, sidecar value counts have json keys
+    assert json_dumps_np(distribution) == json_dumps_np(expected_distribution)
+
+def test_classification_stats(tmp_path, monkeypatch):
+    model_path = copy_model(tmp_path)
+    model_review = ModelReview({'model_path': model_path})
+    model_review.add_actuals(None, actuals_path=os.path.join(model_path, 'iris_actuals_with_dates_2.csv'),
+        actual_date_column='date')
+    model_review.add_actuals(None, actuals_path=os.path.join(model_path, 'iris_actuals.csv'),
+        actual_date='2020-10-23')
+
+    res = review_results_from_sidecars(model_path, monkeypatch)
+    assert remove_sidecars(model_path) > 1
+    assert_same_results(res, review_results(model_path))
+
+def test_regression_stats(tmp_path, monkeypatch):
+    model_path = create_regression_model(tmp_path)
+    random = np.random.RandomState(0)
+
+    for idx in range(3):
+        actual = random.randn(20) * 10
+        ModelReview({'model_path': model_path}).add_actuals(None, data={
+            'actual': actual,
+            'y': actual + random.randn(20),
+            'x': random.rand(20),
+            'c': random.choice(['a', 'b'], 20),
+            'date': random.choice(['2020-10-21', '2020-10-22'], 20),
+        }, actual_date_column='date')
+
+    res = review_results_from_sidecars(model_path, monkeypatch)
+    assert remove_sidecars(model_path) == 6
+    assert_same_results(res, review_results(model_path))
+
+def test_sidecars_are_not_used_for_roi(tmp_path, monkeypatch):
+    model_path = copy_model(tmp_path)
+    ModelReview({'model_path': model_path}).add_actuals(None,
+        actuals_path=os.path.join(model_path, 'iris_actuals.csv'), actual_date='2020-10-23')
+
+    monkeypatch.setattr(ActualsStats, 'calculate_scores', None)
+    roi = {'filter': '', 'revenue': '$1', 'investment': '$1'}
+    res = ModelReview({'model_path': model_path, 'roi': roi}).score_model_performance_daily(DATE_FROM, DATE_TO)
+
+    assert res['2020-10-23']['scores']['roi'] == 0
+
+def test_delete_actuals_removes_sidecars(tmp_path):
+    model_path = copy_model(tmp_path)
+    model_review = ModelReview({'model_path': model_path})
+    model_review.add_actuals(None, actuals_path=os.path.join(model_path, 'iris_actuals_with_dates_2.csv'),
+        actual_date_column='date')
+    assert len(get_sidecars_in_range(model_path)) > 0
+
+    model_review.delete_actuals(begin_date=DATE_FROM, end_date=DATE_TO)
+    assert get_sidecars_in_range(model_path) == []
@@ -0,0 +1,85 @@
+import datetime
+import os
+import shutil
+
+import pytest
+
+from a2ml.api.model_review.daily_scores_cache import DailyScoresCache
+from a2ml.api.model_review.model_review import ModelReview
+
+
+DATE_FROM = '2020-10-21'
+DATE_TO = '2020-10-23'
+
+def copy_model(tmp_path):
+    model_path = str(tmp_path / 'iris')
+    shutil.copytree('tests/fixtures/test_score_model_performance_daily/iris', model_path)
+
+    return model_path
+
+def score_daily(model_path, **params):
+    model_review = ModelReview(dict(model_path=model_path, use_scores_cache=True, **params))
+    res = model_review.score_model_performance_daily(DATE_FROM, DATE_TO)
+
+    return res, model_review.scores_cache_stats
+
+def assert_same_result(res, expected):
+    assert set(res.keys()) == set(expected.keys())
+
+    for day, day_res in expected.items():
+        assert res[day]['score_name'] == day_res['score_name']
+        assert res[day]['scores'] == pytest.approx(day_res['scores'])
+
+def test_days_are_scored_once(tmp_path):
+    model_path = copy_model(tmp_path)
+    expected = ModelReview({'model_path': model_path}).score_model_performance_daily(DATE_FROM, DATE_TO)
+
+    res, stats = score_daily(model_path)
+    assert stats == {'hits': 0, 'misses': 3, 'hit_rate': 0.0}
+    assert_same_result(res, expected)
+
+    res, stats = score_daily(model_path)
+    assert stats == {'hits': 3, 'misses': 0, 'hit_rate': 1.0}
+    assert_same_result(res, expected)
+
+def test_changed_day_is_rescored(tmp_path):
+    model_path = copy_model(tmp_path)
+    score_daily(model_path)
+
+    predictions_path = os.path.join(model_path, 'predictions')
+    shutil.copy(os.path.join(predictions_path, '2020-10-22_F281E06F0CB44CB_full_data.feather.zstd'),
+        os.path.join(predictions_path, '2020-10-23_F281E06F0CB44CC_full_data.feather.zstd'))
+
+    res, stats = score_daily(model_path)
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert '2020-10-23' in res
+
+def test_options_are_part_of_key(tmp_path):
+    model_path = copy_model(tmp_path)
+    score_daily(model_path)
+
+    _, stats = score_daily(model_path, roi={'filter': '', 'revenue': '$1', 'investment': '$1'})
+    assert stats['misses'] == 3
+
+def test_delete_actuals_invalidates_days(tmp_path):
+    model_path = copy_model(tmp_path)
+    score_daily(model_path)
+
+    ModelReview({'model_path': model_path}).delete_actuals(
+        begin_date=datetime.date(2020, 10, 22), end_date=datetime.date(2020, 10, 22))
+
+    res, stats = score_daily(model_path)
+    assert stats['hits'] == 2
+    assert res == {}
+
+def test_invalidate(tmp_path):
+    model_path = copy_model(tmp_path)
+    DailyScoresCache.invalidate(model_path, ['2020-10-22'])
+    score_daily(model_path)
+
+    DailyScoresCache.invalidate(model_path, [datetime.date(2020, 10, 22)])
+
+    _, stats = score_daily(model_path)
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
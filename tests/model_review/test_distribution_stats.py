@@ -0,0 +1,56 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+from a2ml.api.model_review.distribution_stats import DistributionStats
+
+
+def _make_df(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'num': rng.normal(100.0, 15.0, n),
+        'int_with_nulls': pd.Series(rng.integers(0, 10, n), dtype='float').where(rng.random(n) > 0.2),
+        'cat': rng.choice(['a', 'b', 'c'], n),
+        'cat_num': rng.integers(0, 3, n),
+    })
+
+def test_streaming_stats_same_as_full_data():
+    chunks = [_make_df(n, seed) for seed, n in enumerate([1, 10, 1000, 37])]
+    features = ['num', 'int_with_nulls', 'cat', 'cat_num', 'missing']
+
+    stats = DistributionStats(features, categorical_features=['cat_num'])
+    for chunk in chunks:
+        stats.add_df(chunk)
+
+    res = stats.get_result({'num': 'mapped_num'}, {'num': 0.1234567})
+
+    full_df = pd.concat(chunks, ignore_index=True)
+
+    assert res['mapped_num']['avg'] == pytest.approx(full_df['num'].mean(), rel=1e-12)
+    assert res['mapped_num']['std_dev'] == pytest.approx(full_df['num'].std(), rel=1e-12)
+    assert res['mapped_num']['imp'] == 0.123457
+    assert res['int_with_nulls']['avg'] == pytest.approx(full_df['int_with_nulls'].mean(), rel=1e-12)
+    assert res['int_with_nulls']['std_dev'] == pytest.approx(full_df['int_with_nulls'].std(), rel=1e-12)
+    assert res['cat']['dist'] == dict(full_df['cat'].value_counts())
+    assert res['cat_num']['dist'] == dict(full_df['cat_num'].value_counts())
+    assert not 'missing' in res
+
+def test_merge_accumulators():
+    df1 = _make_df(100, 1)
+    df2 = _make_df(200, 2)
+
+    stats1 = DistributionStats(['num', 'cat']).add_df(df1)
+    stats2 = DistributionStats(['num', 'cat']).add_df(df2)
+    merged = DistributionStats(['num', 'cat']).merge(stats1).merge(stats2.stats).get_result()
+
+    expected = DistributionStats(['num', 'cat']).add_df(pd.concat([df1, df2])).get_result()
+
+    assert merged['num']['avg'] == pytest.approx(expected['num']['avg'], rel=1e-12)
+    assert merged['num']['std_dev'] == pytest.approx(expected['num']['std_dev'], rel=1e-12)
+    assert merged['cat'] == expected['cat']
+
+def test_single_value():
+    res = DistributionStats(['num']).add_df(pd.DataFrame({'num': [5, None]})).get_result()
+
+    assert res == {'num': {'avg': 5.0, 'std_dev': 0, 'imp': 0}}
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from a2ml.api.model_review.drill_down_executor import DrillDownExecutor
+from a2ml.api.model_review.model_review import ModelReview
+
+
+def sum_rows(df, chunk):
+    return [(code, df['value'].iloc[rows].sum(), df['name'].iloc[rows].tolist()) for code, rows in chunk]
+
+def build_chunks(size, chunk_size):
+    codes = np.arange(size) % 7
+    buckets = [(code, np.where(codes == code)[0]) for code in range(7)]
+
+    return [buckets[pos:pos + chunk_size] for pos in range(0, len(buckets), chunk_size)]
+
+@pytest.mark.parametrize("executor", DrillDownExecutor.EXECUTORS)
+@pytest.mark.parametrize("names", [
+    ['a', 'b', None, 'd'],
+    # can't be converted to Arrow, frame is pickled to workers
+    ['a', 1, None, 2.5],
+])
+def test_map(executor, names):
+    df = pd.DataFrame({
+        'value': np.arange(100, dtype=float),
+        'name': (names * 25),
+    })
+    chunks = build_chunks(len(df), 2)
+
+    res = DrillDownExecutor(executor, workers_count=2, min_parallel_rows=0).map(sum_rows, df, chunks)
+
+    assert res == DrillDownExecutor('serial').map(sum_rows, df, chunks)
+    assert [item[0] for sublist in res for item in sublist] == list(range(7))
+
+def test_serial_below_threshold(monkeypatch):
+    monkeypatch.setattr(DrillDownExecutor, '_map_processes', None)
+    df = pd.DataFrame({'value': [1.0, 2.0], 'name': ['a', 'b']})
+
+    res = DrillDownExecutor('processes', workers_count=2, min_parallel_rows=3).map(sum_rows, df, build_chunks(2, 2))
+    assert len(res) == 4
+
+def test_unknown_executor():
+    with pytest.raises(Exception, match="Unknown drill-down executor"):
+        DrillDownExecutor('gpu')
+
+@pytest.mark.parametrize("executor", ['threads', 'processes'])
+def test_groups_scores_by_buckets(executor):
+    random = np.random.RandomState(5)
+    classes = np.array(['Iris-setosa', 'Iris-versicolor', 'Iris-virginica'])
+    df = pd.DataFrame({
+        'a2ml_actual': classes[random.randint(0, 3, 200)],
+        'class': classes[random.randint(0, 3, 200)],
+    })
+    group_codes = random.randint(0, 12, 200)
+    exp_mask = random.rand(200) < 0.5
+
+    model_path = 'tests/fixtures/test_score_actuals/lucas-iris'
+    model_review = ModelReview({'model_path': model_path})
+    expected = model_review._get_groups_scores_by_buckets(df, group_codes, 12, exp_mask, list(classes))
+
+    model_review = ModelReview({'model_path': model_path, 'drill_down_executor': executor,
+        'drill_down_workers_count': 2, 'drill_down_min_parallel_rows': 0})
+    res = model_review._get_groups_scores_by_buckets(df, group_codes, 12, exp_mask, list(classes))
+
+    assert res == expected
+    assert [item[1] for item in res] == list(np.bincount(group_codes))
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from a2ml.api.model_review.group_scores import GroupScores
+from a2ml.api.model_review.model_helper import ModelHelper
+from a2ml.api.model_review.model_review import ModelReview
+
+
+CLASSIFICATION_SCORES = [
+    'accuracy', 'precision', 'recall', 'f1', 'precision_micro', 'recall_macro', 'f1_macro',
+    'precision_weighted', 'recall_weighted', 'f1_weighted', 'f1_micro', 'precision_none', 'f1_none', 'roi'
+]
+
+REGRESSION_SCORES = ['neg_mean_absolute_error', 'neg_mean_squared_error', 'neg_rmse', 'r2', 'r2_score']
+
+def calculate_by_groups(options, y_true, y_pred, group_codes, groups_count):
+    res = []
+    for idx in range(groups_count):
+        selected = group_codes == idx
+        res.append(ModelHelper.calculate_scores(options, y_test=y_true[selected], y_pred=y_pred[selected],
+            raise_main_score=False))
+
+    return res
+
+def assert_same_scores(scores, expected):
+    assert len(scores) == len(expected)
+
+    for group_scores, expected_scores in zip(scores, expected):
+        assert set(group_scores.keys()) == set(expected_scores.keys())
+
+        for name, value in expected_scores.items():
+            if isinstance(value, list):
+                assert group_scores[name] == pytest.approx(value, abs=1e-12)
+            else:
+                assert group_scores[name] == pytest.approx(value, abs=1e-12), name
+
+@pytest.mark.parametrize("labels, binary", [
+    ([0, 1], True),
+    ([True, False], True),
+    (["yes", "no"], True),
+    ([0, 1, 2], False),
+    ([0.0, 1.0, 2.0, 3.0], False),
+])
+def test_classification_scores(labels, binary):
+    random = np.random.RandomState(0)
+    groups_count = 40
+    size = 600
+
+    y_true = np.array(labels)[random.randint(0, len(labels), size)]
+    y_pred = np.array(labels)[random.randint(0, len(labels), size)]
+    # Small groups have one or two labels, last groups are empty
+    group_codes = np.minimum(random.geometric(0.1, size) - 1, groups_count - 5)
+    group_codes[random.rand(size) < 0.05] = -1
+
+    options = {'task_type': 'classification', 'binaryClassification': binary,
+        'scoreNames': CLASSIFICATION_SCORES + ['tn', 'fp', 'fn', 'tp']}
+
+    assert GroupScores.is_supported(options)
+
+    scores = GroupScores(options).calculate(y_true, y_pred, group_codes, groups_count)
+    assert_same_scores(scores, calculate_by_groups(options, y_true, y_pred, group_codes, groups_count))
+
+def test_classification_scores_with_minority_class():
+    random = np.random.RandomState(1)
+    y_true = random.randint(0, 2, 300)
+    y_pred = random.randint(0, 2, 300)
+    group_codes = random.randint(0, 30, 300)
+
+    options = {'task_type': 'classification', 'binaryClassification': True, 'minority_target_class_pos': 0,
+        'scoreNames': ['precision', 'recall', 'f1', 'accuracy']}
+
+    scores = GroupScores(options).calculate(y_true, y_pred, group_codes, 30)
+    assert_same_scores(scores, calculate_by_groups(options, y_true, y_pred, group_codes, 30))
+
+def test_classification_scores_in_chunks(monkeypatch):
+    random = np.random.RandomState(2)
+    y_true = random.randint(0, 3, 500)
+    y_pred = random.randint(0, 3, 500)
+    group_codes = random.randint(0, 50, 500)
+    options = {'task_type': 'classification', 'scoreNames': ['accuracy', 'f1_weighted', 'recall_none']}
+
+    expected = GroupScores(options).calculate(y_true, y_pred, group_codes, 50)
+    monkeypatch.setattr(GroupScores, 'MAX_CONFUSION_CELLS', 7 * 9)
+
+    assert_same_scores(GroupScores(options).calculate(y_true, y_pred, group_codes, 50), expected)
+
+def test_regression_scores():
+    random = np.random.RandomState(3)
+    groups_count = 30
+    y_true = random.randn(500) * 10
+    y_pred = y_true + random.randn(500)
+    group_codes = np.minimum(random.geometric(0.1, 500) - 1, groups_count - 3)
+
+    options = {'task_type': 'regression', 'scoreNames': REGRESSION_SCORES}
+
+    scores = GroupScores(options).calculate(y_true, y_pred, group_codes, groups_count)
+    assert_same_scores(scores, calculate_by_groups(options, y_true, y_pred, group_codes, groups_count))
+
+def test_not_supported():
+    assert not GroupScores.is_supported({'task_type': 'classification', 'scoreNames': ['roc_auc']})
+    assert not GroupScores.is_supported({'task_type': 'regression', 'scoreNames': ['neg_mape']})
+    assert not GroupScores.is_supported({'task_type': 'timeseries', 'scoreNames': ['r2']})
+    assert not GroupScores.is_supported({'task_type': 'regression', 'scoreNames': ['r2'], 'score_top_count': 10})
+
+    options = {'task_type': 'classification', 'scoreNames': ['accuracy']}
+    assert GroupScores(options).calculate(np.array([0.5, 1]), np.array([1, 1]), np.array([0, 0]), 1) is None
+    assert GroupScores(options).calculate(np.array(["a", 1], dtype=object), np.array([1, 1]), np.array([0, 0]), 1) is None
+
+@pytest.mark.parametrize("model_path", [
+    'tests/fixtures/test_score_actuals/lucas-iris',
+    'tests/fixtures/test_score_actuals/iris_binary',
+])
+def test_drill_down_records_match_by_buckets(model_path, monkeypatch):
+    random = np.random.RandomState(4)
+    classes = np.array(['Iris-setosa', 'Iris-versicolor', 'Iris-virginica'])
+    size = 300
+    df = pd.DataFrame({
+        'a2ml_actual': classes[random.randint(0, 3, size)],
+        'class': classes[random.randint(0, 3, size)],
+        'tag': random.randint(0, 25, size).astype(float),
+        'info': random.rand(size),
+        'date': np.where(random.rand(size) < 0.5, '2020-10-21', '2020-10-25'),
+    })
+    df.loc[random.rand(size) < 0.05, 'tag'] = np.nan
+
+    model_review = ModelReview({'model_path': model_path})
+    item = {'name': 'tags', 'bucket_tag': 'tag', 'bucket_info': {'info': 'info'}}
+    experiment_params = {'filter_query': "date<'2020-10-23'"}
+    target_classes = []
+    score_names = ['precision', 'recall', 'f1', 'accuracy', 'tn', 'fp', 'fn', 'tp']
+    if not model_review.options.get('binaryClassification'):
+        target_classes = list(df['a2ml_actual'].unique())
+        score_names = ['precision_weighted', 'recall_weighted', 'f1_weighted',
+            'precision_none', 'recall_none', 'f1_none']
+
+    model_review.options['scoreNames'] = score_names
+    records = model_review._get_drill_down_records(df, item, experiment_params, score_names, target_classes)
+
+    monkeypatch.setattr(ModelReview, '_get_groups_scores', lambda *args: None)
+    expected = model_review._get_drill_down_records(df, item, experiment_params, score_names, target_classes)
+
+    assert len(records) == len(df['tag'].dropna().unique())
+    assert [record[0:3] for record in records] == [record[0:3] for record in expected]
+
+    for record, expected_record in zip(records, expected):
+        assert record == pytest.approx(expected_record, abs=1e-12)
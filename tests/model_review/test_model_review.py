@@ -16,6 +16,7 @@ from pyarrow import feather
 
 from a2ml.api.utils import fsclient
 from a2ml.api.utils.dataframe import DataFrame
+from a2ml.api.utils.model_metadata_cache import model_metadata_cache
 from a2ml.api.model_review.model_review import ModelReview
 from tests.vcr_helper import vcr
 
@@ -69,6 +70,18 @@ def test_score_model_performance_daily_none_actuals():
     score = date_item['scores'][date_item['score_name']]
     assert score == 1 / 3
 
+def test_score_model_performance_daily_reads_metadata_once():
+    model_path = 'tests/fixtures/test_score_model_performance_daily/iris_no_matches'
+
+    json_reads = []
+    for date_from in [datetime.date(2020, 10, 22), datetime.date(2020, 10, 21)]:
+        model_metadata_cache.clear()
+        fsclient.reset_read_stats()
+        ModelReview({'model_path': model_path}).score_model_performance_daily(date_from, datetime.date(2020, 10, 22))
+        json_reads.append(fsclient.get_read_stats().get('read_json_file', 0))
+
+    assert json_reads[0] == json_reads[1]
+
 def test_score_model_performance_daily_fn_fp():
     # one of the files does not contain base line scores
     # then nan converted to category gives additional invalid class on confision matrix
@@ -1088,12 +1101,13 @@ def test_score_actuals_another_result_first():
   assert res['accuracy'] == 1
   assert res['roi'] == (1050 - 1000) / 1000
 
-def test_build_review_data():
+@pytest.mark.parametrize("streaming", [False, True])
+def test_build_review_data(streaming):
     model_path = "tests/fixtures/test_build_review_data/iris"
     data_path = "tests/fixtures/test_build_review_data/iris_class_review_B6FD93C248984BC_review_8E0B1F1D71A44DF.csv"
     full_actuals_path = "predictions/2020-10-22_F856362B6833492_full_data.feather.zstd"
 
-    res = ModelReview({'model_path': model_path}).build_review_data(data_path=data_path)
+    res = ModelReview({'model_path': model_path}).build_review_data(data_path=data_path, streaming=streaming)
 
     assert re.match(".*/iris_class_review_[0-9A-F]{15}.parquet", res)
     assert 'B6FD93C248984BC' not in res
@@ -1109,17 +1123,37 @@ def test_build_review_data():
     for review_data_path in glob.glob('tests/fixtures/test_build_review_data/iris_class_review_*.parquet'):
       os.remove(review_data_path)
 
-def test_build_review_data_policy():
+@pytest.mark.parametrize("streaming", [False, True])
+def test_build_review_data_policy(streaming):
     model_path = "tests/fixtures/test_distribution_chart_stats/bikesharing"
     data_path = "tests/fixtures/test_distribution_chart_stats/bikesharing/bike_sharing_day.csv_review_date_2012-12-10_F935B3B26F1E470.parquet"
 
     res = ModelReview({'model_path': model_path}).build_review_data(data_path=data_path,
-      date_col='dteday', retrain_policy={'type': 'days_limit', 'value': 20}, date_to='2012-12-22')
+      date_col='dteday', retrain_policy={'type': 'days_limit', 'value': 20}, date_to='2012-12-22',
+      streaming=streaming)
     review_df = DataFrame({}).load_from_file(res)
 
     #print(len(review_df))
     assert len(review_df) == 21
     assert 'review_date_2012-12-22_' in res
+
+@pytest.mark.parametrize("retrain_policy", [None, {'type': 'days_limit', 'value': 20}])
+def test_build_review_data_streaming_same_as_memory(tmp_path, retrain_policy):
+    model_path = "tests/fixtures/test_distribution_chart_stats/bikesharing"
+    data_path = "tests/fixtures/test_distribution_chart_stats/bikesharing/bike_sharing_day.csv_review_date_2012-12-10_F935B3B26F1E470.parquet"
+
+    results = []
+    for streaming in [False, True]:
+      model_review = ModelReview({'model_path': model_path})
+      res = model_review.build_review_data(data_path=data_path, output=str(tmp_path / ("review_%s.parquet"%streaming)),
+        date_col='dteday', retrain_policy=retrain_policy, streaming=streaming)
+
+      assert model_review.build_review_stats['mode'] == ('streaming' if streaming else 'memory')
+      assert model_review.build_review_stats['peak_memory_mb'] > 0
+      results.append(pd.read_parquet(res))
+
+    assert len(results[1]) > 0
+    pd.testing.assert_frame_equal(results[0], results[1])
 # def test_build_review_data_2():
 #     model_path = 'tests/fixtures/test_distribution_chart_stats/bikesharing'
 
@@ -0,0 +1,85 @@
+import datetime
+import os
+import pathlib
+
+from a2ml.api.utils import fsclient
+from a2ml.api.model_review.model_review import ModelReview
+from a2ml.api.model_review.prediction_files_index import PredictionFilesIndex
+
+FILE_NAMES = [
+    '2020-02-20_549AA373A8FB470_actuals.feather.zstd',
+    '2020-08-02_d8f4a1d6-43c4-41bb-b1d3-4926faaad975_results.feather.zstd',
+    '2020-10-22_638A9CF95B254D0_no_features_data.feather.zstd',
+    '2020-10-22_F281E06F0CB44CB_full_data.feather.zstd',
+    '2020-10-24_A281E06F0CB44CB_full_data.feather.zstd',
+    'experiment_accuracy.json',
+]
+
+def _create_files(tmp_path):
+    predictions_path = tmp_path / 'predictions'
+    os.makedirs(predictions_path, exist_ok=True)
+    for name in FILE_NAMES:
+        pathlib.Path(predictions_path / name).touch()
+
+    return str(tmp_path)
+
+def _glob_files_by_day(model_path, date_from, date_to, path_suffix):
+    # Reference implementation: one glob per day
+    res = []
+    curr_date = date_from
+    while curr_date <= date_to:
+        path = os.path.join(model_path, "predictions/" + str(curr_date) + "*" + path_suffix)
+        files = fsclient.list_folder(path, wild=True, remove_folder_name=False, meta_info=False)
+        res.append((curr_date, sorted(files)))
+        curr_date += datetime.timedelta(days=1)
+
+    return res
+
+def test_files_by_day_same_as_glob(tmp_path):
+    model_path = _create_files(tmp_path)
+    date_from = datetime.date(2020, 2, 19)
+    date_to = datetime.date(2020, 10, 25)
+
+    index = PredictionFilesIndex(model_path)
+    for path_suffix in ["*_data.feather.zstd", "_*_data.feather.zstd", "actuals.feather.zstd", ".feather.zstd"]:
+        res = list(index.files_by_day(date_from, date_to, path_suffix))
+        assert res == _glob_files_by_day(model_path, date_from, date_to, path_suffix)
+
+    assert index.stats['source'] == 'listing'
+    assert index.stats['files'] == len(FILE_NAMES)
+
+def test_prediction_files_by_day_without_date_from(tmp_path):
+    model_path = _create_files(tmp_path)
+
+    res = list(ModelReview._prediction_files_by_day(model_path, None, '2020-10-22', "_*_data.feather.zstd"))
+
+    assert res[0][0] == datetime.date(2020, 10, 22)
+    assert len(res) == 1
+    assert [os.path.basename(f) for f in res[0][1]] == FILE_NAMES[2:4]
+
+def test_prediction_files_by_day_without_dates(tmp_path):
+    model_path = _create_files(tmp_path)
+
+    res = list(ModelReview._prediction_files_by_day(model_path, None, None, "_data.feather.zstd"))
+
+    assert res[0][0] == "today"
+    assert [os.path.basename(f) for f in res[0][1]] == FILE_NAMES[2:5]
+
+def test_manifest(tmp_path):
+    model_path = _create_files(tmp_path)
+
+    index = PredictionFilesIndex(model_path, use_manifest=True).load()
+    assert index.stats['source'] == 'listing'
+    assert fsclient.is_file_exists(index.manifest_path)
+
+    pathlib.Path(tmp_path / 'predictions' / '2020-10-25_B281E06F0CB44CB_full_data.feather.zstd').touch()
+    index.add_files(['2020-10-25_B281E06F0CB44CB_full_data.feather.zstd'])
+    index.remove_files([os.path.join(model_path, 'predictions', FILE_NAMES[0])])
+
+    index = PredictionFilesIndex(model_path, use_manifest=True).load()
+    assert index.stats['source'] == 'manifest'
+    assert index.first_date("_data.feather.zstd") == '2020-10-22'
+    assert index.all_files("actuals.feather.zstd") == []
+
+    res = list(index.files_by_day(datetime.date(2020, 10, 25), datetime.date(2020, 10, 25), "_data.feather.zstd"))
+    assert [os.path.basename(f) for f in res[0][1]] == ['2020-10-25_B281E06F0CB44CB_full_data.feather.zstd']
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import time
+
+import pytest
+import redis
+
+from a2ml.server import notification
+from a2ml.server.notification import AsyncReceiver, AsyncStreamReader, SyncSender
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+
+    monkeypatch.setattr(notification.config, 'notificator_redis_host', 'localhost')
+    monkeypatch.setattr(notification.config, 'notificator_log_flush_interval', 0.05)
+    monkeypatch.setattr(notification, 'sync_pool',
+        redis.ConnectionPool(connection_class=fakeredis.FakeConnection, server=server))
+    monkeypatch.setattr(notification, 'async_pool',
+        redis.asyncio.ConnectionPool(connection_class=fakeredis.aioredis.FakeConnection, server=server))
+
+    return fakeredis.FakeRedis(server=server)
+
+def read_messages(client, request_id):
+    return [json.loads(fields[b'json']) for (msg_id, fields) in client.xrange(request_id)]
+
+def test_logs_are_buffered(redis_server):
+    with SyncSender() as sender:
+        for idx in range(3):
+            sender.publish_log('req1', 'info', 'log %s' % idx)
+
+        assert redis_server.xlen('req1') == 0
+        time.sleep(0.2)
+        assert [message['msg'] for message in read_messages(redis_server, 'req1')] == ['log 0', 'log 1', 'log 2']
+
+        sender.publish_log('req1', 'info', 'log 3')
+        sender.publish_result('req1', 'SUCCESS', 'done')
+
+    # Buffered logs are sent before result
+    assert [message['type'] for message in read_messages(redis_server, 'req1')] == ['log']*4 + ['result']
+    assert len(notification.sync_pool._available_connections) == 1
+
+def test_logs_batch_size(redis_server, monkeypatch):
+    monkeypatch.setattr(notification.config, 'notificator_log_flush_interval', 10)
+    monkeypatch.setattr(notification.config, 'notificator_log_batch_size', 5)
+
+    sender = SyncSender()
+    for idx in range(12):
+        sender.publish_log('req%s' % (idx % 2), 'info', 'log %s' % idx)
+
+    assert redis_server.xlen('req0') + redis_server.xlen('req1') == 10
+    sender.close()
+    assert redis_server.xlen('req0') + redis_server.xlen('req1') == 12
+
+def test_streams_are_trimmed(redis_server, monkeypatch):
+    monkeypatch.setattr(notification.config, 'notificator_stream_maxlen', 10)
+
+    with SyncSender() as sender:
+        for idx in range(300):
+            sender.publish('req1', {'type': 'log', 'msg': idx})
+
+    # Stream is trimmed approximately, by whole nodes of 100 messages
+    assert redis_server.xlen('req1') <= 100
+    assert read_messages(redis_server, 'req1')[-1]['msg'] == 299
+
+def test_receiver_reads_messages(redis_server):
+    with SyncSender() as sender:
+        sender.publish_log('req1', 'info', 'log')
+        sender.publish_result('req1', 'SUCCESS', 'done')
+
+    async def receive():
+        receiver = AsyncReceiver('req1', '0')
+        try:
+            return [await receiver.get_message(timeout=0.1) for _ in range(3)]
+        finally:
+            await receiver.close()
+
+    messages = asyncio.run(receive())
+
+    assert [json.loads(message)['type'] for message in messages[:2]] == ['log', 'result']
+    assert json.loads(messages[1])['_msg_id'] > json.loads(messages[0])['_msg_id']
+    assert messages[2] is None
+
+def publish_logs(request_id, count, start=0):
+    with SyncSender() as sender:
+        for idx in range(start, start + count):
+            sender.publish(request_id, {'type': 'log', 'msg': idx})
+
+async def get_messages(subscription, count):
+    return [json.loads(await subscription.get_message(timeout=1)) for _ in range(count)]
+
+def test_stream_reader_shares_reads(redis_server):
+    publish_logs('req1', 5)
+    publish_logs('req2', 5)
+
+    async def receive():
+        reader = AsyncStreamReader()
+        subscriptions = [reader.subscribe('req1'), reader.subscribe('req1'), reader.subscribe('req2')]
+        messages = [await get_messages(subscription, 5) for subscription in subscriptions]
+
+        publish_logs('req1', 2, start=5)
+        messages[0] += await get_messages(subscriptions[0], 2)
+        assert await subscriptions[2].get_message(timeout=0.2) is None
+
+        for subscription in subscriptions:
+            reader.unsubscribe(subscription)
+        return messages, reader.get_stats()
+
+    messages, stats = asyncio.run(receive())
+
+    assert [message['msg'] for message in messages[0]] == list(range(7))
+    assert [message['msg'] for message in messages[1]] == list(range(5))
+    assert messages[1] == messages[0][:5]
+    assert [message['msg'] for message in messages[2]] == list(range(5))
+    # Both streams are read at once, each message is read once
+    assert stats['messages'] == 12
+    assert stats['dispatched'] == 19
+    assert stats['subscriptions'] == 0
+
+def test_stream_reader_reconnect(redis_server):
+    publish_logs('req1', 5)
+
+    async def receive():
+        reader = AsyncStreamReader()
+        first = reader.subscribe('req1')
+        messages = await get_messages(first, 5)
+
+        # Reconnected client gets messages after its last message id only
+        second = reader.subscribe('req1', messages[1]['_msg_id'])
+        return await get_messages(second, 3), await second.get_message(timeout=0.2), await first.get_message(timeout=0.2)
+
+    messages, second_none, first_none = asyncio.run(receive())
+
+    assert [message['msg'] for message in messages] == [2, 3, 4]
+    assert second_none is None
+    assert first_none is None
+
+def test_stream_reader_backpressure(redis_server, monkeypatch):
+    monkeypatch.setattr(notification.config, 'notificator_client_queue_size', 2)
+    publish_logs('req1', 5)
+
+    async def receive():
+        reader = AsyncStreamReader()
+        slow = reader.subscribe('req1')
+        fast = reader.subscribe('req1')
+        fast_messages = await get_messages(fast, 2)
+        await asyncio.sleep(0.3)
+        fast_messages += await get_messages(fast, 3)
+
+        assert slow.queue.qsize() == 2
+        return fast_messages, await get_messages(slow, 5)
+
+    fast_messages, slow_messages = asyncio.run(receive())
+
+    assert [message['msg'] for message in fast_messages] == list(range(5))
+    assert [message['msg'] for message in slow_messages] == list(range(5))
+
+def test_stream_reader_invalid_last_msg_id(redis_server):
+    publish_logs('req1', 3)
+
+    async def receive():
+        reader = AsyncStreamReader()
+        subscriptions = [reader.subscribe('req1', msg_id) for msg_id in ('$', 'abc', '1-2-3')]
+        return [await get_messages(subscription, 3) for subscription in subscriptions], reader.get_stats()
+
+    messages, stats = asyncio.run(receive())
+
+    # Invalid ids read stream from the start instead of failing reads of all streams
+    assert [[message['msg'] for message in items] for items in messages] == [[0, 1, 2]] * 3
+    assert stats['errors'] == 0
+
+def test_stream_reader_skips_bad_messages(redis_server):
+    publish_logs('req1', 2)
+    redis_server.xadd('req1', {'json': 'not json'})
+    redis_server.xadd('req1', {'other': '{}'})
+    publish_logs('req1', 2, start=2)
+    publish_logs('req2', 1)
+
+    async def receive():
+        reader = AsyncStreamReader()
+        subscriptions = [reader.subscribe('req1'), reader.subscribe('req1'), reader.subscribe('req2')]
+        messages = [await get_messages(subscription, 4) for subscription in subscriptions[:2]]
+        messages.append(await get_messages(subscriptions[2], 1))
+        return messages, await subscriptions[0].get_message(timeout=0.2), reader.get_stats()
+
+    messages, none_message, stats = asyncio.run(receive())
+
+    # Bad messages are skipped for all clients, the shared read goes on
+    assert [[message['msg'] for message in items] for items in messages] == [[0, 1, 2, 3], [0, 1, 2, 3], [0]]
+    assert none_message is None
+    assert stats['errors'] == 2
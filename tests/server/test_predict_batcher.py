@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from a2ml.server import server
+from a2ml.server.predict_batcher import PredictBatcher
+from a2ml.tasks_queue.tasks_api import predict_batch_task, predict_model_task, predict_task
+
+
+def make_params(request_id, data, model_id='model1', **kwargs):
+    kwargs['data'] = data
+    return {'context': 'ctx', 'args': [model_id], 'kwargs': kwargs, '_request_id': request_id}
+
+def run_batcher(batcher, requests, sleep=0.05):
+    async def run():
+        res = [batcher.add(task, params) for (task, params) in requests]
+        await asyncio.sleep(sleep)
+        return res
+
+    return asyncio.run(run())
+
+def test_requests_of_same_model_are_merged():
+    sent = []
+    batcher = PredictBatcher(sent.append, window_ms=10)
+    added = run_batcher(batcher, [
+        (predict_task, make_params('1', [{'a': 1}])),
+        (predict_task, make_params('2', [{'a': 2}, {'a': 3}])),
+        (predict_task, make_params('3', [{'a': 4}], model_id='model2')),
+        (predict_model_task, make_params('4', [{'a': 5}])),
+    ])
+
+    assert added == [True]*4
+    assert len(sent) == 3
+    assert sent[0]['args'] == ['model1']
+    assert sent[0]['kwargs']['data'] == [{'a': 1}, {'a': 2}, {'a': 3}]
+    assert sent[0]['_request_id'] not in ['1', '2']
+    assert sent[0]['_batch']['task'] == 'predict_task'
+    assert [(request['request_id'], request['count']) for request in sent[0]['_batch']['requests']] == \
+        [('1', 1), ('2', 2)]
+    assert sent[2]['_batch']['task'] == 'predict_model_task'
+
+    stats = batcher.get_stats()
+    assert stats['batches'] == 3
+    assert stats['requests'] == 4
+    assert stats['records'] == 5
+    assert stats['max_batch_size'] == 2
+    assert stats['wait_time']['p99'] >= stats['wait_time']['p50'] > 0
+
+def test_not_batched_requests():
+    sent = []
+    batcher = PredictBatcher(sent.append, window_ms=10, max_records=3)
+    added = run_batcher(batcher, [
+        (predict_task, make_params('1', None, filename='s3://bucket/data.csv')),
+        (predict_task, make_params('2', [{'a': 1}], score=True)),
+        (predict_task, make_params('3', [[1]])),
+        (predict_task, make_params('4', [{'a': 1}]*3)),
+        (predict_task, {'args': ['model1', None, [{'a': 1}]], 'kwargs': {}, '_request_id': '5'}),
+    ])
+
+    assert added == [False]*5
+    assert sent == []
+
+def test_batches_are_limited():
+    sent = []
+    batcher = PredictBatcher(sent.append, window_ms=10, max_records=3, max_requests=2)
+    run_batcher(batcher, [
+        (predict_task, make_params('1', [{'a': 1}])),
+        (predict_task, make_params('2', [{'a': 2}])),
+        (predict_task, make_params('3', [{'a': 3}, {'a': 4}])),
+        (predict_task, make_params('4', [{'a': 5}, {'a': 6}])),
+        (predict_task, make_params('5', [{'a': 7}], threshold=0.5)),
+    ])
+
+    assert [[request['request_id'] for request in params['_batch']['requests']] for params in sent] == \
+        [['1', '2'], ['3'], ['4'], ['5']]
+    assert sent[3]['kwargs']['threshold'] == 0.5
+
+def test_split_response():
+    response = {'result': True, 'data': {'predicted': [{'y': 1}, {'y': 2}, {'y': 3}]}}
+    assert PredictBatcher.split_response(response, [1, 2]) == [
+        {'result': True, 'data': {'predicted': [{'y': 1}]}},
+        {'result': True, 'data': {'predicted': [{'y': 2}, {'y': 3}]}},
+    ]
+
+    response = {'result': True, 'data': {'predicted': {'columns': ['a', 'y'], 'data': [[1, 0], [2, 1]]}}}
+    assert PredictBatcher.split_response(response, [1, 1])[1] == \
+        {'result': True, 'data': {'predicted': {'columns': ['a', 'y'], 'data': [[2, 1]]}}}
+
+    response = {'result': False, 'data': 'Model not found'}
+    assert PredictBatcher.split_response(response, [1, 2]) == [response, response]
+
+    with pytest.raises(Exception, match="returned 1 records instead of 2"):
+        PredictBatcher.split_response({'result': True, 'data': {'predicted': [{'y': 1}]}}, [1, 1])
+
+def test_batch_task_publishes_result_to_each_request():
+    batcher = PredictBatcher(lambda params: None)
+    params = None
+
+    async def run():
+        nonlocal params
+        batcher.add(predict_task, make_params('1', [{'a': 1}]))
+        batcher.add(predict_task, make_params('2', [{'a': 2}]))
+        params = PredictBatcher.merge_params(list(batcher._batches.values())[0])
+        params['_batch']['dispatched_at'] = params['_batch']['created_at']
+        batcher.reset_stats()
+
+    asyncio.run(run())
+    del params['context']
+
+    def predict(self, model_id, data=None, **kwargs):
+        return {'result': True, 'data': {'predicted': [dict(record, y=record['a']*10) for record in data]}}
+
+    with patch('a2ml.tasks_queue.tasks_api.A2ML.predict', predict), \
+            patch('a2ml.tasks_queue.tasks_api.notificator.publish_result') as publish_result:
+        predict_batch_task.apply([params])
+
+    results = {call.args[0]: call.args[2] for call in publish_result.call_args_list}
+    assert set(results.keys()) == {'1', '2'}
+    assert results['1']['response']['data']['predicted'] == [{'a': 1, 'y': 10}]
+    assert results['2']['response']['data']['predicted'] == [{'a': 2, 'y': 20}]
+    assert results['2']['batch']['size'] == 2
+    assert results['2']['batch']['latency']['p99'] >= 0
+
+def test_server_batches_predict_requests(monkeypatch):
+    sent = []
+    monkeypatch.setattr(server, 'predict_batcher', PredictBatcher(sent.append, window_ms=50))
+
+    with TestClient(server.app) as client, patch.object(predict_task, 'delay') as delay:
+        request_ids = []
+        for idx in range(2):
+            response = client.post('/api/v1/predict', json={'args': ['model1'], 'kwargs': {'data': [{'a': idx}]}})
+            request_ids.append(response.json()['data']['request_id'])
+
+        response = client.post('/api/v1/predict', json={'args': ['model1', 'data.csv']})
+        assert delay.call_count == 1
+
+    assert len(sent) == 1
+    assert [request['request_id'] for request in sent[0]['_batch']['requests']] == request_ids
+
+    response = TestClient(server.app).get('/api/v1/predict_batches/stats')
+    assert response.json()['data']['requests'] == 2
+    assert response.json()['data']['stream_reader']['subscriptions'] == 0
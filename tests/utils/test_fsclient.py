@@ -4,6 +4,7 @@ import tempfile
 import time
 import threading
 import unittest
+import unittest.mock
 import os
 import pytest
 import datetime
@@ -158,6 +159,21 @@ class TestFSClient(unittest.TestCase):
             for key in res.keys():
                 self.assertTrue(type(key) == str)
 
+    def test_load_json_without_folder_listing(self):
+        for path in self._get_test_paths():
+            path = os.path.join(path, "test_fast.json")
+            fsclient.write_json_file(path, {'param1': "value1"})
+
+            with unittest.mock.patch.object(fsclient, 'list_folder', side_effect=AssertionError("Folder listing")):
+                self.assertEqual({'param1': "value1"}, fsclient.read_json_file(path))
+                self.assertEqual({}, fsclient.read_json_file(path + ".missed"))
+                self.assertEqual({}, fsclient.read_json_file(os.path.dirname(path)))
+
+                with self.assertRaises(FileNotFoundError):
+                    fsclient.read_json_file(path + ".missed", check_if_exist=False)
+
+            fsclient.remove_file(path)
+
     def test_open_text(self):
         for path in self._get_test_paths():
             path = os.path.join(path, "test.txt")